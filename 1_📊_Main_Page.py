@@ -1,34 +1,29 @@
 # Imports
-import folium
-import pandas    as pd
-import streamlit as st
-
-from streamlit_folium import folium_static
-from folium.plugins   import MarkerCluster
-
-@st.cache_data
-def load_data(path):
-    """ Esta função tem a responsabilidade de fazer a carga de dados e salvar em um dataframe
-
-        Input: path (str)
-        Output: DataFrame
-    """ 
-    
-    return pd.read_csv(path)
-
-def to_csv(df):
-    """ Esta função tem a responsabilidade de converter um dataframe para .CSV e retornar os bytes do arquivo
-
-        Input: path (str)
-        Output: bytes
-    """     
-    return df.to_csv(index=False).encode('utf-8')
-
-def create_sidebar(df):
+import os
+
+import streamlit               as st
+import streamlit.components.v1 as components
+
+from utils.backend         import load_backend
+from utils.cache           import filter_rows, gather
+from utils.dataset         import current_version
+from utils.export          import EXPORT_SCOPES, load_exporter
+from utils.executor        import result, submit, submit_process
+from utils.geo             import load_geo
+from utils.index           import load_index
+from utils.instrumentation import finish_trace, stage, start_trace
+from utils.maps            import MAP_MODES, ZOOM_START, create_base_map, create_grid_layer, load_grid, map_html, use_grid
+from utils.search          import load_search
+from utils.snapshots       import get_snapshot
+from utils.store           import load_data
+from utils.views           import DEFAULT_COUNTRIES
+from utils.warmup          import start_warmup
+
+def create_sidebar(backend):
     """ Esta função tem a responsabilidade de criar a barra lateral
 
-        Input: df (DataFrame)
-        Output: multiselect
+        Input: backend (PandasBackend ou SQLiteBackend)
+        Output: tuple
     """ 
     
     with st.sidebar:
@@ -44,47 +39,102 @@ def create_sidebar(df):
             st.write('')
             st.write('### Filtros')
     
-            countries = df['country'].unique().tolist()
-            countries.sort()
-            country_select = st.multiselect('Escolha de quais países deseja visualizar os restaurantes', countries, ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia'])
+            countries = backend.options('country')
+            country_select = st.multiselect('Escolha de quais países deseja visualizar os restaurantes', countries, DEFAULT_COUNTRIES)
 
-            st.write('### Dados tratados')
-            csv = to_csv(df)
-            download = st.download_button(label='Download', data=csv, file_name='zomato.csv', mime='text/csv')
+            map_mode = st.selectbox('Modo do mapa', list(MAP_MODES))
 
-    return country_select
-    
+    return country_select, MAP_MODES[map_mode]
+
+def create_download(exporter, countries):
+    """ Esta função tem a responsabilidade de criar a exportação dos dados na barra lateral.
+        O arquivo só é gerado quando pedido e fica disponível para download enquanto a escolha não mudar
+
+        Input: exporter (Exporter), countries (list)
+        Output: None
+    """
+
+    with st.sidebar:
+        st.write('### Dados tratados')
+
+        scope = st.radio('Exportar', list(EXPORT_SCOPES), horizontal=True)
+        compress = st.checkbox('Compactar (gzip)')
+
+        countries = None if EXPORT_SCOPES[scope] == 'all' else countries
+        path = exporter.path(countries, compress)
+
+        if st.button('Preparar arquivo'):
+            st.session_state['export'] = exporter.export(countries, compress)
+
+        if st.session_state.get('export') == path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                st.download_button(label='Download', data=file, file_name='zomato.csv.gz' if compress else 'zomato.csv', mime='application/gzip' if compress else 'text/csv')
+
+def create_nearby(geo, df, bitmap, center):
+    """ Esta função tem a responsabilidade de listar os restaurantes selecionados mais próximos de um ponto
+        (por padrão, o centro do mapa), a partir do índice espacial
+
+        Input: geo (GeoIndex), df (DataFrame - dataset completo), bitmap (ndarray), center (tuple)
+        Output: None
+    """
+    st.subheader('Restaurantes próximos')
+
+    col1, col2, col3 = st.columns(3)
+    latitude = col1.number_input('Latitude', -90.0, 90.0, round(float(center[0]), 4), format='%.4f')
+    longitude = col2.number_input('Longitude', -180.0, 180.0, round(float(center[1]), 4), format='%.4f')
+    k = col3.slider('Quantidade de restaurantes', 1, 50, 10)
+
+    rows, distances = geo.nearest(latitude, longitude, k, bitmap)
+    nearby = gather(df, rows, NEARBY_COLUMNS).assign(distance_km=distances.round(2))
+
+    st.dataframe(nearby, use_container_width=True, hide_index=True)
+
+def create_search(search, df, bitmap):
+    """ Esta função tem a responsabilidade de buscar restaurantes por nome, endereço ou bairro entre os selecionados,
+        a partir do índice de busca (sem acentos e tolerante a pequenos erros de digitação)
+
+        Input: search (SearchIndex), df (DataFrame - dataset completo), bitmap (ndarray)
+        Output: None
+    """
+    st.subheader('Buscar restaurantes')
+
+    query = st.text_input('Nome, endereço ou bairro', placeholder='Ex.: Las Piñas, sushi, Connaught Place')
+
+    if query:
+        found = gather(df, search.search(query, SEARCH_LIMIT, bitmap), SEARCH_COLUMNS)
+
+        if len(found):
+            st.dataframe(found, use_container_width=True, hide_index=True)
+
+        else:
+            st.write('Nenhum restaurante encontrado.')
 
-def create_map(df):
-    location = (df['latitude'].mean(), df['longitude'].mean())
-    map = folium.Map(location, zoom_start=2, control_scale=True)
-    cluster = MarkerCluster().add_to(map)
-
-    for _, row in df.iterrows():
-        
-        html = f"""
-        <p>
-            <strong>{row['restaurant_name']}</strong>
-        </p>
-        <p>
-            Price: {row['average_cost_for_two']},00 ({row['currency']}) para dois</br>
-            Type: {row['cuisines']}</br>
-            Aggregate Rating: {row['aggregate_rating']}/5.0
-        </p>    
-        """
-        
-        folium.Marker((row['latitude'], row['longitude']), popup=folium.Popup(html, max_width=500), icon=folium.Icon(icon='house', prefix='fa', color=row['rating_color_name'])).add_to(cluster)
-
-    return map
-    
 path = 'datasets/clean/zomato.csv'
 img_path = 'img/logo.png'
+NEARBY_COLUMNS = ['restaurant_name', 'country', 'city', 'cuisines', 'aggregate_rating', 'average_cost_for_two', 'currency', 'cost_for_two_usd']
+SEARCH_COLUMNS = ['restaurant_name', 'country', 'city', 'locality', 'address', 'cuisines', 'aggregate_rating']
+SEARCH_LIMIT = 20
 
 # Definindo configuração da página
 st.set_page_config(page_title='Home', page_icon=img_path, layout='wide')
+start_trace('Home')
+# A versão do dataset é lida uma única vez: o rerun inteiro usa os mesmos dados, mesmo que uma versão nova seja publicada durante ele
+version = current_version(path)
+start_warmup(path, version)
+
+# Cabeçalho exibido antes da carga dos dados
+st.title('Fome Zero!')
+st.header('O Melhor lugar para encontrar seu mais novo restaurante favorito!')
+st.subheader('Temos as seguintes marcas dentro da nossa plataforma:')
 
 # Carregamento dos dados limpos
-df = load_data(path)
+stage('load')
+
+# Os loaders não exibem o spinner do Streamlit, pois também rodam em segundo plano (aquecimento e troca de versão)
+with st.spinner('Carregando os dados...'):
+    base = load_data(path, version)
+    backend = load_backend(path, version)
+    index = load_index(path, version)
 
 # ------------------------------- Início da lógica do programa
 
@@ -92,36 +142,83 @@ df = load_data(path)
 # Barra Lateral
 # -------------------------------
 
-country_select = create_sidebar(df)
-df=df[df['country'].isin(country_select)]
+stage('sidebar')
+country_select, map_mode = create_sidebar(backend)
+st.sidebar.caption(f'Versão dos dados: {version}')
+create_download(load_exporter(path, version), country_select)
+
+stage('filter')
+selection = index.select(country_select)
+
+# Apenas as posições das linhas selecionadas: cada trecho da página lê do dataset base só as colunas de que precisa
+rows = filter_rows(path, version, index, country_select)
+points = gather(base, rows, ['latitude', 'longitude'])
+
+# A seleção padrão (e as populares) já vem pronta da construção da versão do dataset: totais e HTML do mapa de marcadores
+snapshot = get_snapshot(path, version, 'main', country_select) or {}
+overview = snapshot.get('overview') or backend.overview(country_select)
+grid = use_grid(map_mode, len(rows))
+engine = 'exact' if map_mode == 'exact' else 'fast'
+
+# O mapa começa a ser montado antes das métricas e é exibido quando fica pronto
+view = st.session_state.get('map') or {}
+
+if grid:
+    # Apenas os agrupamentos (ou marcadores) da área visível são enviados; o mapa devolve zoom, área e centro a cada interação
+    map_task = submit('create_grid_layer', create_grid_layer, load_grid(path, version), load_geo(path, version), base, selection, country_select, view.get('zoom') or ZOOM_START, view.get('bounds'))
+
+elif engine in snapshot.get('maps', {}):
+    map_task = None
+
+else:
+    # O HTML do mapa com um marcador por restaurante é montado em outro processo
+    map_task = submit_process(map_html, country_select, engine, path, version)
 
 # ---------------------------------------------
 # Layout no Streamlit
 # ---------------------------------------------
 
-st.title('Fome Zero!')
-st.header('O Melhor lugar para encontrar seu mais novo restaurante favorito!')
-st.subheader('Temos as seguintes marcas dentro da nossa plataforma:')
+stage('metrics')
 
 with st.container():
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        st.metric('Restaurantes cadastrados', df['restaurant_id'].shape[0])
+        st.metric('Restaurantes cadastrados', overview['restaurants'])
 
     with col2:
-        st.metric('Países cadastrados', df['country'].nunique())
+        st.metric('Países cadastrados', overview['countries'])
 
     with col3:
-        st.metric('Cidades cadastradas', df['city'].nunique())
+        st.metric('Cidades cadastradas', overview['cities'])
 
     with col4:
-        st.metric('Avaliações feitas na plataforma', f'{df["votes"].sum():,}'.replace(',', '.'))
+        st.metric('Avaliações feitas na plataforma', f'{overview["votes"]:,}'.replace(',', '.'))
 
     with col5:
-        st.metric('Tipos de culinária oferecidos', df['cuisines'].nunique())
+        st.metric('Tipos de culinária oferecidos', overview['cuisines'])
+
+stage('map')
+if grid:
+    from streamlit_folium import st_folium
 
-folium_static(create_map(df), width=1060, height=450)
+    st_folium(create_base_map(points), key='map', width=1060, height=450, returned_objects=['zoom', 'bounds', 'center'], feature_group_to_add=result(map_task))
+
+else:
+    # Mesmo componente usado pelo folium_static (altura + 10 px da borda)
+    components.html(snapshot['maps'][engine] if map_task is None else result(map_task), width=1060, height=450 + 10)
+
+stage('nearby')
+if grid and view.get('center'):
+    center = (view['center']['lat'], view['center']['lng'])
+
+else:
+    center = (points['latitude'].mean(), points['longitude'].mean()) if len(points) else (0, 0)
+
+create_nearby(load_geo(path, version), base, selection, center)
+
+stage('search')
+create_search(load_search(path, version), base, selection)
 
 # ---------------------------------------------
 # Alterando texto padrão do multiselect
@@ -133,3 +230,5 @@ multi_css="""
 </style>
 """
 st.markdown(multi_css, unsafe_allow_html=True)
+
+finish_trace()
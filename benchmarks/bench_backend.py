@@ -0,0 +1,184 @@
+""" Benchmark dos backends de dados: pandas (DataFrame em memória) x SQLite (arquivo local).
+    Para cada tamanho de dataset e backend mede a construção e, em um processo novo, a carga, a memória (RSS)
+    e a latência das consultas das quatro páginas, conferindo que os dois backends devolvem os mesmos resultados
+
+    Uso: python -m benchmarks.bench_backend [--sizes 7000 1000000 10000000] [--repeat N] [--backends pandas sqlite]
+"""
+# Imports
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import pandas as pd
+
+from benchmarks.bench_index import COUNTRIES, CUISINES
+from benchmarks.bench_pages import ROOT
+from benchmarks.synthetic   import write_csv
+from utils                  import store
+
+COLUMNS = ['restaurant_id', 'restaurant_name', 'country', 'city', 'cuisines', 'average_cost_for_two', 'currency', 'cost_for_two_usd', 'aggregate_rating', 'votes']
+
+def rss_mb(field='VmRSS'):
+    """ Esta função tem a responsabilidade de informar a memória residente do processo: atual (VmRSS) ou o pico (VmHWM).
+        O ru_maxrss não serve aqui, pois no Linux ele mantém o pico do processo pai anterior ao exec
+
+        Input: field (str)
+        Output: float
+    """
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) / 1024
+
+    return 0.0
+
+def workload(backend, countries):
+    """ Esta função tem a responsabilidade de listar as consultas que as quatro páginas fazem em um rerun
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list)
+        Output: dict (nome -> callable)
+    """
+    return {
+        'filtros (países e culinárias)': lambda: (backend.options('country'), backend.options('cuisines')),
+        'principal: totais': lambda: backend.overview(countries),
+        'países: rollup por país': lambda: backend.rollup('country', countries),
+        'países: cidades por país': lambda: backend.distinct('country', 'city', countries),
+        'cidades: rollup por cidade': lambda: backend.rollup(['country', 'city'], countries),
+        'cidades: culinárias por cidade': lambda: backend.distinct(['country', 'city'], 'cuisines', countries),
+        'culinárias: rollup por culinária': lambda: backend.rollup('cuisines', countries),
+        'culinárias: melhor por culinária': lambda: [backend.top(countries, [cuisine], 1, COLUMNS) for cuisine in CUISINES[:5]],
+        'culinárias: top 20': lambda: backend.top(countries, CUISINES, 20, COLUMNS)
+    }
+
+def digest(result):
+    """ Esta função tem a responsabilidade de resumir o resultado de uma consulta em um hash independente do backend
+        (categorias viram texto, números com 9 algarismos significativos, sem o índice)
+
+        Input: result (DataFrame, dict, list ou tuple)
+        Output: str
+    """
+    if isinstance(result, pd.DataFrame):
+        result = result.reset_index(drop=True).astype({column: str for column in result.columns if result[column].dtype == 'category'})
+
+        # Nos agrupamentos a ordem das linhas não importa (o pandas segue a ordem das categorias, o SQLite a alfabética);
+        # nas listas de restaurantes a ordem é o próprio ranking
+        if 'restaurant_id' not in result.columns:
+            result = result.sort_values(list(result.columns[result.dtypes == object]), ignore_index=True)
+
+        # O pandas guarda as notas em float32 (4.9 -> 4.900000095); o SQLite, em precisão dupla
+        for column in result.columns[result.dtypes == 'float32']:
+            result[column] = result[column].astype('float64').round(4)
+        text = result.to_csv(index=False, float_format='%.9g')
+
+    elif isinstance(result, (list, tuple)):
+        text = '|'.join(digest(item) for item in result)
+
+    else:
+        text = repr(result)
+
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+def probe(name, repeat):
+    """ Esta função tem a responsabilidade de medir um backend em um processo novo (chamada pelo subprocesso)
+
+        Input: name (str), repeat (int)
+        Output: dict
+    """
+    from utils.backend import PandasBackend, SQLiteBackend
+
+    result = {'rss_start_mb': rss_mb()}
+    start = time.perf_counter()
+    backend = SQLiteBackend() if name == 'sqlite' else PandasBackend(store.read_store())
+    result['load_seconds'] = time.perf_counter() - start
+    result['rss_loaded_mb'] = rss_mb()
+    result['queries'] = {}
+
+    for selection, countries in [('padrão', COUNTRIES), ('todos', backend.options('country'))]:
+        for query, statement in workload(backend, countries).items():
+            result['queries'][f'{selection} | {query}'] = {
+                'seconds': min(timeit.repeat(statement, number=1, repeat=repeat)),
+                'digest': digest(statement())
+            }
+
+    result['rss_end_mb'] = rss_mb()
+    result['peak_rss_mb'] = rss_mb('VmHWM')
+
+    return result
+
+def build(directory, name):
+    """ Esta função tem a responsabilidade de construir o arquivo do backend (colunar ou SQLite) a partir do .CSV
+
+        Input: directory (str), name (str)
+        Output: float (segundos)
+    """
+    from utils.backend import DB_PATH, build_database
+
+    start = time.perf_counter()
+    csv_path = os.path.join(directory, store.CSV_PATH)
+
+    if name == 'sqlite':
+        build_database(csv_path, os.path.join(directory, DB_PATH))
+
+    else:
+        store.build_store(csv_path, os.path.join(directory, store.STORE_PATH))
+
+    return time.perf_counter() - start
+
+def run_backend(directory, name, repeat):
+    """ Esta função tem a responsabilidade de medir um backend em um subprocesso, para que a memória de um não conte no outro
+
+        Input: directory (str), name (str), repeat (int)
+        Output: dict
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'benchmarks.bench_backend', '--probe', name, '--repeat', str(repeat)]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        raise RuntimeError(output.stderr.strip())
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara os backends de dados pandas e SQLite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 1_000_000, 10_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--repeat', type=int, default=10, help='medições por consulta')
+    parser.add_argument('--backends', nargs='+', default=['pandas', 'sqlite'], help='backends medidos')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.repeat)))
+        return
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(size, os.path.join(directory, store.CSV_PATH), source=os.path.join(ROOT, store.CSV_PATH))
+            results = {}
+
+            for name in args.backends:
+                build_seconds = build(directory, name)
+                results[name] = dict(run_backend(directory, name, args.repeat), build_seconds=build_seconds)
+
+        print(f'--- {size} restaurantes')
+
+        for name, result in results.items():
+            print(f'{name:<8}: construção {result["build_seconds"]:7.1f} s | carga {result["load_seconds"] * 1000:8.1f} ms'
+                  f' | RSS carregado {result["rss_loaded_mb"]:7.0f} MB | pico {result["peak_rss_mb"]:7.0f} MB')
+
+        print(f'{"consulta":<50}' + ''.join(f'{name:>12}' for name in results))
+
+        for query in next(iter(results.values()))['queries']:
+            print(f'{query:<50}' + ''.join(f'{result["queries"][query]["seconds"] * 1000:9.3f} ms' for result in results.values()))
+
+            # Os backends precisam devolver os mesmos resultados
+            assert len({result['queries'][query]['digest'] for result in results.values()}) == 1, f'resultados diferentes: {query}'
+
+if __name__ == '__main__':
+    main()
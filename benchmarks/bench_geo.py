@@ -0,0 +1,150 @@
+""" Benchmark das consultas espaciais: índice espacial (grade z-order) x varredura com haversine em todas as linhas.
+    Confere que os dois caminhos devolvem os mesmos restaurantes, com e sem os filtros da barra lateral
+
+    Nas áreas, a meta de menos de 1 ms por consulta vale para resultados de até SMALL_RESULT restaurantes: acima disso
+    o tempo cresce com o tamanho do resultado, que precisa ser devolvido inteiro (o benchmark mostra os dois casos)
+
+    Uso: python -m benchmarks.bench_geo [--sizes 7000 100000 1000000] [--queries N] [--k K]
+"""
+# Imports
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_index import COUNTRIES, CUISINES
+from benchmarks.synthetic   import synthesize
+from utils                  import store
+from utils.geo              import GeoIndex, haversine
+from utils.index            import BitmapIndex
+from utils.maps             import DETAIL_LIMIT
+
+SMALL_RESULT = 10_000   # restaurantes no resultado até os quais uma área deve levar menos de 1 ms
+
+def brute_nearest(df, mask, latitude, longitude, k):
+    """ Esta função tem a responsabilidade de encontrar os k mais próximos calculando a distância de todas as linhas
+
+        Input: df (DataFrame), mask (ndarray ou None), latitude (float), longitude (float), k (int)
+        Output: tuple (ndarray de posições, ndarray de distâncias)
+    """
+    distances = haversine(latitude, longitude, df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    rows = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+    distances = distances[rows]
+    order = np.lexsort((rows, distances))[:k]
+
+    return rows[order], distances[order]
+
+def brute_within(df, mask, south, west, north, east):
+    """ Esta função tem a responsabilidade de encontrar os restaurantes de uma área testando todas as linhas
+
+        Input: df (DataFrame), mask (ndarray ou None), south, west, north, east (float)
+        Output: ndarray
+    """
+    latitude = df['latitude'].to_numpy()
+    longitude = (df['longitude'].to_numpy() - west) % 360 + west
+    inside = (latitude >= south) & (latitude <= north) & (longitude <= east)
+
+    return np.flatnonzero(inside if mask is None else inside & mask)
+
+def points(df, count, rng):
+    """ Esta função tem a responsabilidade de sortear os pontos das consultas: metade perto de restaurantes, metade em qualquer lugar
+
+        Input: df (DataFrame), count (int), rng (Generator)
+        Output: list de (latitude, longitude)
+    """
+    rows = rng.integers(0, len(df), count // 2)
+    near = zip(df['latitude'].to_numpy()[rows] + rng.normal(0, 0.02, len(rows)), df['longitude'].to_numpy()[rows] + rng.normal(0, 0.02, len(rows)))
+    anywhere = zip(rng.uniform(-60, 70, count - len(rows)), rng.uniform(-180, 180, count - len(rows)))
+
+    return [(float(latitude), float(longitude)) for latitude, longitude in [*near, *anywhere]]
+
+def boxes(df, count, rng):
+    """ Esta função tem a responsabilidade de sortear as áreas das consultas, do tamanho de um bairro ao de um continente,
+        algumas cruzando o antimeridiano como as que o leaflet devolve ao arrastar o mapa
+
+        Input: df (DataFrame), count (int), rng (Generator)
+        Output: list de (south, west, north, east)
+    """
+    result = []
+
+    for (latitude, longitude), size in zip(points(df, count, rng), 10 ** rng.uniform(-2, 1.5, count)):
+        west = longitude - size + rng.choice([0, 360])
+        result.append((latitude - size / 2, west, latitude + size / 2, west + 2 * size))
+
+    return result
+
+def measure(queries, statement):
+    """ Esta função tem a responsabilidade de executar as consultas e medir o tempo médio de cada uma
+
+        Input: queries (list), statement (callable)
+        Output: tuple (list de resultados, float em ms)
+    """
+    results, seconds = timings(queries, statement)
+
+    return results, float(np.mean(seconds)) * 1000
+
+def timings(queries, statement):
+    """ Esta função tem a responsabilidade de executar as consultas medindo cada uma
+
+        Input: queries (list), statement (callable)
+        Output: tuple (list de resultados, ndarray de segundos)
+    """
+    results, seconds = [], []
+
+    for query in queries:
+        start = time.perf_counter()
+        results.append(statement(*query))
+        seconds.append(time.perf_counter() - start)
+
+    return results, np.array(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o índice espacial com a varredura por haversine')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--queries', type=int, default=200, help='consultas por cenário')
+    parser.add_argument('--k', type=int, default=10, help='quantidade de vizinhos')
+    args = parser.parse_args()
+
+    base = store.read_store()
+    rng = np.random.default_rng(0)
+
+    for size in args.sizes:
+        df = synthesize(base, size)
+        index = BitmapIndex(df)
+
+        start = time.perf_counter()
+        geo = GeoIndex(df)
+        print(f'--- {size} restaurantes | construção do índice: {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        nearest, within = points(df, args.queries, rng), boxes(df, args.queries, rng)
+
+        for name, bitmap in [('sem filtros', None), ('países', index.select(COUNTRIES)), ('países & culinárias', index.select(COUNTRIES, CUISINES))]:
+            mask = None if bitmap is None else index.mask(bitmap)
+
+            found, indexed = measure(nearest, lambda latitude, longitude: geo.nearest(latitude, longitude, args.k, bitmap))
+            expected, brute = measure(nearest, lambda latitude, longitude: brute_nearest(df, mask, latitude, longitude, args.k))
+
+            # Os dois caminhos precisam encontrar os mesmos vizinhos, na mesma ordem
+            for (rows, distances), (brute_rows, brute_distances) in zip(found, expected):
+                assert (rows == brute_rows).all() and np.allclose(distances, brute_distances)
+
+            print(f'{"k=" + str(args.k) + " mais próximos | " + name:<40}: índice {indexed:8.3f} ms | haversine {brute:8.3f} ms')
+
+            found, seconds = timings(within, lambda *box: geo.within(*box, bitmap))
+            expected, brute = measure(within, lambda *box: brute_within(df, mask, *box))
+
+            for rows, brute_rows in zip(found, expected):
+                assert (rows == brute_rows).all()
+
+            # O tempo de uma área cresce com o resultado (todas as posições são devolvidas, em ordem): a meta de 1 ms vale
+            # para resultados de até SMALL_RESULT restaurantes; os maiores aparecem na média e no máximo
+            small = np.array([len(rows) <= SMALL_RESULT for rows in found])
+            _, limited = measure(within, lambda *box: geo.within(*box, bitmap, DETAIL_LIMIT))
+
+            print(f'{"área visível | " + name:<40}: índice {seconds.mean() * 1000:8.3f} ms | varredura {brute:8.3f} ms'
+                  f' | mediana {np.median(seconds) * 1000:.3f} ms, máximo {seconds.max() * 1000:.2f} ms ({max(map(len, found))} restaurantes)'
+                  f' | até {SMALL_RESULT} restaurantes: p90 {np.percentile(seconds[small], 90) * 1000:.3f} ms'
+                  f' | limit={DETAIL_LIMIT}: {limited:.3f} ms')
+
+if __name__ == '__main__':
+    main()
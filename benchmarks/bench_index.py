@@ -0,0 +1,67 @@
+""" Benchmark dos filtros da barra lateral: máscaras com isin x índice de bitmaps.
+    No filtro de culinárias o isin é feito sobre as listas distintas de culinárias (restaurantes com pelo menos uma delas)
+
+    Uso: python -m benchmarks.bench_index [--sizes 7000 100000 1000000] [--repeat N]
+"""
+# Imports
+import argparse
+import timeit
+
+import numpy as np
+
+from benchmarks.synthetic import synthesize
+from utils                import store
+from utils.index          import BitmapIndex
+from utils.pipeline       import CUISINE_SEPARATOR
+
+COUNTRIES = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+CUISINES = ['American', 'Arabian', 'BBQ', 'Brazilian', 'Home-made', 'Italian', 'Japanese']
+
+def report(name, statement, repeat):
+    """ Esta função tem a responsabilidade de medir e imprimir o melhor tempo de uma operação
+
+        Input: name (str), statement (callable), repeat (int)
+        Output: None
+    """
+    best = min(timeit.repeat(statement, number=1, repeat=repeat))
+    print(f'{name:<44}: {best * 1000:9.3f} ms')
+
+def offers(df, cuisines):
+    """ Esta função tem a responsabilidade de filtrar as culinárias sem índice: um isin sobre as listas distintas de culinárias,
+        espalhado pelos códigos da categoria
+
+        Input: df (DataFrame), cuisines (list)
+        Output: ndarray (bool)
+    """
+    wanted = np.array([not set(value.split(CUISINE_SEPARATOR)).isdisjoint(cuisines) for value in df['cuisines'].cat.categories], dtype=bool)
+
+    return wanted[df['cuisines'].cat.codes.to_numpy()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara os filtros com isin e com o índice de bitmaps')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--repeat', type=int, default=20, help='medições por operação')
+    args = parser.parse_args()
+
+    base = store.read_store()
+
+    for size in args.sizes:
+        df = synthesize(base, size)
+
+        print(f'--- {size} restaurantes')
+        report('índice (construção, 1x)', lambda: BitmapIndex(df), 1)
+        index = BitmapIndex(df)
+
+        # Os dois caminhos precisam selecionar as mesmas linhas
+        assert (index.mask(index.select(COUNTRIES, CUISINES)) == (df['country'].isin(COUNTRIES).to_numpy() & offers(df, CUISINES))).all()
+
+        report('isin países', lambda: df['country'].isin(COUNTRIES), args.repeat)
+        report('bitmap países', lambda: index.select(COUNTRIES), args.repeat)
+        report('isin países & culinárias', lambda: df['country'].isin(COUNTRIES).to_numpy() & offers(df, CUISINES), args.repeat)
+        report('bitmap países & culinárias', lambda: index.select(COUNTRIES, CUISINES), args.repeat)
+        report('bitmap países & culinárias -> linhas', lambda: index.rows(index.select(COUNTRIES, CUISINES)), args.repeat)
+        report("isin 'Italian'", lambda: offers(df, ['Italian']), args.repeat)
+        report("bitmap 'Italian'", lambda: index.lookup('cuisines', 'Italian'), args.repeat)
+
+if __name__ == '__main__':
+    main()
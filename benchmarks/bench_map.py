@@ -0,0 +1,77 @@
+""" Benchmark do mapa: MarkerCluster com um marcador por restaurante (exato e rápido) x grade agrupada no servidor
+
+    Uso: python -m benchmarks.bench_map [--sizes 7000 100000 1000000] [--max-exact N]
+"""
+# Imports
+import argparse
+import time
+
+from benchmarks.synthetic import synthesize
+from utils                import maps, store
+from utils.geo            import GeoIndex
+from utils.index          import BitmapIndex
+
+# Visões medidas no modo em grade: mundo inteiro e uma região com zoom médio
+VIEWS = {
+    'mundo (zoom 2)': (2, None),
+    'sudeste do Brasil (zoom 6)': (6, {'_southWest': {'lat': -25, 'lng': -50}, '_northEast': {'lat': -19, 'lng': -40}}),
+}
+
+def measure(build):
+    """ Esta função tem a responsabilidade de medir o tempo de construção e o tamanho do HTML de um mapa
+
+        Input: build (callable)
+        Output: tuple (float, int)
+    """
+    start = time.perf_counter()
+    html = build().get_root().render()
+
+    return time.perf_counter() - start, len(html.encode('utf-8'))
+
+def grid_map(grid, geo, df, bitmap, countries, zoom, bounds):
+    """ Esta função tem a responsabilidade de montar o mapa da forma que o st_folium o envia: mapa base + camada
+
+        Input: grid (dict), geo (GeoIndex), df (DataFrame), bitmap (ndarray), countries (list), zoom (int), bounds (dict ou None)
+        Output: Map
+    """
+    map = maps.create_base_map(df)
+    maps.create_grid_layer(grid, geo, df, bitmap, countries, zoom, bounds).add_to(map)
+
+    return map
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara tempo de renderização e tamanho do mapa')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--max-exact', type=int, default=100_000, help='maior quantidade medida no modo MarkerCluster exato')
+    args = parser.parse_args()
+
+    base = store.read_store()
+
+    for size in args.sizes:
+        df = synthesize(base, size)
+        countries = df['country'].unique().tolist()
+
+        print(f'--- {size} restaurantes')
+
+        if size <= args.max_exact:
+            seconds, size_bytes = measure(lambda: maps.create_map(df, 'exact'))
+            print(f'{"MarkerCluster (exato)":<36}: {seconds * 1000:10.1f} ms | {size_bytes / 1024:12.1f} KB')
+        else:
+            print(f'{"MarkerCluster (exato)":<36}: (ignorado, acima de --max-exact)')
+
+        seconds, size_bytes = measure(lambda: maps.create_map(df, 'fast'))
+        print(f'{"MarkerCluster (rápido)":<36}: {seconds * 1000:10.1f} ms | {size_bytes / 1024:12.1f} KB')
+
+        start = time.perf_counter()
+        grid = maps.build_grid(df)
+        print(f'{"grade (construção, 1x)":<36}: {(time.perf_counter() - start) * 1000:10.1f} ms')
+
+        # Índices da página (publicados junto com a versão do dataset, fora da medida)
+        geo, bitmap = GeoIndex(df), BitmapIndex(df).select(countries)
+
+        for name, (zoom, bounds) in VIEWS.items():
+            seconds, size_bytes = measure(lambda: grid_map(grid, geo, df, bitmap, countries, zoom, bounds))
+            print(f'{"grade - " + name:<36}: {seconds * 1000:10.1f} ms | {size_bytes / 1024:12.1f} KB')
+
+if __name__ == '__main__':
+    main()
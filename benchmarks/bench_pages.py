@@ -0,0 +1,253 @@
+""" Benchmark das quatro páginas do dashboard, executadas sem navegador com o AppTest do Streamlit.
+    Para cada página e tamanho de dataset mede a partida a frio (imports + carga dos dados), os reruns com a seleção
+    padrão e com todos os países, o pico de memória (RSS) e o tamanho do que a página envia ao navegador
+
+    Uso: python -m benchmarks.bench_pages [--sizes 0 100000 1000000] [--repeat N] [--pages ...] [--output arquivo.json] [--baseline arquivo.json]
+         (tamanho 0 = dataset limpo original)
+"""
+# Imports
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import Counter
+from datetime    import datetime
+
+from benchmarks.synthetic import write_csv
+from utils                import store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PAGE = '1_📊_Main_Page.py'
+LINKED = [MAIN_PAGE, 'pages', 'img', '.streamlit']
+
+def pages():
+    """ Esta função tem a responsabilidade de listar as páginas do dashboard, na ordem do menu
+
+        Input: None
+        Output: list
+    """
+    return [MAIN_PAGE] + sorted(os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+def peak_rss_mb():
+    """ Esta função tem a responsabilidade de informar o pico de memória residente do processo
+
+        Input: None
+        Output: float
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def payload(at, media):
+    """ Esta função tem a responsabilidade de somar, por tipo de elemento, os bytes que a página envia ao navegador.
+        Arquivos (download_button, imagens) são contados pelo gerenciador de mídia
+
+        Input: at (AppTest), media (Counter)
+        Output: dict
+    """
+    sizes = Counter()
+
+    def walk(node):
+        children = getattr(node, 'children', None)
+
+        if children:
+            for child in children.values():
+                walk(child)
+
+        elif getattr(node, 'proto', None) is not None and hasattr(node.proto, 'ByteSize'):
+            sizes[node.type] += node.proto.ByteSize()
+
+    walk(at._tree)
+    sizes.update(media)
+
+    return dict(sizes, total=sum(sizes.values()))
+
+def timed(at):
+    """ Esta função tem a responsabilidade de executar a página uma vez e medir o tempo
+
+        Input: at (AppTest)
+        Output: float
+    """
+    start = time.perf_counter()
+    at.run()
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    return time.perf_counter() - start
+
+def reruns(at, media, repeat):
+    """ Esta função tem a responsabilidade de executar a página várias vezes, mantendo no contador de mídia apenas o último envio
+
+        Input: at (AppTest), media (Counter), repeat (int)
+        Output: list
+    """
+    seconds = []
+
+    for _ in range(repeat):
+        media.clear()
+        seconds.append(timed(at))
+
+    return seconds
+
+def probe(page, repeat):
+    """ Esta função tem a responsabilidade de medir uma página em um processo novo (chamada pelo subprocesso)
+
+        Input: page (str), repeat (int)
+        Output: dict
+    """
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1                        import AppTest
+
+    # Os arquivos enviados por download_button/st.image não aparecem na árvore de elementos
+    media = Counter()
+    load_and_get_id = MemoryMediaFileStorage.load_and_get_id
+
+    def counting(self, path_or_data, mimetype, kind, filename=None):
+        media[f'media:{kind.name.lower()}'] += len(path_or_data) if isinstance(path_or_data, bytes) else os.path.getsize(path_or_data)
+        return load_and_get_id(self, path_or_data, mimetype, kind, filename)
+
+    MemoryMediaFileStorage.load_and_get_id = counting
+
+    at = AppTest.from_file(page, default_timeout=3600)
+    result = {'cold_seconds': timed(at), 'cold_peak_rss_mb': peak_rss_mb()}
+
+    result['default_seconds'] = reruns(at, media, repeat)
+    result['default_payload'] = payload(at, media)
+
+    countries = at.sidebar.multiselect[0]
+    countries.set_value(countries.options)
+
+    result['all_first_seconds'] = timed(at)
+    result['all_seconds'] = reruns(at, media, repeat)
+    result['all_payload'] = payload(at, media)
+    result['peak_rss_mb'] = peak_rss_mb()
+
+    return result
+
+def workspace(directory, rows):
+    """ Esta função tem a responsabilidade de montar uma cópia do app (links simbólicos) com o dataset do tamanho pedido,
+        já com o arquivo colunar construído para que a partida a frio não inclua a conversão do .CSV
+
+        Input: directory (str), rows (int)
+        Output: dict
+    """
+    for name in LINKED:
+        if os.path.exists(os.path.join(ROOT, name)):
+            os.symlink(os.path.join(ROOT, name), os.path.join(directory, name))
+
+    csv_path = os.path.join(directory, store.CSV_PATH)
+
+    if rows:
+        write_csv(rows, csv_path, source=os.path.join(ROOT, store.CSV_PATH))
+    else:
+        os.makedirs(os.path.dirname(csv_path))
+        os.symlink(os.path.join(ROOT, store.CSV_PATH), csv_path)
+
+    start = time.perf_counter()
+    store.build_store(csv_path, os.path.join(directory, store.STORE_PATH))
+
+    return {'csv_mb': os.path.getsize(csv_path) / 1024 ** 2, 'store_build_seconds': time.perf_counter() - start}
+
+def run_page(directory, page, repeat):
+    """ Esta função tem a responsabilidade de medir uma página em um subprocesso, para que cada medição parta a frio
+
+        Input: directory (str), page (str), repeat (int)
+        Output: dict
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'benchmarks.bench_pages', '--probe', page, '--repeat', str(repeat)]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        return {'error': output.stderr.strip().splitlines()[-1]}
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def summary(name, result):
+    """ Esta função tem a responsabilidade de imprimir uma linha de resultado
+
+        Input: name (str), result (dict)
+        Output: None
+    """
+    if 'error' in result:
+        print(f'{name:<28}: ERRO {result["error"]}')
+        return
+
+    print(f'{name:<28}: frio {result["cold_seconds"] * 1000:8.0f} ms | padrão {min(result["default_seconds"]) * 1000:8.1f} ms'
+          f' | todos {min(result["all_seconds"]) * 1000:8.1f} ms | RSS {result["peak_rss_mb"]:7.0f} MB'
+          f' | payload {result["default_payload"]["total"] / 1024:8.0f} / {result["all_payload"]["total"] / 1024:8.0f} KB')
+
+def compare(results, baseline):
+    """ Esta função tem a responsabilidade de comparar os tempos e tamanhos com uma execução anterior
+
+        Input: results (dict), baseline (dict)
+        Output: None
+    """
+    print('--- comparação com a execução de referência (atual / referência)')
+
+    for size, run in results['runs'].items():
+        for page, result in run['pages'].items():
+            reference = baseline['runs'].get(size, {}).get('pages', {}).get(page)
+
+            if not reference or 'error' in result or 'error' in reference:
+                continue
+
+            ratios = {
+                'frio': result['cold_seconds'] / reference['cold_seconds'],
+                'padrão': min(result['default_seconds']) / min(reference['default_seconds']),
+                'todos': min(result['all_seconds']) / min(reference['all_seconds']),
+                'RSS': result['peak_rss_mb'] / reference['peak_rss_mb'],
+                'payload': result['all_payload']['total'] / max(reference['all_payload']['total'], 1)
+            }
+
+            print(f'{size:>8} {page:<28}: ' + ' | '.join(f'{name} {ratio:5.2f}x' for name, ratio in ratios.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede as páginas do dashboard com o AppTest do Streamlit')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100_000, 1_000_000], help='quantidades de restaurantes (0 = dataset limpo)')
+    parser.add_argument('--repeat', type=int, default=5, help='reruns medidos por seleção')
+    parser.add_argument('--pages', nargs='+', help='páginas a medir (padrão: todas)')
+    parser.add_argument('--output', help='arquivo .json dos resultados (padrão: benchmarks/results/pages-<data>.json)')
+    parser.add_argument('--baseline', help='arquivo .json de uma execução anterior para comparação')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.repeat)))
+        return
+
+    results = {'started': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(), 'machine': platform.machine(), 'repeat': args.repeat, 'runs': {}}
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            run = workspace(directory, size)
+            run['pages'] = {}
+
+            print(f'--- {f"{size} restaurantes" if size else "dataset limpo"} ({run["csv_mb"]:.1f} MB de .CSV, arquivo colunar em {run["store_build_seconds"]:.1f} s)')
+
+            for page in args.pages or pages():
+                run['pages'][page] = run_page(directory, page, args.repeat)
+                summary(page, run['pages'][page])
+
+            results['runs'][str(size)] = run
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'pages-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+
+    print(f'resultados em {output}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+if __name__ == '__main__':
+    main()
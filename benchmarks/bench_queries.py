@@ -0,0 +1,33 @@
+""" Benchmark das perguntas de negócio: expressões do notebook (pandas) x consultas sobre o cubo (utils.queries).
+    A igualdade das respostas é conferida em tests/test_queries.py
+
+    Uso: python -m benchmarks.bench_queries [--repeat N]
+"""
+# Imports
+import argparse
+
+import pandas as pd
+
+from benchmarks.bench_index import report
+from tests.test_queries     import QUESTIONS, explode
+from utils.queries          import Queries
+from utils.store            import CSV_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede as consultas das perguntas de negócio')
+    parser.add_argument('--repeat', type=int, default=50, help='medições por operação')
+    args = parser.parse_args()
+
+    df1 = pd.read_csv(CSV_PATH)
+
+    report('consultas (construção, 1x)', lambda: Queries(df1), 1)
+    queries = Queries(df1)
+
+    all_pairs = explode(df1)
+
+    for name, expression, query, _ in QUESTIONS:
+        report(f'pandas   {name}', lambda: expression(df1, all_pairs), args.repeat)
+        report(f'consulta {name}', lambda: query(queries, None, None), args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+""" Benchmark da troca de versão do dataset (utils.dataset): uma página é executada em loop, sem navegador (AppTest),
+    enquanto o .CSV limpo é substituído três vezes. Mede os reruns antes e durante a construção da nova versão
+    (não deve haver pausa de carga), o tempo até a publicação e a memória (RSS) depois de cada troca, que deve ficar
+    limitada a duas versões. Confere que, depois da troca, a página mostra os dados do novo .CSV
+
+    Uso: python -m benchmarks.bench_reload [--sizes 100000 1000000] [--page 1_📊_Main_Page.py] [--interval 0.5]
+"""
+# Imports
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_backend import rss_mb
+from benchmarks.bench_pages   import MAIN_PAGE, ROOT, timed, workspace
+from benchmarks.synthetic     import write_csv
+from utils                    import store
+
+COUNTRIES = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+SWAPS = 3
+TIMEOUT = 600
+
+def page_version(at):
+    """ Esta função tem a responsabilidade de ler a versão do dataset exibida na barra lateral da página
+
+        Input: at (AppTest)
+        Output: int
+    """
+    for caption in at.caption:
+        if caption.value.startswith('Versão dos dados:'):
+            return int(caption.value.split(':')[1])
+
+    raise RuntimeError('a página não exibe a versão do dataset')
+
+def live_versions():
+    """ Esta função tem a responsabilidade de contar as versões do dataset ainda em memória (uma por índice de bitmaps).
+        O RSS sozinho não basta: o alocador nem sempre devolve ao sistema a memória de uma versão descartada
+
+        Input: None
+        Output: int
+    """
+    from utils.index import BitmapIndex
+
+    gc.collect()
+
+    return sum(isinstance(item, BitmapIndex) for item in gc.get_objects())
+
+def replace_csv(rows, seed):
+    """ Esta função tem a responsabilidade de gravar um novo .CSV limpo e publicá-lo com troca atômica, como o pipeline
+
+        Input: rows (int), seed (int)
+        Output: int (restaurantes dos países padrão no novo .CSV)
+    """
+    tmp_path = write_csv(rows, f'{store.CSV_PATH}.tmp', source=os.path.join(ROOT, store.CSV_PATH), seed=seed)
+    os.replace(tmp_path, store.CSV_PATH)
+
+    return int(pd.read_csv(store.CSV_PATH, usecols=['country'])['country'].isin(COUNTRIES).sum())
+
+def probe(page, rows):
+    """ Esta função tem a responsabilidade de medir as trocas de versão em um processo novo (chamada pelo subprocesso)
+
+        Input: page (str), rows (int)
+        Output: dict
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(page, default_timeout=3600)
+    result = {'cold_seconds': timed(at), 'steady_seconds': [timed(at) for _ in range(5)], 'swaps': []}
+
+    gc.collect()
+    result['rss_mb'] = rss_mb()
+
+    for swap in range(1, SWAPS + 1):
+        # Cada versão reamostra os restaurantes com outra semente, para que a troca apareça nas métricas
+        expected = replace_csv(rows, swap)
+        version = page_version(at)
+        start = time.perf_counter()
+        reruns = []
+
+        while page_version(at) == version:
+            if time.perf_counter() - start > TIMEOUT:
+                raise RuntimeError(f'a versão {version + 1} não foi publicada em {TIMEOUT} s')
+
+            reruns.append(timed(at))
+
+        published = time.perf_counter() - start
+        shown = int(at.metric[0].value)
+
+        result['swaps'].append({
+            'version': page_version(at),
+            'published_seconds': published,
+            'reruns': len(reruns),
+            'build_rerun_median_seconds': statistics.median(reruns) if reruns else None,
+            'build_rerun_max_seconds': max(reruns, default=None),
+            'after_seconds': min(timed(at) for _ in range(3)),
+            'live_versions': live_versions(),
+            'rss_mb': rss_mb(),
+            'consistent': shown == expected
+        })
+
+    return result
+
+def run_probe(directory, page, rows, interval):
+    """ Esta função tem a responsabilidade de executar a medição em um subprocesso, com o intervalo de verificação pedido
+
+        Input: directory (str), page (str), rows (int), interval (float)
+        Output: dict
+    """
+    env = dict(os.environ, FOME_ZERO_DATASET_INTERVAL=str(interval), PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'benchmarks.bench_reload', '--probe', page, '--sizes', str(rows)]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        raise RuntimeError(output.stderr.strip())
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede a troca de versão do dataset com as páginas em uso')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--page', default=MAIN_PAGE, help='página executada durante as trocas')
+    parser.add_argument('--interval', type=float, default=0.5, help='segundos entre as verificações do .CSV')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.sizes[0])))
+        return
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            workspace(directory, size)
+            result = run_probe(directory, args.page, size, args.interval)
+
+        print(f'--- {size} restaurantes | frio {result["cold_seconds"]:.1f} s | rerun {min(result["steady_seconds"]) * 1000:.0f} ms | RSS {result["rss_mb"]:.0f} MB')
+
+        for swap in result['swaps']:
+            print(f'versão {swap["version"]}: publicada em {swap["published_seconds"]:5.1f} s | {swap["reruns"]:3d} reruns durante a construção'
+                  f' (mediana {(swap["build_rerun_median_seconds"] or 0) * 1000:6.0f} ms, máximo {(swap["build_rerun_max_seconds"] or 0) * 1000:6.0f} ms)'
+                  f' | rerun depois {swap["after_seconds"] * 1000:5.0f} ms | {swap["live_versions"]} versões em memória | RSS {swap["rss_mb"]:5.0f} MB')
+
+            # Depois da troca a página precisa mostrar o novo .CSV
+            assert swap['consistent'], f'a versão {swap["version"]} não mostra os dados do novo .CSV'
+            assert swap['live_versions'] <= store.LIVE_VERSIONS, f'{swap["live_versions"]} versões em memória'
+
+if __name__ == '__main__':
+    main()
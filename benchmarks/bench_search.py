@@ -0,0 +1,84 @@
+""" Benchmark da busca textual: str.contains nas colunas de texto x índice de trigramas.
+    Confere que todo restaurante encontrado pelo str.contains também é encontrado pelo índice
+
+    Uso: python -m benchmarks.bench_search [--sizes 7000 100000 1000000] [--repeat N] [--shared-names]
+"""
+# Imports
+import argparse
+import os
+import tempfile
+import time
+import timeit
+
+from benchmarks.bench_index import COUNTRIES
+from benchmarks.synthetic   import synthesize
+from utils                  import store
+from utils.index            import BitmapIndex
+from utils.search           import SEARCH_FIELDS, SearchIndex
+
+QUERIES = ['sushi', 'Las Piñas', 'las pinas', 'Connaught Place', 'burger king', 'Kadıköy', 'cafe', 'rua', 'pizza hut', 'Bonifacio Global']
+
+def contains(df, query):
+    """ Esta função tem a responsabilidade de buscar sem índice: str.contains, sem diferenciar maiúsculas, em cada coluna de texto
+
+        Input: df (DataFrame), query (str)
+        Output: ndarray (bool)
+    """
+    mask = False
+
+    for field in SEARCH_FIELDS:
+        mask = mask | df[field].str.contains(query, case=False, regex=False).to_numpy()
+
+    return mask
+
+def report(name, statement, repeat):
+    """ Esta função tem a responsabilidade de medir e imprimir o melhor tempo de uma operação
+
+        Input: name (str), statement (callable), repeat (int)
+        Output: None
+    """
+    best = min(timeit.repeat(statement, number=1, repeat=repeat))
+    print(f'{name:<44}: {best * 1000:10.3f} ms')
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a busca com str.contains e com o índice de trigramas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--repeat', type=int, default=5, help='medições por operação')
+    parser.add_argument('--shared-names', action='store_true', help='mantém os textos reamostrados (poucos documentos distintos)')
+    args = parser.parse_args()
+
+    base = store.read_store()
+
+    for size in args.sizes:
+        df = synthesize(base, size)
+
+        # Por padrão cada restaurante sintético ganha um nome próprio, para que o índice tenha um documento por linha (pior caso)
+        if not args.shared_names and size != len(base):
+            df['restaurant_name'] = df['restaurant_name'] + ' ' + df['restaurant_id'].astype(str)
+
+        index = BitmapIndex(df)
+        selection = index.select(COUNTRIES)
+
+        start = time.perf_counter()
+        search = SearchIndex.build(df)
+        print(f'--- {size} restaurantes | construção do índice: {time.perf_counter() - start:.1f} s')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = search.save(os.path.join(directory, 'search.arrays'))
+            size_mb = os.path.getsize(path) / 1024 ** 2
+            start = time.perf_counter()
+            search = SearchIndex.load(path)
+            print(f'arquivo do índice: {size_mb:.1f} MB | carga: {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        for query in QUERIES:
+            # Tudo o que o str.contains encontra contém todos os trigramas da busca
+            expected = set(contains(df, query).nonzero()[0].tolist())
+            assert expected <= set(search.search(query, None, min_match=1.0).tolist()), query
+
+            print(f'"{query}" ({len(expected)} com str.contains)')
+            report('  str.contains (4 colunas)', lambda: contains(df, query), min(args.repeat, 3))
+            report('  índice, 20 melhores', lambda: search.search(query, 20), args.repeat)
+            report('  índice, 20 melhores nos países', lambda: search.search(query, 20, selection), args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+""" Teste de carga com sessões simultâneas: N sessões simuladas (AppTest, cada uma com o próprio id de sessão) visitam
+    as quatro páginas em um único processo servidor, várias ao mesmo tempo, primeiro com a seleção padrão e depois com
+    uma seleção de países sorteada. Mede o pico de memória residente (RSS) do processo e a memória guardada nos caches,
+    total e da maior sessão, com e sem o orçamento de memória por sessão (FOME_ZERO_SESSION_MEMORY_MB).
+    Com --before, mede também uma cópia da árvore anterior (ex.: git worktree add /tmp/antes HEAD~1) para comparação
+
+    Uso: python -m benchmarks.bench_sessions [--sizes 0 1000000] [--sessions 50] [--concurrency 8] [--budgets 0 4] [--before DIRETÓRIO]
+         (tamanho 0 = dataset limpo original; orçamento 0 = sem limite)
+"""
+# Imports
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_pages   import LINKED, ROOT, pages, peak_rss_mb, timed, workspace
+from benchmarks.bench_workers import publish_shared
+
+def current_rss_mb():
+    """ Esta função tem a responsabilidade de informar a memória residente atual do processo
+
+        Input: None
+        Output: float
+    """
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+    return 0.0
+
+def link(directory, root):
+    """ Esta função tem a responsabilidade de apontar as páginas do app montado em directory para outra árvore
+
+        Input: directory (str), root (str)
+        Output: None
+    """
+    for name in LINKED:
+        target = os.path.join(directory, name)
+
+        if os.path.lexists(target):
+            os.remove(target)
+
+        if os.path.exists(os.path.join(root, name)):
+            os.symlink(os.path.join(root, name), target)
+
+def probe(sessions, concurrency, seed):
+    """ Esta função tem a responsabilidade de simular as sessões em um processo novo (chamada pelo subprocesso)
+
+        Input: sessions (int), concurrency (int), seed (int)
+        Output: dict
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime                                       import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager                    import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage             import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache             import ScriptCache
+    from streamlit.testing.v1                                    import AppTest
+    from streamlit.testing.v1.local_script_runner                import LocalScriptRunner
+
+    from utils.store import STORE_PATH, read_store
+
+    # Cada execução do AppTest instala um Runtime falso global e o remove ao terminar, o que quebra as execuções
+    # simultâneas; enquanto nenhuma execução tem o seu, todas usam um Runtime falso compartilhado, como o do servidor
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    # O AppTest usa o mesmo id de sessão e compila a página em todas as execuções; como no servidor, cada sessão simulada
+    # recebe o seu id e todas compartilham as páginas compiladas (compilações simultâneas falham em algumas versões do Python)
+    local = threading.local()
+    init = LocalScriptRunner.__init__
+    scripts = ScriptCache()
+
+    def init_session(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self._session_id = getattr(local, 'session', self._session_id)
+        self._script_cache = scripts
+
+    LocalScriptRunner.__init__ = init_session
+
+    countries = sorted(read_store(STORE_PATH, columns=['country'])['country'].unique().tolist())
+    rng = random.Random(seed)
+    selections = [rng.sample(countries, rng.randint(1, len(countries))) for _ in range(sessions + 1)]
+
+    def visit(number):
+        local.session = f'session-{number}'
+
+        for page in pages():
+            at = AppTest.from_file(page, default_timeout=3600)
+            timed(at)
+
+            at.sidebar.multiselect[0].set_value(selections[number])
+            timed(at)
+
+    # O plotly importa o orjson só na primeira serialização, e importações simultâneas do mesmo módulo podem falhar
+    if importlib.util.find_spec('orjson'):
+        importlib.import_module('orjson')
+
+    # Partida: carga dos dados e construção da versão, antes das sessões simultâneas
+    visit(sessions)
+
+    for thread in threading.enumerate():
+        if thread.name.startswith('fome-zero-warmup'):
+            thread.join()
+
+    loaded = current_rss_mb()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(visit, range(sessions)))
+
+    result = {'loaded_rss_mb': loaded, 'peak_rss_mb': peak_rss_mb(), 'rss_mb': current_rss_mb(), 'seconds': time.perf_counter() - start}
+
+    # A árvore anterior não tem a contabilidade de memória por sessão
+    try:
+        from utils.cache import memory_stats
+
+    except ImportError:
+        return result
+
+    return dict(result, **memory_stats())
+
+def run_probe(directory, root, budget, args):
+    """ Esta função tem a responsabilidade de executar o teste de carga em um subprocesso, com as páginas e o código de uma árvore
+
+        Input: directory (str), root (str), budget (float - MB), args (Namespace)
+        Output: dict
+    """
+    link(directory, root)
+
+    env = dict(os.environ, FOME_ZERO_SESSION_MEMORY_MB=str(budget), FOME_ZERO_DATASET_INTERVAL='0',
+               PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'bench_sessions.py'), '--probe',
+               '--sessions', str(args.sessions), '--concurrency', str(args.concurrency), '--seed', str(args.seed)]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        raise RuntimeError(output.stderr.strip())
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede a memória do servidor com várias sessões simultâneas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--sessions', type=int, default=50, help='sessões simuladas')
+    parser.add_argument('--concurrency', type=int, default=8, help='sessões executadas ao mesmo tempo')
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0, 4], help='orçamentos de memória por sessão, em MB (0 = sem limite)')
+    parser.add_argument('--before', help='árvore anterior do app, medida para comparação')
+    parser.add_argument('--seed', type=int, default=0, help='semente das seleções sorteadas')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.sessions, args.concurrency, args.seed)))
+        return
+
+    configs = ([('antes', args.before, 0)] if args.before else []) + [(f'orçamento {budget:g} MB' if budget else 'sem orçamento', ROOT, budget) for budget in args.budgets]
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            workspace(directory, size)
+            publish_shared(directory)
+
+            print(f'--- {size or "original"} restaurantes | {args.sessions} sessões, {args.concurrency} ao mesmo tempo')
+
+            for name, root, budget in configs:
+                result = run_probe(directory, os.path.abspath(root), budget, args)
+                caches = f' | caches {result["cache_bytes"] / 1024 ** 2:6.1f} MB | maior sessão {result["max_session_bytes"] / 1024 ** 2:5.1f} MB' if 'cache_bytes' in result else ''
+
+                print(f'{name:<18}: pico RSS {result["peak_rss_mb"]:6.0f} MB | após a carga {result["loaded_rss_mb"]:6.0f} MB'
+                      f' | final {result["rss_mb"]:6.0f} MB{caches} | {result["seconds"]:6.1f} s')
+
+if __name__ == '__main__':
+    main()
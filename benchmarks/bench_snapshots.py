@@ -0,0 +1,163 @@
+""" Benchmark das páginas pré-calculadas (utils.snapshots): cada página é executada sem navegador (AppTest) com a seleção
+    padrão, com e sem as páginas pré-calculadas. Mede o tempo do script (instrumentação) na primeira visita depois da
+    publicação de uma versão (caches de gráficos e recortes vazios) e nos reruns seguintes, e confere que a página
+    servida a partir das páginas pré-calculadas é idêntica à calculada
+
+    Uso: python -m benchmarks.bench_snapshots [--sizes 0 100000 1000000] [--repeat N]
+         (tamanho 0 = dataset limpo original)
+"""
+# Imports
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+
+from benchmarks.bench_pages import ROOT, pages, timed, workspace
+
+# Identificadores aleatórios que o folium gera a cada mapa
+FOLIUM_IDS = re.compile(r'[0-9a-f]{32}')
+
+def rendered(at):
+    """ Esta função tem a responsabilidade de resumir tudo o que a página enviou ao navegador em um hash
+
+        Input: at (AppTest)
+        Output: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def walk(node):
+        children = getattr(node, 'children', None)
+
+        if children:
+            for child in children.values():
+                walk(child)
+
+        elif getattr(node, 'proto', None) is not None and hasattr(node.proto, 'SerializeToString'):
+            if node.type == 'empty':
+                # Espaços vazios deixados pelo st.spinner, que só aparece quando a carga demora mais que o seu atraso
+                pass
+
+            elif node.type == 'iframe':
+                digest.update(FOLIUM_IDS.sub('', node.proto.srcdoc).encode())
+
+            elif node.type == 'component_instance':
+                digest.update(FOLIUM_IDS.sub('', node.proto.json_args).encode())
+
+            elif node.type == 'plotly_chart':
+                # A figura recarregada do arquivo tem o mesmo conteúdo, mas não necessariamente a mesma ordem das chaves
+                digest.update(json.dumps(json.loads(node.proto.figure.spec), sort_keys=True).encode())
+                digest.update(node.proto.figure.config.encode())
+
+            else:
+                digest.update(node.proto.SerializeToString(deterministic=True))
+
+    walk(at._tree)
+
+    return digest.hexdigest()
+
+def script_seconds(trace_log, page_count):
+    """ Esta função tem a responsabilidade de ler os tempos de script e os acertos das páginas pré-calculadas
+        dos últimos reruns gravados pela instrumentação
+
+        Input: trace_log (str), page_count (int)
+        Output: tuple (list de segundos, int de acertos)
+    """
+    with open(trace_log) as file:
+        traces = [json.loads(line) for line in file][-page_count:]
+
+    hits = sum(counter['value'] for trace in traces for counter in trace['counters']
+               if counter['name'] == 'cache_hits' and counter['labels'].get('cache') == 'snapshot')
+
+    return [trace['seconds'] for trace in traces], hits
+
+def probe(repeat):
+    """ Esta função tem a responsabilidade de medir as páginas em um processo novo (chamada pelo subprocesso)
+
+        Input: repeat (int)
+        Output: dict
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from utils.cache  import get_filter_cache
+    from utils.charts import get_chart_cache
+
+    trace_log = os.environ['FOME_ZERO_TRACE_LOG']
+    apps = {page: AppTest.from_file(page, default_timeout=3600) for page in pages()}
+
+    # Partida: carga dos dados e construção da versão (inclusive as páginas pré-calculadas), em segundo plano
+    for at in apps.values():
+        timed(at)
+
+    for thread in threading.enumerate():
+        if thread.name.startswith('fome-zero-warmup'):
+            thread.join()
+
+    result = {}
+
+    for page, at in apps.items():
+        # Como na troca de versão: os gráficos e recortes da versão anterior não servem mais
+        get_chart_cache.clear()
+        get_filter_cache.clear()
+        timed(at)
+        first, _ = script_seconds(trace_log, 1)
+
+        for _ in range(repeat):
+            timed(at)
+
+        reruns, hits = script_seconds(trace_log, repeat)
+        result[page] = {'first_seconds': first[0], 'rerun_seconds': statistics.median(reruns), 'hits': hits / repeat, 'rendered': rendered(at)}
+
+    return result
+
+def run_probe(directory, snapshots, repeat):
+    """ Esta função tem a responsabilidade de executar a medição em um subprocesso, com ou sem as páginas pré-calculadas
+
+        Input: directory (str), snapshots (bool), repeat (int)
+        Output: dict
+    """
+    env = dict(os.environ, FOME_ZERO_SNAPSHOTS='1' if snapshots else '0', FOME_ZERO_DATASET_INTERVAL='0',
+               FOME_ZERO_TRACE_LOG=os.path.join(directory, f'trace-{int(snapshots)}.jsonl'),
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-m', 'benchmarks.bench_snapshots', '--probe', '--repeat', str(repeat)]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        raise RuntimeError(output.stderr.strip())
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara as páginas calculadas a cada rerun com as pré-calculadas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--repeat', type=int, default=10, help='reruns medidos por página')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.repeat)))
+        return
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            workspace(directory, size)
+            live = run_probe(directory, False, args.repeat)
+            snapshot = run_probe(directory, True, args.repeat)
+
+        print(f'--- {size or "original"} restaurantes: calculada x pré-calculada')
+
+        for page in live:
+            print(f'{page:<28}: primeira visita {live[page]["first_seconds"] * 1000:8.1f} ms x {snapshot[page]["first_seconds"] * 1000:7.1f} ms'
+                  f' | rerun {live[page]["rerun_seconds"] * 1000:7.1f} ms x {snapshot[page]["rerun_seconds"] * 1000:7.1f} ms')
+
+            # A página servida das pré-calculadas precisa ser idêntica à calculada
+            assert snapshot[page]['hits'] >= 1, f'{page}: a seleção padrão não foi servida das páginas pré-calculadas'
+            assert snapshot[page]['rendered'] == live[page]['rendered'], f'{page}: a página pré-calculada difere da calculada'
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+""" Benchmark da partida a frio das páginas: tempo de import e tempo até o primeiro elemento na tela (first paint),
+    com o processo frio e com o aquecimento da partida do servidor (utils.serve) já concluído
+
+    Uso: python -m benchmarks.bench_startup [--sizes 0 1000000] [--repeat N] [--pages ...] [--output arquivo.json]
+         (tamanho 0 = dataset limpo original)
+"""
+# Imports
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+from benchmarks.bench_pages import ROOT, pages, workspace
+
+HEAVY_MODULES = ['pandas', 'pyarrow', 'plotly.express', 'folium', 'streamlit_folium']
+
+def page_imports(page):
+    """ Esta função tem a responsabilidade de extrair as instruções de import do topo de uma página
+
+        Input: page (str)
+        Output: Module
+    """
+    with open(page, encoding='utf-8') as file:
+        tree = ast.parse(file.read())
+
+    return ast.Module(body=[node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], type_ignores=[])
+
+def probe_imports(page):
+    """ Esta função tem a responsabilidade de medir, em um processo novo, o import do streamlit e os imports da página
+
+        Input: page (str)
+        Output: dict
+    """
+    start = time.perf_counter()
+    import streamlit
+    streamlit_seconds = time.perf_counter() - start
+
+    code = compile(page_imports(page), page, 'exec')
+    start = time.perf_counter()
+    exec(code, {'__name__': '__page__'})
+
+    return {'streamlit_seconds': streamlit_seconds, 'page_imports_seconds': time.perf_counter() - start, 'loaded': [module for module in HEAVY_MODULES if module in sys.modules]}
+
+def probe_paint(page, warm):
+    """ Esta função tem a responsabilidade de medir, em um processo novo, o tempo até o primeiro elemento enviado
+        ao navegador e até o fim da primeira execução da página
+
+        Input: page (str), warm (bool)
+        Output: dict
+    """
+    from streamlit.runtime.scriptrunner import ScriptRunner
+    from streamlit.testing.v1           import AppTest
+
+    from utils.warmup import warmup
+
+    if warm:
+        # Situação de um servidor iniciado com utils.serve, depois do aquecimento da partida
+        warmup()
+
+    paints = []
+    enqueue = ScriptRunner._enqueue_forward_msg
+
+    def recording(self, msg):
+        if not paints and msg.WhichOneof('type') == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            paints.append(time.perf_counter())
+
+        return enqueue(self, msg)
+
+    ScriptRunner._enqueue_forward_msg = recording
+
+    at = AppTest.from_file(page, default_timeout=3600)
+    start = time.perf_counter()
+    at.run()
+    total = time.perf_counter() - start
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    return {'first_paint_seconds': paints[0] - start, 'run_seconds': total}
+
+def run_probe(directory, *args):
+    """ Esta função tem a responsabilidade de executar uma medição em um subprocesso
+
+        Input: directory (str), args (str)
+        Output: dict
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', *args], capture_output=True, text=True, cwd=directory, env=env)
+
+    if output.returncode:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def median(runs, key):
+    """ Esta função tem a responsabilidade de calcular a mediana de uma medida entre as repetições
+
+        Input: runs (list), key (str)
+        Output: float
+    """
+    return statistics.median(run[key] for run in runs)
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o tempo de import e o first paint de cada página')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0], help='quantidades de restaurantes (0 = dataset limpo)')
+    parser.add_argument('--repeat', type=int, default=3, help='processos medidos por página')
+    parser.add_argument('--pages', nargs='+', help='páginas a medir (padrão: todas)')
+    parser.add_argument('--output', help='arquivo .json dos resultados (padrão: benchmarks/results/startup-<data>.json)')
+    parser.add_argument('--probe', nargs=2, metavar=('MEDIDA', 'PÁGINA'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        kind, page = args.probe
+        print(json.dumps(probe_imports(page) if kind == 'imports' else probe_paint(page, kind == 'warm')))
+        return
+
+    results = {'started': datetime.now().isoformat(timespec='seconds'), 'repeat': args.repeat, 'runs': {}}
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            run = workspace(directory, size)
+            run['pages'] = {}
+
+            print(f'--- {f"{size} restaurantes" if size else "dataset limpo"}')
+
+            for page in args.pages or pages():
+                imports = [run_probe(directory, '--probe', 'imports', page) for _ in range(args.repeat)]
+                cold = [run_probe(directory, '--probe', 'cold', page) for _ in range(args.repeat)]
+                warm = [run_probe(directory, '--probe', 'warm', page) for _ in range(args.repeat)]
+
+                result = {
+                    'streamlit_import_seconds': median(imports, 'streamlit_seconds'),
+                    'page_imports_seconds': median(imports, 'page_imports_seconds'),
+                    'loaded_by_imports': imports[0]['loaded'],
+                    'cold_first_paint_seconds': median(cold, 'first_paint_seconds'),
+                    'cold_run_seconds': median(cold, 'run_seconds'),
+                    'warm_first_paint_seconds': median(warm, 'first_paint_seconds'),
+                    'warm_run_seconds': median(warm, 'run_seconds')
+                }
+                run['pages'][page] = result
+
+                print(f'{page:<28}: imports {result["page_imports_seconds"] * 1000:6.0f} ms ({", ".join(result["loaded_by_imports"])})'
+                      f' | frio: paint {result["cold_first_paint_seconds"] * 1000:6.0f} ms, página {result["cold_run_seconds"] * 1000:6.0f} ms'
+                      f' | aquecido: paint {result["warm_first_paint_seconds"] * 1000:6.0f} ms, página {result["warm_run_seconds"] * 1000:6.0f} ms')
+
+            results['runs'][str(size)] = run
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'startup-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+
+    print(f'resultados em {output}')
+
+if __name__ == '__main__':
+    main()
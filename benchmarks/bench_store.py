@@ -0,0 +1,75 @@
+""" Benchmark de carga do dataset: .CSV com tipos inferidos x arquivo colunar tipado
+
+    Uso: python -m benchmarks.bench_store [--scale N] [--repeat N]
+"""
+# Imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from utils import store
+
+# Código executado em um processo novo para medir tempo e pico de memória sem interferência
+PROBE = """
+import json, sys, time
+import pandas as pd
+from utils import store
+
+def rss_mb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * 4096 / 1024 ** 2
+
+before = rss_mb()
+start = time.perf_counter()
+df = pd.read_csv(sys.argv[2]) if sys.argv[1] == 'csv' else store.read_store(sys.argv[2])
+elapsed = time.perf_counter() - start
+
+print(json.dumps({'seconds': elapsed, 'rss_mb': rss_mb() - before, 'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2, 'rows': len(df)}))
+"""
+
+def probe(kind, path):
+    """ Esta função tem a responsabilidade de medir uma carga em um subprocesso
+
+        Input: kind (str), path (str)
+        Output: dict
+    """
+    output = subprocess.run([sys.executable, '-c', PROBE, kind, path], capture_output=True, text=True, check=True, cwd=os.getcwd())
+
+    return json.loads(output.stdout)
+
+def scaled_csv(scale, directory):
+    """ Esta função tem a responsabilidade de replicar o .CSV limpo N vezes para simular dumps maiores
+
+        Input: scale (int), directory (str)
+        Output: str
+    """
+    if scale == 1:
+        return store.CSV_PATH
+
+    path = os.path.join(directory, 'zomato.csv')
+    pd.concat([store.read_csv(store.CSV_PATH)] * scale, ignore_index=True).to_csv(path, index=False)
+
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a carga do .CSV com a do arquivo colunar')
+    parser.add_argument('--scale', type=int, default=1, help='quantas vezes replicar o dataset limpo')
+    parser.add_argument('--repeat', type=int, default=3, help='quantas medições por formato')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = scaled_csv(args.scale, directory)
+        store_path = store.build_store(csv_path, os.path.join(directory, 'zomato.feather'))
+
+        for kind, path in [('csv', csv_path), ('store', store_path)]:
+            runs = [probe(kind, path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['seconds'])
+            print(f"{kind:>5}: {best['rows']:>9} linhas | {best['seconds'] * 1000:9.1f} ms | RSS +{best['rss_mb']:8.1f} MB | DataFrame {best['frame_mb']:8.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+""" Benchmark da página de culinárias: ordenação completa x listas de melhores restaurantes (top-K)
+
+    Uso: python -m benchmarks.bench_topk [--sizes 7000 100000 1000000] [--top 20] [--repeat N]
+"""
+# Imports
+import argparse
+
+from benchmarks.bench_index import COUNTRIES, CUISINES, offers, report
+from benchmarks.synthetic   import synthesize
+from utils                  import store
+from utils.topk             import TopK
+
+def sort_top(df, countries, cuisines, n):
+    """ Esta função tem a responsabilidade de reproduzir o caminho antigo: filtrar, ordenar tudo e pegar as n primeiras
+
+        Input: df (DataFrame), countries (list), cuisines (list), n (int)
+        Output: list
+    """
+    selected = df.loc[df['country'].isin(countries).to_numpy() & offers(df, cuisines), :]
+
+    return selected.sort_values(['aggregate_rating', 'restaurant_id'], ascending=[False, True]).head(n).index.tolist()
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a ordenação completa com o merge das listas top-K')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7000, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--top', type=int, default=20, help='quantidade de restaurantes da tabela')
+    parser.add_argument('--repeat', type=int, default=20, help='medições por operação')
+    args = parser.parse_args()
+
+    base = store.read_store()
+
+    for size in args.sizes:
+        df = synthesize(base, size)
+
+        print(f'--- {size} restaurantes')
+        report('top-K (construção, 1x)', lambda: TopK(df), 1)
+        topk = TopK(df)
+
+        # Os dois caminhos precisam devolver os mesmos restaurantes, na mesma ordem
+        assert df.index[topk.top(COUNTRIES, CUISINES, args.top)].tolist() == sort_top(df, COUNTRIES, CUISINES, args.top)
+
+        report(f'ordenação completa, top {args.top}', lambda: sort_top(df, COUNTRIES, CUISINES, args.top), args.repeat)
+        report(f'merge top-K, top {args.top}', lambda: topk.top(COUNTRIES, CUISINES, args.top), args.repeat)
+        report('ordenação completa, melhor por culinária', lambda: [sort_top(df, COUNTRIES, [cuisine], 1) for cuisine in CUISINES], args.repeat)
+        report('merge top-K, melhor por culinária', lambda: [topk.top(COUNTRIES, [cuisine], 1) for cuisine in CUISINES], args.repeat)
+
+if __name__ == '__main__':
+    main()
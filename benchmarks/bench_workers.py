@@ -0,0 +1,168 @@
+""" Benchmark da memória de vários workers do dashboard sobre os mesmos dados: o processo carregador (utils.shared)
+    publica o arquivo colunar e os índices uma única vez e cada worker executa as quatro páginas, sem navegador (AppTest).
+    Para cada tamanho de dataset mede, em cada worker, a memória residente (RSS), a parte privada (só dele) e a parte
+    compartilhada com os demais. A memória de um worker adicional é a parte privada, que não deve crescer com o dataset
+    (conferido em tests/test_workers.py)
+
+    Uso: python -m benchmarks.bench_workers [--sizes 0 100000 1000000] [--workers 3]
+         (tamanho 0 = dataset limpo original)
+"""
+# Imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_pages import ROOT, pages, timed, workspace
+from utils.store            import CSV_PATH
+
+def memory_mb(pid):
+    """ Esta função tem a responsabilidade de ler a memória de um processo: residente, proporcional (PSS),
+        privada e compartilhada com outros processos
+
+        Input: pid (int)
+        Output: dict
+    """
+    fields = {}
+
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+
+            if len(parts) == 3 and parts[0].endswith(':'):
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+        'shared': fields['Shared_Clean'] + fields['Shared_Dirty']
+    }
+
+def probe():
+    """ Esta função tem a responsabilidade de executar as páginas como um worker (chamada pelo subprocesso),
+        esperar o aquecimento dos recursos compartilhados e ficar parado até o processo principal terminar as medições
+
+        Input: None
+        Output: None
+    """
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+
+    for page in pages():
+        timed(AppTest.from_file(page, default_timeout=3600))
+
+    for thread in threading.enumerate():
+        if thread.name.startswith('fome-zero-warmup'):
+            thread.join()
+
+    print(json.dumps({'seconds': time.perf_counter() - start}), flush=True)
+    sys.stdin.readline()
+
+def run_workers(directory, workers, env=None):
+    """ Esta função tem a responsabilidade de iniciar os workers ao mesmo tempo, esperar as páginas de todos e medir a memória
+
+        Input: directory (str), workers (int), env (dict - variáveis de ambiente adicionais dos workers, opcional)
+        Output: list de dict
+    """
+    env = dict(os.environ, FOME_ZERO_DATASET_INTERVAL='0', PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])), **(env or {}))
+    command = [sys.executable, '-m', 'benchmarks.bench_workers', '--probe']
+    processes = [subprocess.Popen(command, cwd=directory, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+
+    try:
+        results = []
+
+        for process in processes:
+            line = process.stdout.readline()
+
+            if not line:
+                raise RuntimeError(process.stderr.read().strip())
+
+            results.append(dict(json.loads(line), **memory_mb(process.pid)))
+
+        return results
+
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+
+def publish_shared(directory):
+    """ Esta função tem a responsabilidade de executar o processo carregador, como no utils.workers
+
+        Input: directory (str)
+        Output: float (segundos)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'utils.shared'], cwd=directory, env=env, check=True, capture_output=True)
+
+    return time.perf_counter() - start
+
+def measure(size, workers, env=None):
+    """ Esta função tem a responsabilidade de montar o app com um dataset do tamanho pedido, executar o carregador
+        e medir os workers
+
+        Input: size (int - 0 = dataset limpo original), workers (int), env (dict - opcional)
+        Output: dict (restaurantes, tamanho do .CSV, segundos do carregador e medições de cada worker)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        info = workspace(directory, size)
+        loader = publish_shared(directory)
+        results = run_workers(directory, workers, env)
+
+    # Tamanho 0: o dataset limpo original
+    with open(os.path.join(ROOT, CSV_PATH)) as file:
+        rows = size or sum(1 for _ in file) - 1
+
+    return {'rows': rows, 'csv_mb': info['csv_mb'], 'loader': loader, 'workers': results}
+
+def growth(private):
+    """ Esta função tem a responsabilidade de calcular quanto a memória privada por worker cresce com o dataset,
+        entre o menor e o maior tamanho medidos
+
+        Input: private (dict - restaurantes -> MB privados por worker)
+        Output: float (MB por milhão de restaurantes)
+    """
+    smallest, largest = min(private), max(private)
+
+    return (private[largest] - private[smallest]) / max(largest - smallest, 1) * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede a memória por worker com os dados compartilhados')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--workers', type=int, default=3, help='workers executados ao mesmo tempo')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe()
+        return
+
+    private = {}
+
+    for size in args.sizes:
+        measured = measure(size, args.workers)
+        results, loader = measured['workers'], measured['loader']
+        private[measured['rows']] = sum(result['private'] for result in results) / len(results)
+
+        print(f'--- {size or "original"} restaurantes | .CSV {measured["csv_mb"]:.0f} MB | carregador {loader:.1f} s'
+              f' | PSS total {sum(result["pss"] for result in results):.0f} MB')
+
+        for number, result in enumerate(results, 1):
+            print(f'worker {number}: páginas {result["seconds"]:5.1f} s | RSS {result["rss"]:6.0f} MB | privada {result["private"]:6.0f} MB'
+                  f' | compartilhada {result["shared"]:6.0f} MB')
+
+    smallest, largest = min(private), max(private)
+
+    print(f'memória por worker adicional (privada): {private[smallest]:.0f} MB com {smallest} -> '
+          f'{private[largest]:.0f} MB com {largest} restaurantes ({growth(private):.0f} MB por milhão)')
+
+if __name__ == '__main__':
+    main()
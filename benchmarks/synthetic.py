@@ -0,0 +1,61 @@
+""" Geração de datasets sintéticos a partir do .CSV limpo
+
+    Uso: python -m benchmarks.synthetic [--rows 100000 1000000] [--output datasets/synthetic] [--seed N]
+"""
+# Imports
+import argparse
+import os
+
+import numpy  as np
+import pandas as pd
+
+from utils import store
+
+def synthesize(df, rows, seed=0):
+    """ Esta função tem a responsabilidade de gerar um dataset sintético com o mesmo esquema do dataset limpo,
+        reamostrando restaurantes reais com novos ids e coordenadas levemente deslocadas
+
+        Input: df (DataFrame), rows (int), seed (int)
+        Output: DataFrame
+    """
+    if rows == len(df):
+        return df
+
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), rows)].reset_index(drop=True)
+
+    sample['restaurant_id'] = np.arange(1, rows + 1, dtype=sample['restaurant_id'].dtype)
+    sample['latitude'] = (sample['latitude'] + rng.normal(0, 0.05, rows)).astype(sample['latitude'].dtype)
+    sample['longitude'] = (sample['longitude'] + rng.normal(0, 0.05, rows)).astype(sample['longitude'].dtype)
+
+    return sample
+
+def write_csv(rows, path, source=None, seed=0):
+    """ Esta função tem a responsabilidade de gravar um .CSV sintético com as mesmas colunas e formatos do .CSV limpo
+
+        Input: rows (int), path (str), source (str - opcional), seed (int)
+        Output: str
+    """
+    df = pd.read_csv(source or store.CSV_PATH)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sample = synthesize(df, rows, seed)
+
+    # Mesma precisão das coordenadas do .CSV limpo
+    sample[['latitude', 'longitude']] = sample[['latitude', 'longitude']].round(10)
+    sample.to_csv(path, index=False)
+
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera versões ampliadas do .CSV limpo, com o mesmo esquema')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='quantidades de restaurantes')
+    parser.add_argument('--output', default='datasets/synthetic', help='pasta dos .CSV gerados')
+    parser.add_argument('--seed', type=int, default=0, help='semente da reamostragem')
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        print(write_csv(rows, os.path.join(args.output, f'zomato_{rows}.csv'), seed=args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,19 @@
 # Import
-import pandas         as pd
-import streamlit      as st
-import plotly.express as px
-
-@st.cache_data
-def load_data(path):
-    """ Esta função tem a responsabilidade de fazer a carga de dados e salvar em um dataframe
-
-        Input: path (str)
-        Output: DataFrame
-    """    
-    return pd.read_csv(path)
-
-def create_sidebar(df):
+import streamlit as st
+
+from utils.backend         import load_backend
+from utils.charts          import show_chart
+from utils.dataset         import current_version
+from utils.executor        import render_parallel
+from utils.instrumentation import finish_trace, stage, start_trace
+from utils.snapshots       import get_snapshot
+from utils.views           import DEFAULT_COUNTRIES, country_charts
+from utils.warmup          import start_warmup
+
+def create_sidebar(backend):
     """ Esta função tem a responsabilidade de criar a barra lateral
 
-        Input: df (DataFrame)
+        Input: backend (PandasBackend ou SQLiteBackend)
         Output: list
     """ 
     
@@ -32,46 +30,31 @@ def create_sidebar(df):
             st.write('')
             st.write('### Filtros')
     
-            countries = df['country'].unique().tolist()
-            countries.sort()
-            country_select = st.multiselect('Escolha de quais países deseja visualizar os restaurantes', countries, ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia'])
+            countries = backend.options('country')
+            country_select = st.multiselect('Escolha de quais países deseja visualizar os restaurantes', countries, DEFAULT_COUNTRIES)
 
     return country_select
 
-def create_bar_graph(df, auto, labels, title, color=None):
-    """ Esta função tem a responsabilidade de criar um gráfico de barras
-
-        Input: df (DataFrame), auto (bool ou str), labels (dict), title (str), color (str - opcional)
-        Output: Figure
-    """
-    
-    title_layout = {
-        'text': title,
-        'y': 1,
-        'x': 0.5,
-        'xanchor': 'center',
-        'yanchor': 'top'   
-}
-    
-    x = list(labels['x'].keys())[0]
-    y = list(labels['y'].keys())[0] 
-
-    labels['x'].update(labels['y'])
-    labels.pop('y')
-    
-    bar = px.bar(df, x=x, y=y, text=y, text_auto=auto, labels=labels['x'], color=color)
-    bar.update_layout(title=title_layout)
-
-    return bar
-
 path = 'datasets/clean/zomato.csv'
 img_path = 'img/logo.png'
 
 # Definindo configuração da página
 st.set_page_config(page_title='Visão Países', page_icon=img_path, layout='wide')
+start_trace('Visão Países')
+# A versão do dataset é lida uma única vez: o rerun inteiro usa os mesmos dados, mesmo que uma versão nova seja publicada durante ele
+version = current_version(path)
+start_warmup(path, version)
+
+# Cabeçalho exibido antes da carga dos dados
+st.title('🌍 Visão Países')
+st.write('')
 
 # Carregamento dos dados limpos
-df = load_data(path)
+stage('load')
+
+# Os loaders não exibem o spinner do Streamlit, pois também rodam em segundo plano (aquecimento e troca de versão)
+with st.spinner('Carregando os dados...'):
+    backend = load_backend(path, version)
 
 # ------------------------------- Início da lógica do programa
 
@@ -79,43 +62,33 @@ df = load_data(path)
 # Barra Lateral
 # -------------------------------
 
-country_select = create_sidebar(df)
-df=df[df['country'].isin(country_select)]
+stage('sidebar')
+country_select = create_sidebar(backend)
+st.sidebar.caption(f'Versão dos dados: {version}')
+
+# A seleção padrão (e as populares) já vem pronta da construção da versão do dataset; as demais são calculadas aqui
+snapshot = get_snapshot(path, version, 'countries', country_select)
+charts = country_charts(backend, country_select, (path, version)) if snapshot is None else {}
 
 # ---------------------------------------------
 # Layout no Streamlit
 # ---------------------------------------------
 
-st.title('🌍 Visão Países')
-st.write('')
-
-# Quantidade de restaurantes por país
-restaurants_by_country = df.loc[:, ['restaurant_id', 'country']].groupby('country').count().reset_index().sort_values('restaurant_id', ascending=False)
-
-st.plotly_chart(create_bar_graph(restaurants_by_country, True, {'x': {'country': 'Países'}, 'y': {'restaurant_id': 'Quantidade de restaurantes'}}, 'Quantidade de restaurantes registrados por país'), use_container_width=True)
+stage('render')
 
+restaurants_slot = st.empty()
 st.write('---')
-
-# Quantidade de cidades por país
-cities_by_country = df.loc[:, ['city', 'country']].groupby('country').nunique().reset_index().sort_values('city', ascending=False)
-
-st.plotly_chart(create_bar_graph(cities_by_country, True, {'x': {'country': 'Países'}, 'y': {'city': 'Quantidade de cidades'}}, 'Quantidade de cidades registradas por país'), use_container_width=True)
-
+cities_slot = st.empty()
 st.write('---')
-
 col1, col2 = st.columns(2)
 
-with col1:
-    # Média de avaliações feitas por país
-    votes_by_country = df.loc[:, ['votes', 'country']].groupby('country').mean().reset_index().sort_values('votes', ascending=False)
-
-    st.plotly_chart(create_bar_graph(votes_by_country, '.2f', {'x': {'country': 'Países'}, 'y': {'votes': 'Quantidade de avaliações'}}, 'Média de avaliações feitas por país'), use_container_width=True)
-    
-with col2:
-    # Média de preço de um prato para duas pessoas por país
-    average_cost_for_two_by_country = df.loc[:, ['average_cost_for_two', 'country']].groupby('country').mean().reset_index().sort_values('average_cost_for_two', ascending=False)
-
-    st.plotly_chart(create_bar_graph(average_cost_for_two_by_country, '.2f', {'x': {'country': 'Países'}, 'y': {'average_cost_for_two': 'Preço de prato para duas pessoas'}}, 'Média de preço de um prato para duas pessoas por país'), use_container_width=True)
+# Os quatro gráficos são independentes: calculados em paralelo e exibidos assim que ficam prontos
+render_parallel([
+    ('restaurants_graph', restaurants_slot, charts.get('restaurants_graph')),
+    ('cities_graph', cities_slot, charts.get('cities_graph')),
+    ('votes_graph', col1.empty(), charts.get('votes_graph')),
+    ('cost_graph', col2.empty(), charts.get('cost_graph'))
+], show_chart, snapshot)
 
 # ---------------------------------------------
 # Alterando texto padrão do multiselect
@@ -127,3 +100,5 @@ multi_css="""
 </style>
 """
 st.markdown(multi_css, unsafe_allow_html=True)
+
+finish_trace()
@@ -0,0 +1,44 @@
+""" Paridade dos popups entre os motores de mapa exato (popup montado no servidor) e rápido (montado no navegador) """
+# Imports
+import os
+import re
+
+import pytest
+
+from utils.maps  import marker_payload, popup_html
+from utils.store import read_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, 'datasets', 'clean', 'zomato.csv')
+SAMPLE = 500
+
+@pytest.fixture(scope='module')
+def rows():
+    df = read_csv(CSV_PATH)
+
+    return df.sample(min(SAMPLE, len(df)), random_state=0)
+
+def fast_popups(rows):
+    """ Esta função tem a responsabilidade de montar os popups do motor rápido a partir do payload,
+        com a mesma substituição feita pelo callback JavaScript (utils.clusters)
+
+        Input: rows (DataFrame)
+        Output: list
+    """
+    payload = marker_payload(rows)
+
+    def field(name, i):
+        column = payload['fields'][name]
+        return column['values'][column['codes'][i]]
+
+    return [re.sub(r'\{(\w+)[^}]*\}', lambda match: field(match.group(1), i), payload['template']) for i in range(len(rows))]
+
+def test_fast_popups_match_exact(rows):
+    exact = [popup_html(row) for _, row in rows.iterrows()]
+
+    assert fast_popups(rows) == exact
+
+def test_fast_marker_colors_match_exact(rows):
+    field = marker_payload(rows)['fields']['rating_color_name']
+
+    assert [field['values'][code] for code in field['codes']] == rows['rating_color_name'].astype(str).tolist()
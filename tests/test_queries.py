@@ -0,0 +1,126 @@
+""" Respostas das perguntas de negócio: as consultas sobre o cubo (utils.queries) precisam ser iguais às expressões
+    do notebook (pandas) no dataset limpo, sem filtros e com filtros
+"""
+# Imports
+import os
+
+import numpy  as np
+import pandas as pd
+import pytest
+
+from utils.pipeline import CUISINE_SEPARATOR
+from utils.queries  import Queries
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, 'datasets', 'clean', 'zomato.csv')
+COUNTRIES = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+CUISINES = ['American', 'Arabian', 'BBQ', 'Brazilian', 'Home-made', 'Italian', 'Japanese']
+
+# Expressões do notebook (sobre o dataset lido sem tipos, como no notebook) e as consultas equivalentes;
+# nas perguntas "qual o nome" a ordenação final do notebook é trocada por leaders, que aceita qualquer empatado.
+# As perguntas sobre culinárias usam pairs, uma linha por (restaurante, culinária), no lugar da primeira culinária do notebook.
+# As perguntas de restaurantes por culinária já têm os seus filtros e só são conferidas sem filtros
+QUESTIONS = [
+    ('restaurantes', lambda df1, pairs: df1['restaurant_id'].nunique(), lambda q, c, k: q.count_restaurants(c, k), True),
+    ('países', lambda df1, pairs: df1['country'].nunique(), lambda q, c, k: q.count_countries(c, k), True),
+    ('cidades', lambda df1, pairs: df1['city'].nunique(), lambda q, c, k: q.count_cities(c, k), True),
+    ('avaliações', lambda df1, pairs: df1['votes'].sum(), lambda q, c, k: q.total_votes(c, k), True),
+    ('culinárias', lambda df1, pairs: pairs['cuisines'].nunique(), lambda q, c, k: q.count_cuisines(c, k), True),
+
+    ('país: mais cidades', lambda df1, pairs: leaders(df1.loc[:, ['city', 'country']].groupby('country').nunique().reset_index(), 'city'), lambda q, c, k: q.country_most_cities(c, k), True),
+    ('país: mais restaurantes', lambda df1, pairs: leaders(df1.loc[:, ['restaurant_id', 'country']].groupby('country').nunique().reset_index(), 'restaurant_id'), lambda q, c, k: q.country_most_restaurants(c, k), True),
+    ('país: mais gourmet', lambda df1, pairs: leaders(df1.loc[df1['price_type'] == 'gourmet', ['price_type', 'country']].groupby('country').count().reset_index(), 'price_type'), lambda q, c, k: q.country_most_gourmet(c, k), True),
+    ('país: mais culinárias', lambda df1, pairs: leaders(pairs.loc[:, ['cuisines', 'country']].groupby('country').nunique().reset_index(), 'cuisines'), lambda q, c, k: q.country_most_cuisines(c, k), True),
+    ('país: mais avaliações', lambda df1, pairs: leaders(df1.loc[:, ['votes', 'country']].groupby('country').sum().reset_index(), 'votes'), lambda q, c, k: q.country_most_votes(c, k), True),
+    ('país: mais entregas', lambda df1, pairs: leaders(df1.loc[df1['is_delivering_now'] == 1, ['restaurant_id', 'country']].groupby('country').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.country_most_delivering(c, k), True),
+    ('país: mais reservas', lambda df1, pairs: leaders(df1.loc[df1['has_table_booking'] == 1, ['restaurant_id', 'country']].groupby('country').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.country_most_booking(c, k), True),
+    ('país: maior média de avaliações', lambda df1, pairs: leaders(df1.loc[:, ['votes', 'country']].groupby('country').mean().reset_index(), 'votes'), lambda q, c, k: q.country_most_mean_votes(c, k), True),
+    ('país: maior nota média', lambda df1, pairs: leaders(df1.loc[:, ['aggregate_rating', 'country']].groupby('country').mean().reset_index(), 'aggregate_rating'), lambda q, c, k: q.country_best_rating(c, k), True),
+    ('país: menor nota média', lambda df1, pairs: leaders(df1.loc[:, ['aggregate_rating', 'country']].groupby('country').mean().reset_index(), 'aggregate_rating', ascending=True), lambda q, c, k: q.country_worst_rating(c, k), True),
+    ('país: preço médio', lambda df1, pairs: df1.loc[:, ['average_cost_for_two', 'country']].groupby('country').mean().reset_index().sort_values('average_cost_for_two', ascending=False).set_index('country')['average_cost_for_two'], lambda q, c, k: q.mean_cost_by_country(c, k), True),
+    ('país: preço médio em dólares', lambda df1, pairs: df1.loc[:, ['cost_for_two_usd', 'country']].groupby('country').mean().reset_index().sort_values('cost_for_two_usd', ascending=False).set_index('country')['cost_for_two_usd'], lambda q, c, k: q.mean_cost_usd_by_country(c, k), True),
+
+    ('cidade: mais restaurantes', lambda df1, pairs: leaders(df1.loc[:, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_restaurants(c, k), True),
+    ('cidade: mais notas acima de 4', lambda df1, pairs: leaders(df1.loc[df1['aggregate_rating'] >= 4, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_rating_high(c, k), True),
+    ('cidade: mais notas abaixo de 2.5', lambda df1, pairs: leaders(df1.loc[df1['aggregate_rating'] <= 2.5, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_rating_low(c, k), True),
+    ('cidade: maior preço médio', lambda df1, pairs: leaders(df1.loc[:, ['average_cost_for_two', 'city']].groupby('city').mean().reset_index(), 'average_cost_for_two'), lambda q, c, k: q.city_highest_cost(c, k), True),
+    ('cidade: mais culinárias', lambda df1, pairs: leaders(pairs.loc[:, ['cuisines', 'city']].groupby('city').nunique().reset_index(), 'cuisines'), lambda q, c, k: q.city_most_cuisines(c, k), True),
+    ('cidade: mais reservas', lambda df1, pairs: leaders(df1.loc[df1['has_table_booking'] == 1, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_booking(c, k), True),
+    ('cidade: mais entregas', lambda df1, pairs: leaders(df1.loc[df1['is_delivering_now'] == 1, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_delivering(c, k), True),
+    ('cidade: mais pedidos online', lambda df1, pairs: leaders(df1.loc[df1['has_online_delivery'] == 1, ['restaurant_id', 'city']].groupby('city').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.city_most_online(c, k), True),
+
+    ('restaurante: mais avaliações', lambda df1, pairs: df1.loc[:, ['restaurant_id', 'restaurant_name', 'votes']].sort_values(['votes', 'restaurant_id'], ascending=[False, True]).iloc[0, 1], lambda q, c, k: q.restaurant_most_votes(c, k), True),
+    ('restaurante: maior nota', lambda df1, pairs: df1.loc[:, ['restaurant_id', 'restaurant_name', 'aggregate_rating']].sort_values(['aggregate_rating', 'restaurant_id'], ascending=[False, True]).iloc[0, 1], lambda q, c, k: q.restaurant_best_rating(c, k), True),
+    ('restaurante: maior preço', lambda df1, pairs: df1.loc[:, ['restaurant_id', 'restaurant_name', 'average_cost_for_two']].sort_values(['average_cost_for_two', 'restaurant_id'], ascending=[False, True]).iloc[0, 1], lambda q, c, k: q.restaurant_highest_cost(c, k), True),
+    ('restaurante: brasileira, menor nota', lambda df1, pairs: pairs.loc[pairs['cuisines'] == 'Brazilian', ['restaurant_id', 'restaurant_name', 'aggregate_rating']].sort_values(['aggregate_rating', 'restaurant_id'], ascending=[True, True]).iloc[0, 1], lambda q, c, k: q.restaurant_worst_rating(cuisines=['Brazilian']), False),
+    ('restaurante: brasileira no Brasil, maior nota', lambda df1, pairs: pairs.loc[(pairs['cuisines'] == 'Brazilian') & (pairs['country'] == 'Brazil'), ['restaurant_id', 'restaurant_name', 'aggregate_rating']].sort_values(['aggregate_rating', 'restaurant_id'], ascending=[False, True]).iloc[0, 1], lambda q, c, k: q.restaurant_best_rating(['Brazil'], ['Brazilian']), False),
+    ('restaurante: avaliações x pedido online', lambda df1, pairs: df1.loc[:, ['votes', 'has_online_delivery']].groupby('has_online_delivery').mean()['votes'], lambda q, c, k: q.mean_votes_by_online(c, k), True),
+    ('restaurante: preço x reservas', lambda df1, pairs: df1.loc[:, ['average_cost_for_two', 'has_table_booking']].groupby('has_table_booking').mean()['average_cost_for_two'], lambda q, c, k: q.mean_cost_by_booking(c, k), True),
+    ('restaurante: japonesa x BBQ nos EUA', lambda df1, pairs: pairs.loc[(pairs['country'] == 'United States of America') & ((pairs['cuisines'] == 'Japanese') | (pairs['cuisines'] == 'BBQ')), ['average_cost_for_two', 'country', 'cuisines']].groupby(['country', 'cuisines']).mean().reset_index().sort_values('average_cost_for_two', ascending=False).set_index('cuisines')['average_cost_for_two'], lambda q, c, k: q.mean_cost_by_cuisine(['United States of America'], ['Japanese', 'BBQ']), False),
+
+    *[(f'culinária {cuisine}: {"menor" if ascending else "maior"} nota', lambda df1, pairs, cuisine=cuisine, ascending=ascending: pairs.loc[pairs['cuisines'] == cuisine, ['restaurant_id', 'restaurant_name', 'aggregate_rating']].sort_values(['aggregate_rating', 'restaurant_id'], ascending=[ascending, True]).iloc[0, 1], lambda q, c, k, cuisine=cuisine, ascending=ascending: q.restaurant_name('aggregate_rating', ascending, cuisines=[cuisine]), False)
+      for cuisine in ['Italian', 'American', 'Arabian', 'Japanese', 'Home-made'] for ascending in [False, True]],
+    ('culinária: maior preço médio', lambda df1, pairs: leaders(pairs.loc[:, ['average_cost_for_two', 'cuisines']].groupby('cuisines').mean().reset_index(), 'average_cost_for_two'), lambda q, c, k: q.cuisine_highest_cost(c, k), True),
+    ('culinária: maior nota média', lambda df1, pairs: leaders(pairs.loc[:, ['aggregate_rating', 'cuisines']].groupby('cuisines').mean().reset_index(), 'aggregate_rating'), lambda q, c, k: q.cuisine_best_rating(c, k), True),
+    ('culinária: mais online e entregas', lambda df1, pairs: leaders(pairs.loc[(pairs['has_online_delivery'] == 1) & (pairs['is_delivering_now'] == 1), ['restaurant_id', 'cuisines']].groupby('cuisines').count().reset_index(), 'restaurant_id'), lambda q, c, k: q.cuisine_most_online_delivering(c, k), True)
+]
+
+def leaders(grouped, column, ascending=False):
+    """ Esta função tem a responsabilidade de devolver todos os grupos empatados no primeiro lugar de uma agregação do notebook.
+        No notebook, o .sort_values(...).iloc[0, 0] escolhe um dos empatados conforme o algoritmo de ordenação;
+        as consultas escolhem o primeiro em ordem alfabética, que precisa ser um deles
+
+        Input: grouped (DataFrame), column (str), ascending (bool)
+        Output: set
+    """
+    best = grouped[column].min() if ascending else grouped[column].max()
+
+    return set(grouped.loc[np.isclose(grouped[column], best), :].iloc[:, 0])
+
+def explode(df1):
+    """ Esta função tem a responsabilidade de repetir cada restaurante para cada culinária da sua lista
+        (o índice continua sendo o do restaurante)
+
+        Input: df1 (DataFrame)
+        Output: DataFrame
+    """
+    return df1.assign(cuisines=df1['cuisines'].str.split(CUISINE_SEPARATOR)).explode('cuisines')
+
+FILTERS = [(None, None), (COUNTRIES, None), (None, CUISINES), (COUNTRIES, CUISINES)]
+
+def same(expected, answer):
+    """ Esta função tem a responsabilidade de comparar a resposta do notebook com a da consulta
+        (nomes e contagens exatos; médias com tolerância de ponto flutuante)
+
+        Input: expected (object), answer (object)
+        Output: bool
+    """
+    if isinstance(expected, set):
+        return answer in expected or (not expected and answer is None)
+
+    if isinstance(expected, pd.Series):
+        return list(expected.index) == list(answer.index) and np.allclose(expected.to_numpy(), answer.to_numpy())
+
+    return expected == answer
+
+@pytest.fixture(scope='module')
+def df1():
+    return pd.read_csv(CSV_PATH)
+
+@pytest.fixture(scope='module')
+def queries(df1):
+    return Queries(df1)
+
+@pytest.mark.parametrize('countries, cuisines', FILTERS)
+def test_queries_match_notebook(df1, queries, countries, cuisines):
+    all_pairs = explode(df1)
+
+    # Restaurantes com pelo menos uma das culinárias; nos pares, apenas as culinárias escolhidas
+    offered = all_pairs.loc[all_pairs['cuisines'].isin(cuisines or all_pairs['cuisines']), :]
+    selected = df1.loc[df1['country'].isin(countries or df1['country']) & df1.index.isin(offered.index), :]
+    pairs = offered.loc[offered['country'].isin(countries or offered['country']), :]
+
+    for name, expression, query, filterable in QUESTIONS:
+        if filterable or (countries, cuisines) == (None, None):
+            expected, answer = expression(selected, pairs), query(queries, countries, cuisines)
+            assert same(expected, answer), f'{name}: {expected!r} != {answer!r}'
@@ -0,0 +1,27 @@
+""" Memória por worker adicional: com o dataset e as estruturas por linha publicados pelo carregador (utils.shared),
+    a memória privada de cada worker não cresce com o tamanho do dataset
+"""
+# Imports
+import os
+
+import pytest
+
+from benchmarks.bench_workers import growth, measure
+
+SIZES = [0, 1_000_000]   # 0 = dataset limpo original
+WORKERS = 2
+MAX_GROWTH = 8           # MB por milhão de restaurantes: um único vetor int64 por linha em cada worker já passaria do limite
+
+# Cada thread que aloca pode ganhar a sua arena do glibc, com um tamanho que varia entre as execuções e não depende dos dados:
+# com uma única arena, a memória privada de execuções iguais varia poucos MB
+ENV = {'MALLOC_ARENA_MAX': '1'}
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason='a memória privada é lida de /proc/<pid>/smaps_rollup (Linux)')
+def test_private_memory_per_worker_is_flat():
+    private = {}
+
+    for size in SIZES:
+        measured = measure(size, WORKERS, ENV)
+        private[measured['rows']] = sum(result['private'] for result in measured['workers']) / WORKERS
+
+    assert growth(private) <= MAX_GROWTH, f'a memória privada por worker cresce {growth(private):.1f} MB por milhão de restaurantes: {private}'
@@ -0,0 +1,314 @@
+# Imports
+import os
+import sqlite3
+import threading
+
+import pandas    as pd
+import streamlit as st
+
+from utils.cache           import gather
+from utils.cube            import DIMENSIONS, MEASURES, build_cube, build_cuisine_cube, distinct, load_cube, load_cuisine_cube, rollup
+from utils.cuisines        import CuisineMap, load_cuisines
+from utils.instrumentation import timed
+from utils.queries         import Queries, load_queries
+from utils.store           import CSV_PATH, DTYPES, LIVE_VERSIONS, load_data, pin_file, publish
+from utils.topk            import TopK, load_topk
+
+BACKEND = os.environ.get('FOME_ZERO_BACKEND', 'pandas')   # 'pandas' (DataFrame em memória) ou 'sqlite' (arquivo local)
+DB_PATH = 'datasets/store/zomato.sqlite'
+DB_CHUNKSIZE = 200_000
+
+# Medidas do cubo em SQL, com a mesma definição de utils.cube.build_cube
+SQL_MEASURES = {
+    'restaurants': 'COUNT(*)',
+    'votes': 'SUM(votes)',
+    'cost': 'SUM(average_cost_for_two)',
+    'cost_usd': 'SUM(cost_for_two_usd)',
+    'rating': 'SUM(aggregate_rating)',
+    'rating_high': 'SUM(aggregate_rating >= 4)',
+    'rating_low': 'SUM(aggregate_rating <= 2.5)',
+    'gourmet': "SUM(price_type = 'gourmet')",
+    'booking': 'SUM(has_table_booking = 1)',
+    'online': 'SUM(has_online_delivery = 1)',
+    'delivering': 'SUM(is_delivering_now = 1)',
+    'online_delivering': 'SUM(has_online_delivery = 1 AND is_delivering_now = 1)',
+    'votes_online': 'SUM(votes * (has_online_delivery = 1))',
+    'cost_booking': 'SUM(average_cost_for_two * (has_table_booking = 1))'
+}
+
+class PandasBackend:
+    """ Consultas das páginas sobre o DataFrame em memória e as estruturas derivadas dele
+        (cubo, cubo por culinária, top-K e consultas)
+    """
+
+    def __init__(self, df, cube=None, topk=None, queries=None, cuisine_cube=None, cuisines=None):
+        self.df = df
+        self.cube = build_cube(df) if cube is None else cube
+        self.cuisine_cube = build_cuisine_cube(self.cube) if cuisine_cube is None else cuisine_cube
+        cuisines = CuisineMap(df['cuisines']) if cuisines is None else cuisines
+        self.topk = TopK(df, cuisines=cuisines) if topk is None else topk
+        self.queries = Queries(df, self.cube, cuisines) if queries is None else queries
+
+    def source(self, *columns):
+        """ Esta função tem a responsabilidade de escolher o cubo de uma consulta: o cubo por culinária quando a culinária
+            é agrupada ou contada, para que cada restaurante conte em todas as suas culinárias
+
+            Input: columns (str ou list)
+            Output: DataFrame
+        """
+        names = [name for column in columns for name in ([column] if isinstance(column, str) else column)]
+
+        return self.cuisine_cube if 'cuisines' in names else self.cube
+
+    def options(self, column):
+        """ Esta função tem a responsabilidade de listar, em ordem alfabética, os valores de uma dimensão para os filtros
+
+            Input: column (str)
+            Output: list
+        """
+        return sorted(self.source(column)[column].unique().tolist())
+
+    def rollup(self, by, countries):
+        """ Esta função tem a responsabilidade de somar as medidas do cubo por uma ou mais dimensões nos países selecionados
+
+            Input: by (str ou list), countries (list)
+            Output: DataFrame
+        """
+        return rollup(self.source(by), by, countries)
+
+    def distinct(self, by, column, countries):
+        """ Esta função tem a responsabilidade de contar os valores distintos de uma dimensão nos países selecionados
+
+            Input: by (str ou list), column (str), countries (list)
+            Output: DataFrame
+        """
+        return distinct(self.source(by, column), by, column, countries)
+
+    def overview(self, countries):
+        """ Esta função tem a responsabilidade de calcular os totais da página principal nos países selecionados
+
+            Input: countries (list)
+            Output: dict
+        """
+        return {
+            'restaurants': self.queries.count_restaurants(countries),
+            'countries': self.queries.count_countries(countries),
+            'cities': self.queries.count_cities(countries),
+            'votes': self.queries.total_votes(countries),
+            'cuisines': self.queries.count_cuisines(countries)
+        }
+
+    def top(self, countries, cuisines, n, columns):
+        """ Esta função tem a responsabilidade de devolver os n restaurantes mais bem avaliados dos filtros
+            (com pelo menos uma das culinárias), desempatando pelo menor restaurant_id
+
+            Input: countries (list), cuisines (list), n (int), columns (list)
+            Output: DataFrame
+        """
+        return gather(self.df, self.topk.top(countries, cuisines, n), columns)
+
+class SQLiteBackend:
+    """ Consultas das páginas em um banco SQLite local (somente leitura): filtros, agrupamentos e ordenações
+        são executados no banco e apenas os resultados, pequenos, chegam ao Python
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.local = threading.local()
+
+    def connection(self):
+        """ Esta função tem a responsabilidade de abrir (uma vez por thread) a conexão somente leitura com o banco
+
+            Input: None
+            Output: Connection
+        """
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+
+        return self.local.connection
+
+    def query(self, sql, parameters=()):
+        """ Esta função tem a responsabilidade de executar uma consulta e devolver o resultado como DataFrame
+
+            Input: sql (str), parameters (list)
+            Output: DataFrame
+        """
+        return pd.read_sql_query(sql, self.connection(), params=list(parameters))
+
+    def options(self, column):
+        """ Esta função tem a responsabilidade de listar, em ordem alfabética, os valores de uma dimensão para os filtros
+
+            Input: column (str)
+            Output: list
+        """
+        return self.query(f'SELECT DISTINCT {dimension(column)} FROM {table(column)} ORDER BY 1')[column].tolist()
+
+    @timed('rollup', rows=len)
+    def rollup(self, by, countries):
+        """ Esta função tem a responsabilidade de somar as medidas do cubo por uma ou mais dimensões nos países selecionados
+
+            Input: by (str ou list), countries (list)
+            Output: DataFrame
+        """
+        source = table(by)
+        by = dimensions(by)
+        measures = ', '.join(f'SUM({measure}) AS {measure}' for measure in MEASURES)
+
+        return self.query(f'SELECT {by}, {measures} FROM {source} WHERE country IN ({placeholders(countries)}) GROUP BY {by} ORDER BY {by}', countries)
+
+    @timed('distinct', rows=len)
+    def distinct(self, by, column, countries):
+        """ Esta função tem a responsabilidade de contar os valores distintos de uma dimensão nos países selecionados
+
+            Input: by (str ou list), column (str), countries (list)
+            Output: DataFrame
+        """
+        source = table(by, column)
+        by = dimensions(by)
+        column = dimension(column)
+
+        return self.query(f'SELECT {by}, COUNT(DISTINCT {column}) AS {column} FROM {source} WHERE country IN ({placeholders(countries)}) GROUP BY {by} ORDER BY {by}', countries)
+
+    @timed('overview')
+    def overview(self, countries):
+        """ Esta função tem a responsabilidade de calcular os totais da página principal nos países selecionados
+
+            Input: countries (list)
+            Output: dict
+        """
+        cursor = self.connection().execute(f"""
+            SELECT COALESCE(SUM(restaurants), 0), COUNT(DISTINCT country), COUNT(DISTINCT city), COALESCE(SUM(votes), 0),
+                (SELECT COUNT(DISTINCT cuisines) FROM cuisine_cube WHERE country IN ({placeholders(countries)}))
+            FROM cube WHERE country IN ({placeholders(countries)})
+        """, [*countries, *countries])
+
+        return dict(zip(['restaurants', 'countries', 'cities', 'votes', 'cuisines'], cursor.fetchone()))
+
+    @timed('top_k', rows=len)
+    def top(self, countries, cuisines, n, columns):
+        """ Esta função tem a responsabilidade de devolver os n restaurantes mais bem avaliados dos filtros
+            (com pelo menos uma das culinárias), desempatando pelo menor restaurant_id
+
+            Input: countries (list), cuisines (list), n (int), columns (list)
+            Output: DataFrame
+        """
+        unknown = set(columns) - set(DTYPES)
+
+        if unknown:
+            raise ValueError(f'Colunas desconhecidas: {sorted(unknown)}')
+
+        # Os pares (restaurante, culinária) repetem o país, a nota e o id, então o índice top_rating já entrega a ordem;
+        # o DISTINCT descarta o mesmo restaurante vindo de outra culinária escolhida
+        return self.query(f"""
+            SELECT {', '.join(f'restaurants.{column}' for column in columns)} FROM restaurants JOIN (
+                SELECT DISTINCT restaurant, aggregate_rating, restaurant_id FROM restaurant_cuisines
+                WHERE cuisine IN ({placeholders(cuisines)}) AND country IN ({placeholders(countries)})
+                ORDER BY aggregate_rating DESC, restaurant_id LIMIT ?
+            ) AS best ON best.restaurant = restaurants.rowid
+            ORDER BY best.aggregate_rating DESC, best.restaurant_id
+        """, [*cuisines, *countries, n])
+
+def dimension(column):
+    """ Esta função tem a responsabilidade de validar o nome de uma dimensão antes de usá-lo no SQL
+
+        Input: column (str)
+        Output: str
+    """
+    if column not in DIMENSIONS:
+        raise ValueError(f'Dimensão desconhecida: {column}')
+
+    return column
+
+def dimensions(by):
+    """ Esta função tem a responsabilidade de validar uma ou mais dimensões e juntá-las para o SQL
+
+        Input: by (str ou list)
+        Output: str
+    """
+    return ', '.join(dimension(column) for column in ([by] if isinstance(by, str) else by))
+
+def table(*columns):
+    """ Esta função tem a responsabilidade de escolher a tabela de agregados de uma consulta: cuisine_cube quando a
+        culinária é agrupada ou contada (cada restaurante em todas as suas culinárias), cube nas demais
+
+        Input: columns (str ou list)
+        Output: str
+    """
+    names = [name for column in columns for name in ([column] if isinstance(column, str) else column)]
+
+    return 'cuisine_cube' if 'cuisines' in names else 'cube'
+
+def placeholders(values):
+    """ Esta função tem a responsabilidade de montar os parâmetros de uma lista do IN
+
+        Input: values (list)
+        Output: str
+    """
+    return ', '.join('?' * len(values))
+
+def build_database(csv_path=CSV_PATH, db_path=DB_PATH, chunksize=DB_CHUNKSIZE):
+    """ Esta função tem a responsabilidade de converter o .CSV limpo em um banco SQLite com a tabela de restaurantes,
+        a relação restaurante <-> culinária, os cubos de agregados por (país, cidade, lista de culinárias) e por
+        (país, cidade, culinária) e o índice das ordenações por avaliação
+
+        Input: csv_path (str), db_path (str), chunksize (int)
+        Output: str
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # Escrita em arquivo temporário e troca atômica, como no arquivo colunar
+    tmp_path = f'{db_path}.tmp'
+
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    # As notas, os preços em dólar e as coordenadas ficam em precisão dupla, com os mesmos valores do .CSV
+    dtypes = dict(DTYPES, aggregate_rating='float64', cost_for_two_usd='float64', latitude='float64', longitude='float64')
+
+    with sqlite3.connect(tmp_path) as connection:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+
+        rows = 0
+
+        for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=chunksize):
+            chunk.to_sql('restaurants', connection, if_exists='append', index=False)
+
+            # O rowid dos restaurantes segue a ordem de inserção (1, 2, ...); cada par leva também as colunas da ordenação
+            cuisines = CuisineMap(chunk['cuisines'])
+            pairs = chunk.loc[:, ['country', 'aggregate_rating', 'restaurant_id']].iloc[cuisines.restaurant]
+            pairs = pairs.assign(restaurant=cuisines.restaurant.astype('int64') + rows + 1, cuisine=cuisines.names[cuisines.codes])
+            pairs.to_sql('restaurant_cuisines', connection, if_exists='append', index=False)
+            rows += len(chunk)
+
+        measures = ', '.join(f'{sql} AS {measure}' for measure, sql in SQL_MEASURES.items())
+        connection.execute(f'CREATE TABLE cube AS SELECT country, city, cuisines, {measures} FROM restaurants GROUP BY country, city, cuisines')
+        connection.execute(f"""
+            CREATE TABLE cuisine_cube AS SELECT country, city, cuisine AS cuisines, {measures}
+            FROM restaurants JOIN (SELECT restaurant, cuisine FROM restaurant_cuisines) AS pairs ON pairs.restaurant = restaurants.rowid
+            GROUP BY country, city, cuisine
+        """)
+        connection.execute('CREATE INDEX cube_country ON cube (country)')
+        connection.execute('CREATE INDEX cuisine_cube_country ON cuisine_cube (country)')
+        connection.execute('CREATE INDEX top_rating ON restaurant_cuisines (cuisine, country, aggregate_rating DESC, restaurant_id, restaurant)')
+        connection.execute('ANALYZE')
+
+    connection.close()
+    os.replace(tmp_path, db_path)
+
+    return db_path
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_backend(path=CSV_PATH, version=0, backend=BACKEND, db_path=DB_PATH):
+    """ Esta função tem a responsabilidade de criar o backend de dados configurado (FOME_ZERO_BACKEND) uma única vez por versão do dataset.
+        O banco SQLite é reconstruído apenas quando o .CSV limpo for mais novo e cada versão lê o seu próprio link do banco (pin_file)
+
+        Input: path (str), version (int), backend (str), db_path (str)
+        Output: PandasBackend ou SQLiteBackend
+    """
+    if backend == 'sqlite':
+        publish(path, db_path, lambda target: build_database(path, target))
+
+        return SQLiteBackend(pin_file(db_path, version))
+
+    return PandasBackend(load_data(path, version), load_cube(path, version), load_topk(path, version), load_queries(path, version), load_cuisine_cube(path, version), load_cuisines(path, version))
@@ -0,0 +1,276 @@
+# Imports
+import os
+import sys
+import threading
+import weakref
+
+from collections import Counter, OrderedDict
+
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.instrumentation import count, session_id, timed
+
+FILTER_CACHE_SIZE = int(os.environ.get('FOME_ZERO_FILTER_CACHE_SIZE', 32))
+SESSION_MEMORY_MB = float(os.environ.get('FOME_ZERO_SESSION_MEMORY_MB', 64))   # orçamento de cada sessão nos caches do processo (0 = sem limite)
+
+FIGURE_ARRAYS = ('x', 'y', 'text', 'customdata', 'hovertext')   # propriedades das séries que guardam os dados da figura
+
+# Caches vivos do processo, para somar a memória de cada sessão em todos eles
+_caches = weakref.WeakSet()
+
+def nbytes(value):
+    """ Esta função tem a responsabilidade de estimar a memória ocupada por um resultado guardado em cache
+
+        Input: value (object)
+        Output: int
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(nbytes(item) for item in value)
+
+    if hasattr(value, 'to_plotly_json'):
+        # Figuras do plotly: os vetores de dados de cada série, lidos sem serializar a figura
+        return sys.getsizeof(value) + sum(nbytes(trace[name]) for trace in value.data for name in FIGURE_ARRAYS if name in trace)
+
+    return sys.getsizeof(value)
+
+class LRUCache:
+    """ Cache LRU limitado e seguro entre threads, compartilhado por todas as sessões do processo.
+        Os valores devolvidos são compartilhados e devem ser tratados como somente leitura.
+        Cada entrada é atribuída à sessão que a calculou, para o orçamento de memória por sessão
+    """
+
+    def __init__(self, maxsize, name='lru'):
+        self.maxsize = maxsize
+        self.name = name
+        self.entries = OrderedDict()
+        self.owners = {}
+        self.sessions = Counter()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _caches.add(self)
+
+    def get(self, key, compute):
+        """ Esta função tem a responsabilidade de devolver o valor da chave, calculando-o apenas na primeira vez.
+            Um resultado novo conta na memória da sessão; passando do orçamento, os resultados mais antigos dela são descartados
+
+            Input: key (hashable), compute (callable)
+            Output: object
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                count('cache_hits', cache=self.name)
+                self.entries.move_to_end(key)
+
+                return self.entries[key]
+
+            self.misses += 1
+            count('cache_misses', cache=self.name)
+
+        value = compute()
+        session = session_id()
+        size = nbytes(value)
+
+        with self.lock:
+            self.pop(key)
+            self.entries[key] = value
+            self.owners[key] = (session, size)
+            self.sessions[session] += size
+
+            while len(self.entries) > self.maxsize:
+                self.pop(next(iter(self.entries)))
+
+        enforce_budget(session, self)
+
+        return value
+
+    def pop(self, key):
+        """ Esta função tem a responsabilidade de remover uma entrada e a sua memória da sessão dona (com a trava já adquirida)
+
+            Input: key (hashable)
+            Output: None
+        """
+        if key in self.entries:
+            del self.entries[key]
+            session, size = self.owners.pop(key)
+            self.sessions[session] -= size
+
+            if not self.sessions[session]:
+                del self.sessions[session]
+
+    def shed(self, session, excess):
+        """ Esta função tem a responsabilidade de descartar as entradas menos usadas de uma sessão até liberar a memória pedida
+
+            Input: session (str), excess (int - bytes)
+            Output: int (bytes liberados)
+        """
+        freed = shed = 0
+
+        with self.lock:
+            for key in [key for key in self.entries if self.owners[key][0] == session]:
+                if freed >= excess:
+                    break
+
+                freed += self.owners[key][1]
+                shed += 1
+                self.pop(key)
+
+        if shed:
+            count('cache_shed', shed, cache=self.name)
+
+        return freed
+
+    def discard(self, stale):
+        """ Esta função tem a responsabilidade de descartar as entradas cujas chaves não serão mais pedidas
+            (por exemplo, as de versões do dataset que já saíram da memória)
+
+            Input: stale (callable - chave -> bool)
+            Output: int (entradas descartadas)
+        """
+        with self.lock:
+            keys = [key for key in self.entries if stale(key)]
+
+            for key in keys:
+                self.pop(key)
+
+        return len(keys)
+
+    def clear(self):
+        """ Esta função tem a responsabilidade de descartar todas as entradas
+
+            Input: None
+            Output: None
+        """
+        with self.lock:
+            self.entries.clear()
+            self.owners.clear()
+            self.sessions.clear()
+
+    def stats(self):
+        """ Esta função tem a responsabilidade de informar o uso do cache
+
+            Input: None
+            Output: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize, 'bytes': sum(self.usage().values())}
+
+    def usage(self):
+        """ Esta função tem a responsabilidade de informar a memória das entradas por sessão dona (None = fora de uma sessão)
+
+            Input: None
+            Output: dict (sessão -> bytes)
+        """
+        with self.lock:
+            return dict(self.sessions)
+
+def session_memory(session):
+    """ Esta função tem a responsabilidade de somar a memória dos resultados de uma sessão em todos os caches do processo
+
+        Input: session (str)
+        Output: int (bytes)
+    """
+    return sum(cache.usage().get(session, 0) for cache in list(_caches))
+
+def enforce_budget(session, first=None, budget=None):
+    """ Esta função tem a responsabilidade de descartar os resultados de uma sessão que passou do orçamento de memória,
+        começando pelo cache que acabou de receber um resultado. Resultados sem sessão (aquecimento) não têm orçamento
+
+        Input: session (str ou None), first (LRUCache - opcional), budget (int - bytes, padrão FOME_ZERO_SESSION_MEMORY_MB)
+        Output: int (bytes liberados)
+    """
+    budget = int(SESSION_MEMORY_MB * 1024 ** 2) if budget is None else budget
+
+    if session is None or budget <= 0:
+        return 0
+
+    excess = session_memory(session) - budget
+    freed = 0
+
+    for cache in sorted(list(_caches), key=lambda cache: cache is not first):
+        if excess - freed <= 0:
+            break
+
+        freed += cache.shed(session, excess - freed)
+
+    return freed
+
+def memory_stats(session=None):
+    """ Esta função tem a responsabilidade de resumir a memória guardada nos caches do processo, total e por sessão
+
+        Input: session (str - opcional)
+        Output: dict
+    """
+    sessions = Counter()
+
+    for cache in list(_caches):
+        sessions.update(cache.usage())
+
+    total = sum(sessions.values())
+    sessions.pop(None, None)
+
+    return {
+        'session_bytes': sessions.get(session, 0),
+        'cache_bytes': total,
+        'sessions': len(sessions),
+        'max_session_bytes': max(sessions.values(), default=0),
+        'budget_bytes': int(SESSION_MEMORY_MB * 1024 ** 2)
+    }
+
+@st.cache_resource
+def get_filter_cache():
+    """ Esta função tem a responsabilidade de criar o cache de seleções único do processo
+
+        Input: None
+        Output: LRUCache
+    """
+    return LRUCache(FILTER_CACHE_SIZE, 'filter')
+
+def selection_key(countries, cuisines=None):
+    """ Esta função tem a responsabilidade de normalizar a seleção dos filtros em uma chave de cache
+
+        Input: countries (list), cuisines (list - opcional)
+        Output: tuple
+    """
+    return tuple(sorted(countries)), None if cuisines is None else tuple(sorted(cuisines))
+
+@timed('filter_rows', rows=len)
+def filter_rows(path, version, index, countries, cuisines=None):
+    """ Esta função tem a responsabilidade de devolver as posições dos restaurantes dos países (e culinárias) selecionados,
+        a partir do índice de bitmaps e reaproveitando a seleção entre sessões e reruns. A chave inclui a versão do dataset:
+        durante a troca de versão, as sessões de cada versão recebem as posições do próprio índice. Nenhuma coluna é copiada:
+        as páginas leem do dataset base apenas as colunas de que precisam (gather)
+
+        Input: path (str), version (int), index (BitmapIndex - da mesma versão), countries (list), cuisines (list - opcional)
+        Output: ndarray (somente leitura)
+    """
+    def compute():
+        rows = index.rows(index.select(countries, cuisines))
+        rows.flags.writeable = False
+
+        return rows
+
+    return get_filter_cache().get((path, version) + selection_key(countries, cuisines), compute)
+
+def gather(df, rows, columns):
+    """ Esta função tem a responsabilidade de copiar do dataset base apenas as colunas pedidas das linhas selecionadas
+
+        Input: df (DataFrame), rows (ndarray), columns (list)
+        Output: DataFrame
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+
+    # O iloc sobre o RangeIndex do dataset base materializaria (e guardaria nele) o índice inteiro, em cada worker:
+    # o índice do resultado é calculado direto das posições
+    index = df.index
+    labels = pd.Index(index.start + rows * index.step) if isinstance(index, pd.RangeIndex) else index[rows]
+
+    return pd.DataFrame({column: df[column].array.take(rows) for column in columns}, index=labels)
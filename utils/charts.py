@@ -0,0 +1,77 @@
+# Imports
+import hashlib
+import json
+import os
+
+import pandas    as pd
+import streamlit as st
+
+from utils.cache           import LRUCache
+from utils.instrumentation import timed
+
+CHART_CACHE_SIZE = int(os.environ.get('FOME_ZERO_CHART_CACHE_SIZE', 128))
+
+@st.cache_resource
+def get_chart_cache():
+    """ Esta função tem a responsabilidade de criar o cache de gráficos único do processo
+
+        Input: None
+        Output: LRUCache
+    """
+    return LRUCache(CHART_CACHE_SIZE, 'chart')
+
+def data_key(df):
+    """ Esta função tem a responsabilidade de resumir o conteúdo de um DataFrame (colunas, tipos e valores) em um hash
+
+        Input: df (DataFrame)
+        Output: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+@timed('create_bar_graph')
+def create_bar_graph(source, df, auto, labels, title, color=None):
+    """ Esta função tem a responsabilidade de criar um gráfico de barras. A figura é guardada no cache do processo
+        pela versão do dataset, pelo hash dos dados e pela especificação do gráfico; a mesma figura é devolvida às chamadas
+        seguintes e não deve ser alterada. As figuras de uma versão saem do cache quando ela deixa a memória (utils.dataset)
+
+        Input: source (tuple - path e versão do dataset), df (DataFrame), auto (bool ou str), labels (dict), title (str), color (str - opcional)
+        Output: Figure
+    """
+    spec = json.dumps([auto, labels, title, color], sort_keys=True)
+
+    def compute():
+        # O plotly express só é importado quando um gráfico precisa ser construído
+        import plotly.express as px
+
+        title_layout = {
+            'text': title,
+            'y': 1,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        }
+
+        x = list(labels['x'].keys())[0]
+        y = list(labels['y'].keys())[0]
+
+        # Colunas categóricas viram texto para que o plotly não agrupe categorias sem dados
+        data = df.astype({column: str for column in df.select_dtypes('category').columns})
+
+        bar = px.bar(data, x=x, y=y, text=y, text_auto=auto, labels={**labels['x'], **labels['y']}, color=color)
+        bar.update_layout(title=title_layout)
+
+        return bar
+
+    return get_chart_cache().get(tuple(source) + (data_key(df), spec), compute)
+
+def show_chart(slot, figure):
+    """ Esta função tem a responsabilidade de exibir um gráfico em um espaço reservado da página
+
+        Input: slot (DeltaGenerator), figure (Figure)
+        Output: None
+    """
+    slot.plotly_chart(figure, use_container_width=True)
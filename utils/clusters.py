@@ -0,0 +1,36 @@
+# Imports
+from folium.plugins import MarkerCluster
+from jinja2         import Template
+
+class RestaurantCluster(MarkerCluster):
+    """ MarkerCluster cujos marcadores e popups são criados no navegador a partir de um único payload colunar """
+
+    _template = Template(r"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.payload }};
+                var cluster = L.markerClusterGroup({{ this.options|tojson }});
+
+                var field = function (name, i) {
+                    var column = data.fields[name];
+                    return column.values[column.codes[i]];
+                };
+
+                for (var i = 0; i < data.latitude.length; i++) {
+                    var html = data.template.replace(/\{(\w+)[^}]*\}/g, function (_, name) { return field(name, i); });
+                    var icon = L.AwesomeMarkers.icon({extraClasses: 'fa-rotate-0', icon: 'house', iconColor: 'white', markerColor: field('rating_color_name', i), prefix: 'fa'});
+
+                    L.marker([data.latitude[i], data.longitude[i]], {icon: icon})
+                        .bindPopup('<div style="width: 100.0%; height: 100.0%;">' + html + '</div>', {maxWidth: 500})
+                        .addTo(cluster);
+                }
+
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}""")
+
+    def __init__(self, payload, **kwargs):
+        super().__init__(**kwargs)
+        self._name = 'RestaurantCluster'
+        self.payload = payload
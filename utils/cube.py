@@ -0,0 +1,142 @@
+# Imports
+import os
+
+import streamlit as st
+
+from pyarrow import feather
+
+from utils.cuisines        import CuisineMap
+from utils.instrumentation import timed
+from utils.store           import CSV_PATH, LIVE_VERSIONS, load_data, publish, read_store
+
+CUBE_PATH = 'datasets/store/zomato.cube.feather'
+CUISINE_CUBE_PATH = 'datasets/store/zomato.cuisine_cube.feather'
+DIMENSIONS = ['country', 'city', 'cuisines']
+MEASURES = [
+    'restaurants', 'votes', 'cost', 'cost_usd', 'rating', 'rating_high', 'rating_low',
+    'gourmet', 'booking', 'online', 'delivering', 'online_delivering', 'votes_online', 'cost_booking'
+]
+
+def build_cube(df):
+    """ Esta função tem a responsabilidade de pré-agregar o dataset por (país, cidade, lista de culinárias).
+        Todas as medidas são somas, então qualquer agrupamento mais grosso é obtido somando as linhas do cubo,
+        e contagens distintas de cidades são contagens de linhas distintas do próprio cubo.
+        Agrupamentos e contagens por culinária usam o cubo por culinária (build_cuisine_cube)
+
+        Input: df (DataFrame)
+        Output: DataFrame
+    """
+    # As notas têm uma casa decimal; arredondar em float64 evita carregar o erro do float32 para as médias
+    rating = df['aggregate_rating'].astype('float64').round(1)
+    votes = df['votes'].astype('int64')
+    cost = df['average_cost_for_two'].astype('int64')
+    cost_usd = df['cost_for_two_usd'].astype('float64').round(2)
+    booking = (df['has_table_booking'] == 1).astype('int64')
+    online = (df['has_online_delivery'] == 1).astype('int64')
+    delivering = (df['is_delivering_now'] == 1).astype('int64')
+
+    measures = df.loc[:, DIMENSIONS].assign(
+        restaurants=1,
+        votes=votes,
+        cost=cost,
+        cost_usd=cost_usd,
+        rating=rating,
+        rating_high=(rating >= 4).astype('int64'),
+        rating_low=(rating <= 2.5).astype('int64'),
+        gourmet=(df['price_type'] == 'gourmet').astype('int64'),
+        booking=booking,
+        online=online,
+        delivering=delivering,
+        online_delivering=online * delivering,
+        votes_online=votes * online,
+        cost_booking=cost * booking
+    )
+
+    return measures.groupby(DIMENSIONS, observed=True).sum().reset_index()
+
+def build_cuisine_cube(cube):
+    """ Esta função tem a responsabilidade de pré-agregar por (país, cidade, culinária) considerando todas as culinárias
+        de cada restaurante: cada linha do cubo é repetida para cada culinária da sua lista e somada de novo.
+        Um restaurante conta uma vez em cada uma das suas culinárias, então somas entre culinárias diferentes
+        contam o mesmo restaurante mais de uma vez; totais por país ou cidade continuam vindo do cubo
+
+        Input: cube (DataFrame)
+        Output: DataFrame
+    """
+    cuisines = CuisineMap(cube['cuisines'])
+    exploded = cube.iloc[cuisines.restaurant].assign(cuisines=cuisines.categorical())
+
+    return exploded.groupby(DIMENSIONS, observed=True)[MEASURES].sum().reset_index()
+
+def save_cube(cube, cube_path=CUBE_PATH):
+    """ Esta função tem a responsabilidade de gravar um cubo ao lado do arquivo colunar, com troca atômica e um único bloco
+        por coluna, como o arquivo colunar
+
+        Input: cube (DataFrame), cube_path (str)
+        Output: str
+    """
+    tmp_path = f'{cube_path}.tmp'
+    feather.write_feather(cube, tmp_path, compression='uncompressed', chunksize=max(len(cube), 1))
+    os.replace(tmp_path, cube_path)
+
+    return cube_path
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_cube(path=CSV_PATH, version=0, cube_path=CUBE_PATH):
+    """ Esta função tem a responsabilidade de carregar o cubo de agregados uma única vez por versão do dataset, com memory-map.
+        O cubo é construído uma única vez para todos os workers, reconstruído apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), cube_path (str)
+        Output: DataFrame
+    """
+    df = load_data(path, version)
+    publish(path, cube_path, lambda target: save_cube(build_cube(df), target))
+
+    return read_store(cube_path)
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_cuisine_cube(path=CSV_PATH, version=0, cuisine_cube_path=CUISINE_CUBE_PATH):
+    """ Esta função tem a responsabilidade de carregar o cubo por culinária uma única vez por versão do dataset, com memory-map,
+        reconstruindo-o apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), cuisine_cube_path (str)
+        Output: DataFrame
+    """
+    cube = load_cube(path, version)
+    publish(path, cuisine_cube_path, lambda target: save_cube(build_cuisine_cube(cube), target))
+
+    return read_store(cuisine_cube_path)
+
+def select(cube, countries):
+    """ Esta função tem a responsabilidade de filtrar o cubo pelos países selecionados
+
+        Input: cube (DataFrame), countries (list)
+        Output: DataFrame
+    """
+    return cube.loc[cube['country'].isin(countries), :]
+
+@timed('rollup', rows=len)
+def rollup(cube, by, countries):
+    """ Esta função tem a responsabilidade de somar as medidas do cubo para os países selecionados
+
+        Input: cube (DataFrame), by (str ou list), countries (list)
+        Output: DataFrame
+    """
+    return select(cube, countries).groupby(by, observed=True)[MEASURES].sum().reset_index()
+
+@timed('distinct', rows=len)
+def distinct(cube, by, column, countries):
+    """ Esta função tem a responsabilidade de contar os valores distintos de uma dimensão para os países selecionados
+
+        Input: cube (DataFrame), by (str ou list), column (str), countries (list)
+        Output: DataFrame
+    """
+    return select(cube, countries).groupby(by, observed=True)[column].nunique().reset_index()
+
+def mean(rolled, column):
+    """ Esta função tem a responsabilidade de transformar a soma de uma medida em média por restaurante
+
+        Input: rolled (DataFrame), column (str)
+        Output: DataFrame
+    """
+    return rolled.assign(**{column: rolled[column] / rolled['restaurants']})
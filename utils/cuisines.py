@@ -0,0 +1,146 @@
+# Imports
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.pipeline import CUISINE_SEPARATOR
+from utils.shared   import load_arrays, save_arrays
+from utils.store    import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+CUISINES_PATH = 'datasets/store/zomato.cuisines.arrays'
+CUISINE_ARRAYS = ['offsets', 'restaurant', 'codes', 'rows', 'row_offsets']
+
+class CuisineMap:
+    """ Relação muitos-para-muitos restaurante <-> culinária em formato CSR. A coluna 'cuisines' guarda a lista de culinárias
+        de cada restaurante como categoria, então apenas as combinações distintas são divididas; cada restaurante ocupa o
+        trecho codes[offsets[i]:offsets[i + 1]] (códigos de culinária, na ordem da lista) e cada culinária ocupa o trecho
+        rows[row_offsets[c]:row_offsets[c + 1]] (posições dos restaurantes, ordenadas)
+    """
+
+    def __init__(self, cuisines):
+        categorical = cuisines.astype('category')
+        combinations = [value.split(CUISINE_SEPARATOR) for value in categorical.cat.categories]
+
+        self.size = len(categorical)
+        self.names = np.array(sorted({name for names in combinations for name in names}), dtype=object)
+        code_of = {name: code for code, name in enumerate(self.names)}
+
+        # Culinárias de cada combinação (CSR sobre as categorias)
+        lengths = np.array([len(names) for names in combinations], dtype='int64')
+        starts = np.concatenate([[0], np.cumsum(lengths)]).astype('int64')
+        flat = np.array([code_of[name] for names in combinations for name in names], dtype='int32')
+
+        # Culinárias de cada restaurante: o trecho da sua combinação, repetido
+        combination = categorical.cat.codes.to_numpy().astype('int64')
+        counts = lengths[combination]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype('int64')
+        self.restaurant = np.repeat(np.arange(self.size, dtype='int32'), counts)
+        self.codes = flat[np.arange(self.offsets[-1]) - np.repeat(self.offsets[:-1] - starts[combination], counts)]
+
+        # Restaurantes de cada culinária: a ordenação estável mantém as posições em ordem crescente
+        order = np.argsort(self.codes, kind='stable')
+        self.rows = self.restaurant[order]
+        self.row_offsets = np.searchsorted(self.codes[order], np.arange(len(self.names) + 1))
+
+    def save(self, path=CUISINES_PATH):
+        """ Esta função tem a responsabilidade de gravar a relação ao lado do arquivo colunar, com troca atômica
+
+            Input: path (str)
+            Output: str
+        """
+        arrays = {name: getattr(self, name) for name in CUISINE_ARRAYS}
+
+        return save_arrays(path, dict(arrays, names=self.names.astype(str), size=np.array([self.size], dtype='int64')))
+
+    @classmethod
+    def load(cls, path=CUISINES_PATH):
+        """ Esta função tem a responsabilidade de abrir a relação gravada com memory-map (somente leitura, compartilhada entre os workers)
+
+            Input: path (str)
+            Output: CuisineMap
+        """
+        arrays = load_arrays(path)
+        cuisines = cls.__new__(cls)
+        cuisines.size = int(arrays['size'][0])
+        cuisines.names = arrays['names'].astype(object)
+
+        for name in CUISINE_ARRAYS:
+            setattr(cuisines, name, arrays[name])
+
+        return cuisines
+
+    def wanted(self, cuisines):
+        """ Esta função tem a responsabilidade de converter um filtro de culinárias em uma máscara sobre os códigos
+
+            Input: cuisines (list)
+            Output: ndarray (bool)
+        """
+        return np.isin(self.names, list(cuisines))
+
+    def lookup(self, cuisine):
+        """ Esta função tem a responsabilidade de devolver as posições (ordenadas) dos restaurantes de uma culinária
+
+            Input: cuisine (str)
+            Output: ndarray
+        """
+        code = np.searchsorted(self.names, cuisine)
+
+        if code == len(self.names) or self.names[code] != cuisine:
+            return self.rows[:0]
+
+        return self.rows[self.row_offsets[code]:self.row_offsets[code + 1]]
+
+    def mask(self, cuisines):
+        """ Esta função tem a responsabilidade de selecionar os restaurantes com pelo menos uma das culinárias,
+            lendo apenas as listas das culinárias escolhidas
+
+            Input: cuisines (list)
+            Output: ndarray (bool)
+        """
+        mask = np.zeros(self.size, dtype=bool)
+
+        for cuisine in cuisines:
+            mask[self.lookup(cuisine)] = True
+
+        return mask
+
+    def explode(self, values):
+        """ Esta função tem a responsabilidade de repetir os valores de cada restaurante para cada uma das suas culinárias,
+            na ordem dos pares (restaurante, culinária)
+
+            Input: values (ndarray ou Categorical)
+            Output: ndarray ou Categorical
+        """
+        return values.take(self.restaurant)
+
+    def pairs(self, rows):
+        """ Esta função tem a responsabilidade de devolver os pares (restaurante, culinária) de algumas linhas, na ordem das linhas
+
+            Input: rows (ndarray)
+            Output: tuple (ndarray de linhas, ndarray de códigos de culinária)
+        """
+        counts = self.offsets[rows + 1] - self.offsets[rows]
+        starts = np.repeat(self.offsets[rows] - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+
+        return np.repeat(rows, counts), self.codes[starts + np.arange(counts.sum())]
+
+    def categorical(self):
+        """ Esta função tem a responsabilidade de devolver a culinária de cada par (restaurante, culinária) como categoria
+
+            Input: None
+            Output: Categorical
+        """
+        return pd.Categorical.from_codes(self.codes, categories=self.names)
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_cuisines(path=CSV_PATH, version=0, cuisines_path=CUISINES_PATH):
+    """ Esta função tem a responsabilidade de carregar a relação restaurante <-> culinária uma única vez por versão do dataset,
+        remontando-a apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), cuisines_path (str)
+        Output: CuisineMap
+    """
+    df = load_data(path, version)
+    publish(path, cuisines_path, lambda target: CuisineMap(df['cuisines']).save(target))
+
+    return CuisineMap.load(cuisines_path)
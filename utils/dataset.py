@@ -0,0 +1,170 @@
+# Imports
+import os
+import threading
+import time
+
+from collections import deque
+
+import streamlit as st
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.store import CSV_PATH, LIVE_VERSIONS
+
+DATASET_INTERVAL = float(os.environ.get('FOME_ZERO_DATASET_INTERVAL', 2))   # segundos entre as verificações do .CSV limpo (0 desliga)
+
+def signature(path=CSV_PATH):
+    """ Esta função tem a responsabilidade de resumir o estado do .CSV limpo (data de modificação e tamanho)
+
+        Input: path (str)
+        Output: tuple ou None
+    """
+    try:
+        stat = os.stat(path)
+
+    except FileNotFoundError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+class DatasetManager:
+    """ Versões do dataset limpo. Uma thread verifica o .CSV periodicamente; quando ele muda (e para de mudar),
+        a próxima versão (arquivo colunar, índices e agregados) é construída em segundo plano pelos próprios loaders
+        do st.cache_resource, com o número da versão no argumento, e só então publicada. Cada rerun lê a versão uma única vez,
+        no início: os reruns em andamento terminam na versão anterior e os seguintes já encontram a nova pronta.
+        Os loaders guardam até LIVE_VERSIONS versões (utils.store), então a mais antiga sai da memória quando a próxima é construída
+    """
+
+    def __init__(self, path=CSV_PATH, interval=DATASET_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.version = 0
+        self.attempts = 0   # último número de versão usado por uma construção, publicada ou não
+        self.signature = signature(path)
+        self.pending = None
+        self.build_seconds = None
+        self.error = None
+        self.live = deque(maxlen=LIVE_VERSIONS)   # (versão, hash dos dados) das versões em memória, donas dos caches e das exportações
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self, ctx):
+        """ Esta função tem a responsabilidade de iniciar a verificação do .CSV, uma única vez. A thread leva o contexto
+            da sessão que a iniciou, pois o st.cache_resource só grava resultados com o contexto de uma sessão
+
+            Input: ctx (ScriptRunContext ou None)
+            Output: Thread ou None
+        """
+        with self.lock:
+            if self.thread is not None or ctx is None or self.interval <= 0:
+                return self.thread
+
+            self.thread = threading.Thread(target=self.watch, name='fome-zero-dataset', daemon=True)
+
+        add_script_run_ctx(self.thread, ctx)
+        self.thread.start()
+
+        return self.thread
+
+    def watch(self):
+        """ Esta função tem a responsabilidade de verificar o .CSV a cada intervalo (executada na thread do gerenciador)
+
+            Input: None
+            Output: None
+        """
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self):
+        """ Esta função tem a responsabilidade de construir uma nova versão quando o .CSV mudar. A mudança só é aceita
+            quando o arquivo está igual em duas verificações seguidas, para não ler um .CSV que ainda está sendo escrito
+
+            Input: None
+            Output: bool (True se uma nova versão foi publicada)
+        """
+        current = signature(self.path)
+
+        if current is None or current == self.signature:
+            self.pending = None
+            return False
+
+        if current != self.pending:
+            self.pending = current
+            return False
+
+        self.pending = None
+
+        return self.build(current)
+
+    def build(self, current):
+        """ Esta função tem a responsabilidade de construir todos os recursos da próxima versão e publicá-la.
+            Cada tentativa usa um número novo, para que uma construção que falhou pela metade não seja reaproveitada
+
+            Input: current (tuple - assinatura do .CSV)
+            Output: bool
+        """
+        from utils.cache  import get_filter_cache
+        from utils.charts import get_chart_cache
+        from utils.export import discard_exports, load_exporter
+        from utils.warmup import warm_caches
+
+        self.attempts += 1
+        version = self.attempts
+        start = time.perf_counter()
+
+        try:
+            # A versão publicada continua viva durante a construção da próxima
+            if not self.live:
+                self.live.append((self.version, load_exporter(self.path, self.version).version))
+
+            warm_caches(self.path, version)
+            exporter = load_exporter(self.path, version)
+
+        except Exception as error:
+            # A versão publicada continua em uso; a próxima mudança do .CSV gera uma nova tentativa
+            self.signature = current
+            self.error = error
+
+            return False
+
+        with self.lock:
+            self.version = version
+            self.signature = current
+            self.error = None
+            self.build_seconds = time.perf_counter() - start
+            self.live.append((version, exporter.version))
+            versions = {live for live, _ in self.live}
+            exports = {export for _, export in self.live}
+
+        # Apenas os resultados das versões que saíram das LIVE_VERSIONS mais recentes são descartados (chaves (path, versão, ...));
+        # as sessões que ainda estão na versão anterior continuam com os seus gráficos, filtros e exportações
+        stale = lambda key: key[0] == self.path and key[1] not in versions
+
+        for cache in [get_filter_cache(), get_chart_cache()]:
+            cache.discard(stale)
+
+        discard_exports(exports, exporter.directory)
+
+        return True
+
+@st.cache_resource
+def get_dataset_manager(path=CSV_PATH):
+    """ Esta função tem a responsabilidade de criar o gerenciador de versões único do processo para um dataset
+
+        Input: path (str)
+        Output: DatasetManager
+    """
+    return DatasetManager(path)
+
+def current_version(path=CSV_PATH):
+    """ Esta função tem a responsabilidade de devolver a versão publicada do dataset, que o rerun passa a todos os loaders.
+        A primeira chamada de uma sessão inicia a verificação do .CSV em segundo plano
+
+        Input: path (str)
+        Output: int
+    """
+    manager = get_dataset_manager(path)
+    manager.start(get_script_run_ctx(suppress_warning=True))
+
+    return manager.version
@@ -0,0 +1,128 @@
+# Imports
+import multiprocessing
+import os
+import threading
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.instrumentation import capture, current_trace, merge_trace, span
+
+THREADS = int(os.environ.get('FOME_ZERO_THREADS', 4))
+PROCESSES = int(os.environ.get('FOME_ZERO_PROCESSES', 2))   # 0 desliga o pool de processos (tarefas vão para as threads)
+
+@st.cache_resource
+def get_thread_pool():
+    """ Esta função tem a responsabilidade de criar o pool de threads único do processo
+
+        Input: None
+        Output: ThreadPoolExecutor
+    """
+    return ThreadPoolExecutor(THREADS, thread_name_prefix='fome-zero')
+
+_process_pool = None
+
+def start_process_pool(workers=PROCESSES):
+    """ Esta função tem a responsabilidade de criar o pool de processos na partida do servidor (utils.serve).
+        Os processos são iniciados com 'spawn', pois o fork de um servidor com várias threads pode herdar locks em estado
+        inconsistente. O spawn reimporta o módulo __main__, que durante uma sessão é a própria página do Streamlit;
+        por isso o pool só é criado antes do servidor subir
+
+        Input: workers (int)
+        Output: ProcessPoolExecutor ou None
+    """
+    global _process_pool
+
+    if workers > 0 and _process_pool is None:
+        _process_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+    return _process_pool
+
+def get_process_pool():
+    """ Esta função tem a responsabilidade de devolver o pool de processos, se ele foi criado na partida do servidor
+
+        Input: None
+        Output: ProcessPoolExecutor ou None
+    """
+    return _process_pool
+
+def submit(name, function, *args, **kwargs):
+    """ Esta função tem a responsabilidade de executar uma tarefa no pool de threads com o contexto da sessão
+        (necessário para o st.cache_resource) e medindo as suas etapas para o rerun da página.
+        A tarefa não pode criar elementos na tela; o resultado é exibido pela thread da página
+
+        Input: name (str), function (callable), args, kwargs
+        Output: Future
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    trace = current_trace()
+    page = None if trace is None else trace.page
+    measured = []
+
+    def timed_task():
+        with span(name):
+            return function(*args, **kwargs)
+
+    def task():
+        # As threads do pool são reaproveitadas: cada tarefa assume o contexto da sessão que a enviou
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+        value, child = capture(timed_task, page)
+        measured.append(child)
+
+        return value
+
+    future = get_thread_pool().submit(task)
+    future.measured = measured
+
+    return future
+
+def submit_process(function, *args):
+    """ Esta função tem a responsabilidade de executar uma tarefa pesada e sem estado em outro processo, fora do GIL do servidor.
+        A função e os argumentos precisam ser serializáveis (pickle); sem pool de processos (servidor iniciado com
+        streamlit run ou FOME_ZERO_PROCESSES=0) a tarefa vai para as threads
+
+        Input: function (callable), args
+        Output: Future
+    """
+    pool = get_process_pool()
+
+    if pool is None:
+        return submit(function.__name__, function, *args)
+
+    return pool.submit(function, *args)
+
+def result(future):
+    """ Esta função tem a responsabilidade de aguardar o resultado de uma tarefa, juntando ao rerun as etapas medidas nela
+
+        Input: future (Future)
+        Output: object
+    """
+    value = future.result()
+
+    for child in getattr(future, 'measured', []):
+        merge_trace(child)
+
+    return value
+
+def render_parallel(tasks, render, ready=None):
+    """ Esta função tem a responsabilidade de calcular tarefas independentes em paralelo e exibir cada resultado
+        no seu espaço da página assim que fica pronto, na ordem em que terminam. Os resultados já prontos
+        (páginas pré-calculadas, utils.snapshots) são exibidos primeiro, sem enviar a tarefa
+
+        Input: tasks (list de (nome, espaço, callable)), render (callable(espaço, resultado)), ready (dict - nome -> resultado, opcional)
+        Output: None
+    """
+    ready = ready or {}
+
+    for name, slot, _ in tasks:
+        if name in ready:
+            render(slot, ready[name])
+
+    futures = {submit(name, compute): slot for name, slot, compute in tasks if name not in ready}
+
+    for future in as_completed(futures):
+        render(futures[future], result(future))
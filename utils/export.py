@@ -0,0 +1,215 @@
+# Imports
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.cache           import selection_key
+from utils.index           import load_index
+from utils.instrumentation import timed
+from utils.pipeline        import ByteRange, complete_size
+from utils.shared          import load_arrays, save_arrays
+from utils.store           import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+EXPORT_DIR = 'datasets/exports'
+DIGEST_PATH = 'datasets/store/zomato.digest.arrays'
+EXPORT_CACHE_SIZE = int(os.environ.get('FOME_ZERO_EXPORT_CACHE_SIZE', 64))
+EXPORT_CHUNK = 50_000   # linhas serializadas por vez, para limitar o pico de memória
+
+EXPORT_SCOPES = {
+    'Todos os restaurantes': 'all',
+    'Países selecionados': 'selection'
+}
+
+class Exporter:
+    """ Exportações em .CSV (opcionalmente gzip) do dataset e das seleções de países, geradas apenas quando pedidas
+        e guardadas em disco pelo hash dos dados, então cada arquivo é serializado uma única vez por versão do dataset.
+        As linhas vêm do .CSV limpo, com a precisão original (o arquivo colunar guarda latitude e longitude em float32)
+    """
+
+    def __init__(self, df, index, path=CSV_PATH, directory=EXPORT_DIR, maxsize=EXPORT_CACHE_SIZE, digest=None):
+        self.df = df
+        self.index = index
+        self.directory = directory
+        self.maxsize = maxsize
+        self.version = dataset_digest(df) if digest is None else digest
+        self.source = self.pin_source(path)
+        # O pipeline pode acrescentar linhas ao próprio .CSV (o mesmo arquivo do link): a versão é o que ele tinha ao ser fixado
+        self.size = complete_size(self.source)
+
+    def pin_source(self, path):
+        """ Esta função tem a responsabilidade de fixar o .CSV limpo desta versão ao lado das exportações, com um link
+            nomeado pelo hash dos dados (o mesmo em todos os processos). Como o pipeline publica o .CSV com troca atômica,
+            o link continua apontando para o arquivo desta versão depois que uma versão nova é publicada
+
+            Input: path (str)
+            Output: str
+        """
+        source = os.path.join(self.directory, f'zomato-{self.version}-source.csv')
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Link (ou cópia, em outro sistema de arquivos) com nome temporário próprio e troca atômica: nunca falha por concorrência
+        tmp_path = f'{source}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        try:
+            os.link(path, tmp_path)
+
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+
+        os.replace(tmp_path, source)
+
+        # Se o link fixado já era o mesmo arquivo, a troca não faz nada e o nome temporário continua existindo
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+        return source
+
+    def open_source(self):
+        """ Esta função tem a responsabilidade de abrir o .CSV limpo fixado desta versão, até o tamanho que ele tinha ao ser fixado
+
+            Input: None
+            Output: arquivo binário
+        """
+        return io.BufferedReader(ByteRange(self.source, 0, self.size))
+
+    def path(self, countries=None, compress=False):
+        """ Esta função tem a responsabilidade de montar o caminho do arquivo de uma exportação
+
+            Input: countries (list - opcional), compress (bool)
+            Output: str
+        """
+        selection = 'all' if countries is None else hashlib.blake2b(repr(selection_key(countries)).encode(), digest_size=8).hexdigest()
+
+        return os.path.join(self.directory, f'zomato-{self.version}-{selection}.csv{".gz" if compress else ""}')
+
+    @timed('export')
+    def export(self, countries=None, compress=False):
+        """ Esta função tem a responsabilidade de devolver o arquivo da exportação, escrevendo-o em blocos na primeira vez.
+            countries None exporta o dataset inteiro
+
+            Input: countries (list - opcional), compress (bool)
+            Output: str
+        """
+        path = self.path(countries, compress)
+
+        if os.path.exists(path):
+            # Renovar a data de modificação mantém as exportações usadas fora da remoção
+            os.utime(path)
+
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Cada escritor usa o seu arquivo temporário; a troca atômica publica o arquivo completo
+        descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(descriptor)
+
+        with (gzip.open if compress else open)(tmp_path, 'wb') as file, self.open_source() as source:
+            if countries is None:
+                # O dataset inteiro é o próprio .CSV limpo
+                shutil.copyfileobj(source, file)
+
+            else:
+                self.write_rows(source, file, self.index.rows(self.index.select(countries)))
+
+        os.replace(tmp_path, path)
+        self.evict()
+
+        return path
+
+    def write_rows(self, source, file, rows):
+        """ Esta função tem a responsabilidade de escrever as linhas selecionadas do .CSV limpo, lido em blocos
+            para limitar o pico de memória
+
+            Input: source (arquivo binário - .CSV limpo), file (arquivo binário), rows (ndarray - posições em ordem crescente)
+            Output: None
+        """
+        text = io.TextIOWrapper(file, encoding='utf-8', newline='', write_through=True)
+        start = 0
+
+        for chunk in pd.read_csv(source, chunksize=EXPORT_CHUNK):
+            selected = rows[np.searchsorted(rows, start):np.searchsorted(rows, start + len(chunk))] - start
+            chunk.iloc[selected].to_csv(text, index=False, header=start == 0)
+            start += len(chunk)
+
+        text.detach()
+
+        if start == 0:
+            # .CSV sem linhas: apenas o cabeçalho
+            with self.open_source() as header:
+                file.write(header.readline())
+
+    def evict(self):
+        """ Esta função tem a responsabilidade de apagar as exportações mais antigas além do limite do cache
+
+            Input: None
+            Output: None
+        """
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.startswith('zomato-') and not name.endswith(('.tmp', '-source.csv'))]
+
+        for path in sorted(files, key=os.path.getmtime)[:-self.maxsize]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def discard_exports(versions, directory=EXPORT_DIR):
+    """ Esta função tem a responsabilidade de apagar as exportações de versões do dataset que não estão mais em uso
+        (chamada pelo gerenciador de versões, utils.dataset, ao publicar uma versão)
+
+        Input: versions (set - hashes dos dados mantidos), directory (str)
+        Output: None
+    """
+    if not os.path.isdir(directory):
+        return
+
+    for name in os.listdir(directory):
+        if name.startswith('zomato-') and not name.endswith('.tmp') and name.split('-')[1] not in versions:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+def dataset_digest(df, chunksize=EXPORT_CHUNK):
+    """ Esta função tem a responsabilidade de calcular o hash dos dados, que nomeia as exportações (o mesmo em todos os processos).
+        As linhas são lidas em blocos, para limitar o pico de memória
+
+        Input: df (DataFrame), chunksize (int)
+        Output: str
+    """
+    digest = hashlib.blake2b(digest_size=8)
+
+    for start in range(0, len(df), chunksize):
+        digest.update(pd.util.hash_pandas_object(df.iloc[start:start + chunksize], index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def save_digest(df, digest_path=DIGEST_PATH):
+    """ Esta função tem a responsabilidade de gravar o hash dos dados ao lado do arquivo colunar, com troca atômica
+
+        Input: df (DataFrame), digest_path (str)
+        Output: str
+    """
+    return save_arrays(digest_path, {'digest': np.array([dataset_digest(df)])})
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_exporter(path=CSV_PATH, version=0, digest_path=DIGEST_PATH):
+    """ Esta função tem a responsabilidade de criar o exportador uma única vez por versão do dataset. O hash dos dados é
+        calculado uma única vez para todos os workers, recalculado apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), digest_path (str)
+        Output: Exporter
+    """
+    df = load_data(path, version)
+    publish(path, digest_path, lambda target: save_digest(df, target))
+
+    return Exporter(df, load_index(path, version), path, digest=str(load_arrays(digest_path)['digest'][0]))
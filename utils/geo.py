@@ -0,0 +1,337 @@
+# Imports
+import hashlib
+import heapq
+import math
+import os
+import threading
+
+import numpy     as np
+import streamlit as st
+
+from utils.cache           import LRUCache
+from utils.instrumentation import timed
+from utils.shared          import load_arrays, save_arrays
+from utils.store           import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+GEO_PATH = 'datasets/store/zomato.geo.arrays'
+
+EARTH_RADIUS = 6371.0088   # raio médio da Terra, em km
+GEO_BITS = 20              # bits por eixo da grade mais fina (~38 m de longitude no equador)
+GEO_LEAF_SIZE = 32         # células com até essa quantidade de restaurantes não são mais divididas
+GEO_CACHE_SIZE = int(os.environ.get('FOME_ZERO_GEO_CACHE_SIZE', 8))   # seleções de filtros guardadas pelo índice
+BBOX_CELLS = 16            # células por eixo que a área buscada ocupa, no máximo, no nível escolhido
+BBOX_MARGIN = 1e-9         # folga (em graus) para que uma célula conte como inteira dentro da área apesar do arredondamento
+BBOX_MASK = 128            # acima de 1/BBOX_MASK das linhas, o resultado é ordenado por uma máscara, e não com np.sort
+
+def spread_bits(values):
+    """ Esta função tem a responsabilidade de intercalar zeros entre os bits de inteiros de até 32 bits (0b111 -> 0b10101),
+        para montar os códigos de Morton (z-order)
+
+        Input: values (ndarray)
+        Output: ndarray (uint64)
+    """
+    values = values.astype(np.uint64)
+
+    for shift, mask in [(16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333), (1, 0x5555555555555555)]:
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+
+    return values
+
+def morton(x, y):
+    """ Esta função tem a responsabilidade de calcular o código de Morton das células (x, y)
+
+        Input: x (ndarray), y (ndarray)
+        Output: ndarray (uint64)
+    """
+    return spread_bits(x) | (spread_bits(y) << np.uint64(1))
+
+def cells(latitude, longitude, level):
+    """ Esta função tem a responsabilidade de calcular as células (x, y) das coordenadas em um nível da grade
+        (2 ** level células por eixo)
+
+        Input: latitude (ndarray ou float), longitude (ndarray ou float), level (int)
+        Output: tuple (ndarray, ndarray)
+    """
+    size = 2 ** level
+    x = np.clip(np.floor((np.asarray(longitude, dtype='float64') + 180) / 360 * size), 0, size - 1).astype('int64')
+    y = np.clip(np.floor((np.asarray(latitude, dtype='float64') + 90) / 180 * size), 0, size - 1).astype('int64')
+
+    return x, y
+
+def cell_of(value, span, size):
+    """ Esta função tem a responsabilidade de calcular a célula de uma única coordenada (deslocada para começar em 0),
+        com a mesma conta de cells, sem o custo do numpy para escalares
+
+        Input: value (float - longitude + 180 ou latitude + 90), span (int - 360 ou 180), size (int - células por eixo)
+        Output: int
+    """
+    return min(max(math.floor(value / span * size), 0), size - 1)
+
+def ranges(order, starts, ends):
+    """ Esta função tem a responsabilidade de juntar, sem laço em Python, os trechos [início, fim) de um vetor
+
+        Input: order (ndarray), starts (ndarray), ends (ndarray)
+        Output: ndarray
+    """
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+
+    return order[offsets + np.arange(len(offsets))].astype('int64')
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    """ Esta função tem a responsabilidade de calcular a distância (em km) de um ponto até vários pontos pela fórmula de haversine
+
+        Input: latitude (float), longitude (float), latitudes (ndarray), longitudes (ndarray)
+        Output: ndarray
+    """
+    phi = np.radians(latitude)
+    phis = np.radians(np.asarray(latitudes, dtype='float64'))
+    dphi = phis - phi
+    dlambda = np.radians(np.asarray(longitudes, dtype='float64') - longitude)
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi) * np.cos(phis) * np.sin(dlambda / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+def cell_distance(latitude, longitude, level, x, y):
+    """ Esta função tem a responsabilidade de calcular a menor distância (em km) de um ponto até uma célula da grade:
+        nenhum restaurante da célula está mais perto do que isso
+
+        Input: latitude (float), longitude (float), level (int), x (int), y (int)
+        Output: float
+    """
+    height, width = 180 / 2 ** level, 360 / 2 ** level
+    south, west = y * height - 90, x * width - 180
+    north = south + height
+
+    # Na faixa de longitudes da célula, a distância é só a diferença de latitude
+    if (longitude - west) % 360 <= width:
+        return math.radians(max(south - latitude, latitude - north, 0)) * EARTH_RADIUS
+
+    # Fora dela, o ponto mais próximo está no meridiano da borda mais próxima: no pé da perpendicular ou em um dos cantos
+    delta = math.radians(min([(longitude - edge + 180) % 360 - 180 for edge in (west, west + width)], key=abs))
+    phi = math.radians(latitude)
+    foot = math.degrees(math.atan2(math.sin(phi), math.cos(phi) * math.cos(delta)))
+    closest = 1.0
+
+    for point in (min(max(foot, south), north), south, north):
+        point = math.radians(point)
+        closest = min(closest, math.sin((point - phi) / 2) ** 2 + math.cos(phi) * math.cos(point) * math.sin(delta / 2) ** 2)
+
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(closest))
+
+class GeoIndex:
+    """ Índice espacial dos restaurantes em uma grade hierárquica (geohash / z-order): as linhas são ordenadas uma única vez
+        pelo código de Morton da célula mais fina, então cada célula de qualquer nível é um trecho contíguo dessa ordem.
+        As consultas leem apenas as células próximas; com os filtros da barra lateral, usam a parte ordenada
+        das linhas do bitmap (utils.index), guardada por seleção
+    """
+
+    def __init__(self, df, bits=GEO_BITS):
+        self.bits = bits
+        self.size = len(df)
+        self.latitude = df['latitude'].to_numpy()
+        self.longitude = df['longitude'].to_numpy()
+
+        codes = morton(*cells(self.latitude, self.longitude, bits))
+        self.order = np.argsort(codes, kind='stable').astype('int32')
+        self.codes = codes[self.order]
+        self.views = LRUCache(GEO_CACHE_SIZE, 'geo')
+        self.digests = {}
+        self.lock = threading.Lock()
+
+    def save(self, path=GEO_PATH):
+        """ Esta função tem a responsabilidade de gravar a ordem z das linhas ao lado do arquivo colunar, com troca atômica
+            (as coordenadas já estão no arquivo colunar)
+
+            Input: path (str)
+            Output: str
+        """
+        return save_arrays(path, {'bits': np.array([self.bits], dtype='int64'), 'order': self.order, 'codes': self.codes})
+
+    @classmethod
+    def load(cls, df, path=GEO_PATH):
+        """ Esta função tem a responsabilidade de abrir o índice gravado com memory-map (somente leitura, compartilhado entre os workers)
+
+            Input: df (DataFrame), path (str)
+            Output: GeoIndex
+        """
+        arrays = load_arrays(path)
+        geo = cls.__new__(cls)
+        geo.bits = int(arrays['bits'][0])
+        geo.size = len(df)
+        geo.latitude = df['latitude'].to_numpy()
+        geo.longitude = df['longitude'].to_numpy()
+        geo.order = arrays['order']
+        geo.codes = arrays['codes']
+        geo.views = LRUCache(GEO_CACHE_SIZE, 'geo')
+        geo.digests = {}
+        geo.lock = threading.Lock()
+
+        return geo
+
+    def digest(self, bitmap):
+        """ Esta função tem a responsabilidade de resumir um bitmap na chave do cache de seleções. Os bitmaps são somente leitura,
+            então o resumo dos últimos bitmaps é lembrado pelo próprio objeto: as consultas de um rerun não o recalculam
+
+            Input: bitmap (ndarray)
+            Output: bytes
+        """
+        remembered = self.digests.get(id(bitmap))
+
+        if remembered is not None and remembered[0] is bitmap:
+            return remembered[1]
+
+        digest = hashlib.blake2b(memoryview(np.ascontiguousarray(bitmap)), digest_size=16).digest()
+
+        # O bitmap é guardado junto, para que o id não seja reaproveitado por outro objeto
+        with self.lock:
+            self.digests[id(bitmap)] = (bitmap, digest)
+
+            while len(self.digests) > GEO_CACHE_SIZE:
+                del self.digests[next(iter(self.digests))]
+
+        return digest
+
+    def view(self, bitmap=None):
+        """ Esta função tem a responsabilidade de devolver os códigos e as posições, em ordem z, das linhas de um bitmap.
+            Cada seleção é filtrada uma única vez e reaproveitada entre consultas, reruns e sessões
+
+            Input: bitmap (ndarray - opcional)
+            Output: tuple (ndarray de códigos, ndarray de posições)
+        """
+        if bitmap is None:
+            return self.codes, self.order
+
+        def compute():
+            selected = np.unpackbits(bitmap, count=self.size).astype(bool)[self.order]
+
+            return self.codes[selected], self.order[selected]
+
+        return self.views.get(self.digest(bitmap), compute)
+
+    @timed('geo_nearest', rows=lambda found: len(found[0]))
+    def nearest(self, latitude, longitude, k, bitmap=None):
+        """ Esta função tem a responsabilidade de devolver os k restaurantes mais próximos de um ponto (e as distâncias em km),
+            ordenados por distância e posição. Busca best-first: as células saem de uma fila de prioridade pela menor
+            distância possível até o ponto e só as que podem conter um dos k mais próximos são divididas
+
+            Input: latitude (float), longitude (float), k (int), bitmap (ndarray - opcional)
+            Output: tuple (ndarray de posições, ndarray de distâncias)
+        """
+        codes, order = self.view(bitmap)
+
+        # Células: (distância mínima, 0, nível, x, y, prefixo de Morton, início, fim); restaurantes: (distância, 1, posição).
+        # No empate a célula sai antes, para que os restaurantes empatados saiam pela posição
+        heap = [(0.0, 0, 0, 0, 0, 0, 0, len(codes))]
+        rows, distances = [], []
+
+        while heap and len(rows) < k:
+            item = heapq.heappop(heap)
+
+            if item[1] == 1:
+                distances.append(item[0])
+                rows.append(item[2])
+                continue
+
+            _, _, level, x, y, prefix, start, end = item
+
+            if end - start <= GEO_LEAF_SIZE or level == self.bits:
+                leaf = order[start:end]
+
+                for distance, row in zip(haversine(latitude, longitude, self.latitude[leaf], self.longitude[leaf]).tolist(), leaf.tolist()):
+                    heapq.heappush(heap, (distance, 1, row))
+
+                continue
+
+            # Os quatro filhos (prefixo * 4 + quadrante) são trechos contíguos e consecutivos do trecho da célula
+            shift = 2 * (self.bits - level - 1)
+            limits = np.array([(prefix * 4 + quadrant) << shift for quadrant in range(5)], dtype=np.uint64)
+            bounds = (start + codes[start:end].searchsorted(limits)).tolist()
+
+            for quadrant in range(4):
+                if bounds[quadrant + 1] > bounds[quadrant]:
+                    cx, cy = 2 * x + (quadrant & 1), 2 * y + (quadrant >> 1)
+                    heapq.heappush(heap, (cell_distance(latitude, longitude, level + 1, cx, cy), 0, level + 1, cx, cy, prefix * 4 + quadrant, bounds[quadrant], bounds[quadrant + 1]))
+
+        return np.array(rows, dtype='int64'), np.array(distances, dtype='float64')
+
+    @timed('geo_within', rows=len)
+    def within(self, south, west, north, east, bitmap=None, limit=None):
+        """ Esta função tem a responsabilidade de devolver as posições (ordenadas) dos restaurantes dentro de uma área.
+            As células inteiramente dentro da área entram sem ler as coordenadas; só as da borda testam cada restaurante.
+            Com limit, apenas as menores posições são ordenadas (np.partition). Longitudes fora de [-180, 180], como as que o leaflet
+            devolve ao arrastar o mapa, são aceitas
+
+            Input: south (float), west (float), north (float), east (float), bitmap (ndarray - opcional), limit (int - opcional)
+            Output: ndarray
+        """
+        width = east - west
+        height = max(north - south, 0)
+
+        # Nível em que a área ocupa até BBOX_CELLS células por eixo
+        level = int(np.floor(np.log2(min(360 * BBOX_CELLS / max(width, 1e-9), 180 * BBOX_CELLS / max(height, 1e-9)))))
+        level = min(max(level, 0), self.bits)
+        size = 2 ** level
+        ys = np.arange(cell_of(south + 90, 180, size), cell_of(north + 90, 180, size) + 1)
+
+        if width >= 360:
+            xs = np.arange(size)
+
+        else:
+            # A área pode cruzar o antimeridiano: as colunas dão a volta no globo. A folga cobre o arredondamento da normalização
+            start = (west + 180) % 360 - 180 - 1e-6
+            x0 = cell_of(start + 180, 360, size)
+            x1 = cell_of((start + width + 2e-6 + 180) % 360, 360, size)
+            xs = np.arange(x0, x1 + 1) if x1 >= x0 else np.concatenate([np.arange(x0, size), np.arange(0, x1 + 1)])
+
+        grid_x, grid_y = (grid.ravel() for grid in np.meshgrid(xs, ys))
+
+        # Células inteiras dentro da área (com folga para o arredondamento das coordenadas nas bordas das células)
+        bottom = grid_y * (180 / size) - 90
+        inner = (bottom - BBOX_MARGIN >= south) & (bottom + 180 / size + BBOX_MARGIN <= north)
+
+        if width < 360:
+            offset = (grid_x * (360 / size) - 180 - west) % 360
+            inner &= (offset >= BBOX_MARGIN) & (offset + 360 / size + BBOX_MARGIN <= width)
+
+        codes, order = self.view(bitmap)
+        shift = np.uint64(2 * (self.bits - level))
+        prefixes = morton(grid_x, grid_y)
+        starts = np.searchsorted(codes, prefixes << shift)
+        ends = np.searchsorted(codes, (prefixes + np.uint64(1)) << shift)
+
+        # Mesmo teste de utils.maps.in_bounds, apenas nas células da borda
+        edge = ranges(order, starts[~inner], ends[~inner])
+        latitude = self.latitude[edge]
+        inside = (latitude >= south) & (latitude <= north)
+
+        if width < 360:
+            inside &= (self.longitude[edge] - west) % 360 + west <= east
+
+        rows = np.concatenate([ranges(order, starts[inner], ends[inner]), edge[inside]])
+
+        if limit is not None and limit < len(rows):
+            rows = np.partition(rows, limit)[:limit]
+
+        # A ordem z é um caso ruim para o np.sort; com muitas linhas, marcar as posições e lê-las em ordem é linear
+        if len(rows) * BBOX_MASK > self.size:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[rows] = True
+
+            return np.flatnonzero(mask)
+
+        return np.sort(rows)
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_geo(path=CSV_PATH, version=0, geo_path=GEO_PATH):
+    """ Esta função tem a responsabilidade de carregar o índice espacial uma única vez por versão do dataset,
+        reconstruindo-o apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), geo_path (str)
+        Output: GeoIndex
+    """
+    df = load_data(path, version)
+    publish(path, geo_path, lambda target: GeoIndex(df).save(target))
+
+    return GeoIndex.load(df, geo_path)
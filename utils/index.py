@@ -0,0 +1,160 @@
+# Imports
+import numpy     as np
+import streamlit as st
+
+from utils.cuisines import CuisineMap, load_cuisines
+from utils.shared   import load_arrays, save_arrays
+from utils.store    import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+INDEX_PATH = 'datasets/store/zomato.index.arrays'
+INDEXED_COLUMNS = ['country', 'cuisines']
+
+# Quantidade de bits ligados em cada byte, para contar linhas sem descompactar o bitmap
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+def contains(bitmap, rows):
+    """ Esta função tem a responsabilidade de consultar, sem descompactar o bitmap inteiro, quais linhas estão ligadas nele
+
+        Input: bitmap (ndarray), rows (ndarray)
+        Output: ndarray (bool)
+    """
+    return ((bitmap[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1).astype(bool)
+
+class BitmapIndex:
+    """ Índice de bitmaps (um por valor) das colunas usadas nos filtros da barra lateral.
+        Os bitmaps são compactados com np.packbits, então cada valor ocupa 1 bit por restaurante.
+        Nas culinárias há um bitmap por culinária, com todos os restaurantes que a oferecem (utils.cuisines)
+    """
+
+    def __init__(self, df, columns=INDEXED_COLUMNS, cuisines=None):
+        self.size = len(df)
+        self.bitmaps = {}
+
+        for column in columns:
+            if column == 'cuisines':
+                cuisines = CuisineMap(df[column]) if cuisines is None else cuisines
+                self.bitmaps[column] = {value: np.packbits(cuisines.mask([value])) for value in cuisines.names}
+                continue
+
+            codes = df[column].cat.codes.to_numpy()
+            categories = df[column].cat.categories
+
+            # Ordenar os códigos uma única vez agrupa as linhas de cada valor
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+
+            self.bitmaps[column] = {}
+
+            for code, value in enumerate(categories):
+                mask = np.zeros(self.size, dtype=bool)
+                mask[order[bounds[code]:bounds[code + 1]]] = True
+                self.bitmaps[column][value] = np.packbits(mask)
+
+        self.empty = np.packbits(np.zeros(self.size, dtype=bool))
+        self.full = np.packbits(np.ones(self.size, dtype=bool))
+
+    def save(self, path=INDEX_PATH):
+        """ Esta função tem a responsabilidade de gravar os bitmaps ao lado do arquivo colunar (uma matriz por coluna,
+            uma linha por valor), com troca atômica
+
+            Input: path (str)
+            Output: str
+        """
+        arrays = {'size': np.array([self.size], dtype='int64'), 'empty': self.empty, 'full': self.full}
+
+        for column, bitmaps in self.bitmaps.items():
+            arrays[f'{column}_values'] = np.array(list(bitmaps), dtype=str)
+            arrays[f'{column}_bitmaps'] = np.stack(list(bitmaps.values())) if bitmaps else np.empty((0, len(self.empty)), dtype=np.uint8)
+
+        return save_arrays(path, arrays)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """ Esta função tem a responsabilidade de abrir os bitmaps gravados com memory-map (somente leitura, compartilhados entre os workers)
+
+            Input: path (str)
+            Output: BitmapIndex
+        """
+        arrays = load_arrays(path)
+        index = cls.__new__(cls)
+        index.size = int(arrays['size'][0])
+        index.empty = arrays['empty']
+        index.full = arrays['full']
+        index.bitmaps = {}
+
+        for name in arrays:
+            if name.endswith('_values'):
+                column = name[:-len('_values')]
+                index.bitmaps[column] = dict(zip(arrays[name].tolist(), arrays[f'{column}_bitmaps']))
+
+        return index
+
+    def lookup(self, column, value):
+        """ Esta função tem a responsabilidade de devolver o bitmap de um único valor
+
+            Input: column (str), value (str)
+            Output: ndarray
+        """
+        return self.bitmaps[column].get(value, self.empty)
+
+    def union(self, column, values):
+        """ Esta função tem a responsabilidade de combinar com OU os bitmaps dos valores selecionados
+
+            Input: column (str), values (list)
+            Output: ndarray
+        """
+        bitmaps = [self.lookup(column, value) for value in values]
+
+        return np.bitwise_or.reduce(bitmaps) if bitmaps else self.empty
+
+    def select(self, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de combinar os filtros: OU dentro de cada coluna, E entre colunas.
+            Um filtro None não restringe a seleção
+
+            Input: countries (list - opcional), cuisines (list - opcional)
+            Output: ndarray
+        """
+        bitmap = self.full
+
+        for column, values in [('country', countries), ('cuisines', cuisines)]:
+            if values is not None:
+                bitmap = bitmap & self.union(column, values)
+
+        return bitmap
+
+    def mask(self, bitmap):
+        """ Esta função tem a responsabilidade de converter um bitmap em máscara booleana
+
+            Input: bitmap (ndarray)
+            Output: ndarray
+        """
+        return np.unpackbits(bitmap, count=self.size).astype(bool)
+
+    def rows(self, bitmap):
+        """ Esta função tem a responsabilidade de converter um bitmap nas posições (ordenadas) das linhas
+
+            Input: bitmap (ndarray)
+            Output: ndarray
+        """
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+    def count(self, bitmap):
+        """ Esta função tem a responsabilidade de contar as linhas de um bitmap
+
+            Input: bitmap (ndarray)
+            Output: int
+        """
+        return int(POPCOUNT[bitmap].sum())
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_index(path=CSV_PATH, version=0, index_path=INDEX_PATH):
+    """ Esta função tem a responsabilidade de carregar o índice de bitmaps uma única vez por versão do dataset,
+        reconstruindo-o apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), index_path (str)
+        Output: BitmapIndex
+    """
+    df, cuisines = load_data(path, version), load_cuisines(path, version)
+    publish(path, index_path, lambda target: BitmapIndex(df, cuisines=cuisines).save(target))
+
+    return BitmapIndex.load(index_path)
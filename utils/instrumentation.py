@@ -0,0 +1,371 @@
+# Imports
+import functools
+import json
+import os
+import threading
+import time
+
+from collections import Counter, defaultdict
+from contextlib  import contextmanager
+
+import streamlit as st
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+TRACE_LOG = os.environ.get('FOME_ZERO_TRACE_LOG')        # arquivo .jsonl com uma linha por rerun
+METRICS_PATH = os.environ.get('FOME_ZERO_METRICS_PATH')  # arquivo no formato texto do Prometheus, reescrito a cada rerun
+DEBUG = os.environ.get('FOME_ZERO_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+class Span:
+    """ Uma etapa medida dentro de um rerun: nome, duração, linhas processadas e profundidade no aninhamento """
+
+    __slots__ = ('stage', 'depth', 'rows', 'seconds', 'start')
+
+    def __init__(self, stage, depth, rows=None):
+        self.stage = stage
+        self.depth = depth
+        self.rows = rows
+        self.seconds = 0.0
+        self.start = time.perf_counter()
+
+class Trace:
+    """ Etapas e contadores de um único rerun de uma página """
+
+    def __init__(self, page):
+        self.page = page
+        self.session = session_id()
+        self.memory = None
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.spans = []
+        self.open = []
+        self.stage = None
+        self.counters = Counter()
+
+    def to_dict(self):
+        """ Esta função tem a responsabilidade de converter o rerun para um dicionário serializável em JSON
+
+            Input: None
+            Output: dict
+        """
+        return {
+            'page': self.page,
+            'started': self.started,
+            'seconds': self.seconds,
+            'spans': [{'stage': span.stage, 'depth': span.depth, 'seconds': span.seconds, 'rows': span.rows} for span in self.spans],
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.counters.items()],
+            'memory': self.memory
+        }
+
+class Registry:
+    """ Totais do processo (todas as sessões) de tempo e linhas por etapa e dos contadores, para exportação ao Prometheus """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        self.rows = Counter()
+        self.counters = Counter()
+        self.reruns = Counter()
+        self.memory = None
+
+    def add(self, trace):
+        """ Esta função tem a responsabilidade de somar um rerun aos totais do processo
+
+            Input: trace (Trace)
+            Output: None
+        """
+        with self.lock:
+            self.reruns[trace.page] += 1
+
+            for span in trace.spans:
+                key = (trace.page, span.stage)
+                self.seconds[key] += span.seconds
+                self.calls[key] += 1
+
+                if span.rows is not None:
+                    self.rows[key] += span.rows
+
+            for (name, labels), value in trace.counters.items():
+                self.counters[(name, (('page', trace.page),) + labels)] += value
+
+            if trace.memory is not None:
+                self.memory = trace.memory
+
+    def prometheus(self):
+        """ Esta função tem a responsabilidade de exportar os totais no formato texto do Prometheus
+
+            Input: None
+            Output: str
+        """
+        def labels(pairs):
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+            return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+        with self.lock:
+            lines = ['# HELP fome_zero_reruns_total Reruns executados por página', '# TYPE fome_zero_reruns_total counter']
+            lines += [f'fome_zero_reruns_total{labels([("page", page)])} {value}' for page, value in self.reruns.items()]
+
+            lines += ['# HELP fome_zero_stage_seconds Tempo gasto em cada etapa das páginas', '# TYPE fome_zero_stage_seconds summary']
+
+            for (page, stage), seconds in self.seconds.items():
+                pairs = [('page', page), ('stage', stage)]
+                lines.append(f'fome_zero_stage_seconds_sum{labels(pairs)} {seconds:.6f}')
+                lines.append(f'fome_zero_stage_seconds_count{labels(pairs)} {self.calls[(page, stage)]}')
+
+            lines += ['# HELP fome_zero_stage_rows_total Linhas processadas em cada etapa das páginas', '# TYPE fome_zero_stage_rows_total counter']
+            lines += [f'fome_zero_stage_rows_total{labels([("page", page), ("stage", stage)])} {value}' for (page, stage), value in self.rows.items()]
+
+            if self.memory is not None:
+                lines += ['# HELP fome_zero_cache_bytes Memória dos resultados guardados nos caches do processo', '# TYPE fome_zero_cache_bytes gauge']
+                lines += [f'fome_zero_cache_bytes {self.memory["cache_bytes"]}']
+                lines += ['# HELP fome_zero_cache_sessions Sessões com resultados guardados nos caches', '# TYPE fome_zero_cache_sessions gauge']
+                lines += [f'fome_zero_cache_sessions {self.memory["sessions"]}']
+                lines += ['# HELP fome_zero_session_max_bytes Maior memória de uma sessão nos caches', '# TYPE fome_zero_session_max_bytes gauge']
+                lines += [f'fome_zero_session_max_bytes {self.memory["max_session_bytes"]}']
+                lines += ['# HELP fome_zero_session_budget_bytes Orçamento de memória de cada sessão nos caches (0 = sem limite)', '# TYPE fome_zero_session_budget_bytes gauge']
+                lines += [f'fome_zero_session_budget_bytes {self.memory["budget_bytes"]}']
+
+            for name in sorted({name for name, _ in self.counters}):
+                lines += [f'# TYPE fome_zero_{name}_total counter']
+                lines += [f'fome_zero_{name}_total{labels(pairs)} {value}' for (counter, pairs), value in self.counters.items() if counter == name]
+
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+_local = threading.local()
+
+def session_id():
+    """ Esta função tem a responsabilidade de identificar a sessão do Streamlit da thread atual
+        (as tarefas do executor assumem o contexto da sessão que as enviou)
+
+        Input: None
+        Output: str ou None (fora de uma sessão, ex.: aquecimento)
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    return None if ctx is None else ctx.session_id
+
+def current_trace():
+    """ Esta função tem a responsabilidade de devolver o rerun em andamento na thread atual (cada sessão roda em sua thread)
+
+        Input: None
+        Output: Trace ou None
+    """
+    return getattr(_local, 'trace', None)
+
+def start_trace(page):
+    """ Esta função tem a responsabilidade de iniciar a medição de um rerun
+
+        Input: page (str)
+        Output: Trace
+    """
+    _local.trace = Trace(page)
+
+    return _local.trace
+
+@contextmanager
+def span(stage, rows=None):
+    """ Esta função tem a responsabilidade de medir uma etapa do rerun em andamento. Fora de um rerun medido não registra nada.
+        As linhas processadas podem ser informadas na criação ou atribuídas depois (etapa.rows = n)
+
+        Input: stage (str), rows (int - opcional)
+        Output: Span
+    """
+    trace = current_trace()
+
+    if trace is None:
+        yield Span(stage, 0, rows)
+        return
+
+    measured = Span(stage, len(trace.open), rows)
+    trace.spans.append(measured)
+    trace.open.append(measured)
+
+    try:
+        yield measured
+    finally:
+        measured.seconds = time.perf_counter() - measured.start
+        trace.open.pop()
+
+def close_stage(trace):
+    """ Esta função tem a responsabilidade de encerrar a etapa de primeiro nível em andamento
+
+        Input: trace (Trace)
+        Output: None
+    """
+    if trace.stage is not None:
+        trace.stage.seconds = time.perf_counter() - trace.stage.start
+        trace.open.remove(trace.stage)
+        trace.stage = None
+
+def stage(name):
+    """ Esta função tem a responsabilidade de marcar o início de uma etapa de primeiro nível da página,
+        encerrando a anterior, sem precisar indentar o código da página em um bloco with
+
+        Input: name (str)
+        Output: Span ou None
+    """
+    trace = current_trace()
+
+    if trace is None:
+        return None
+
+    close_stage(trace)
+    trace.stage = Span(name, 0)
+    trace.spans.append(trace.stage)
+    trace.open.append(trace.stage)
+
+    return trace.stage
+
+def timed(stage, rows=None):
+    """ Esta função tem a responsabilidade de criar um decorador que mede cada chamada da função como uma etapa
+
+        Input: stage (str), rows (callable - opcional, aplicado ao resultado para contar as linhas)
+        Output: callable
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage) as measured:
+                result = function(*args, **kwargs)
+
+                if rows is not None:
+                    measured.rows = rows(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+def capture(function, page):
+    """ Esta função tem a responsabilidade de executar uma função em outra thread registrando as suas etapas
+        em um rerun próprio, que depois é juntado ao rerun da página com merge_trace
+
+        Input: function (callable), page (str ou None - None quando a página não está sendo medida)
+        Output: tuple (resultado, Trace ou None)
+    """
+    if page is None:
+        return function(), None
+
+    _local.trace = Trace(page)
+
+    try:
+        return function(), _local.trace
+    finally:
+        _local.trace = None
+
+def merge_trace(child):
+    """ Esta função tem a responsabilidade de juntar ao rerun em andamento as etapas e contadores medidos em outra thread,
+        aninhados na etapa aberta no momento
+
+        Input: child (Trace)
+        Output: None
+    """
+    trace = current_trace()
+
+    if trace is None or child is None:
+        return
+
+    depth = len(trace.open)
+
+    for measured in child.spans:
+        measured.depth += depth
+        trace.spans.append(measured)
+
+    trace.counters.update(child.counters)
+
+def count(name, value=1, **labels):
+    """ Esta função tem a responsabilidade de somar a um contador do rerun em andamento (ex.: acertos de cache)
+
+        Input: name (str), value (int), labels (str)
+        Output: None
+    """
+    trace = current_trace()
+
+    if trace is not None:
+        trace.counters[(name, tuple(sorted(labels.items())))] += value
+
+def debug_enabled():
+    """ Esta função tem a responsabilidade de indicar se o painel de desempenho deve ser exibido
+        (variável FOME_ZERO_DEBUG ou ?debug=1 na URL)
+
+        Input: None
+        Output: bool
+    """
+    return DEBUG or st.query_params.get('debug') == '1'
+
+def finish_trace():
+    """ Esta função tem a responsabilidade de encerrar a medição do rerun: soma aos totais do processo,
+        grava os arquivos de exportação configurados e exibe o painel de desempenho quando habilitado
+
+        Input: None
+        Output: Trace ou None
+    """
+    trace = current_trace()
+
+    if trace is None:
+        return None
+
+    from utils.cache import memory_stats
+
+    _local.trace = None
+    close_stage(trace)
+    trace.seconds = time.perf_counter() - trace.start
+    trace.memory = memory_stats(trace.session)
+    REGISTRY.add(trace)
+
+    if TRACE_LOG:
+        with open(TRACE_LOG, 'a') as file:
+            file.write(json.dumps(trace.to_dict(), ensure_ascii=False) + '\n')
+
+    if METRICS_PATH:
+        # Escrita atômica, para o coletor nunca ler um arquivo pela metade
+        tmp_path = f'{METRICS_PATH}.{threading.get_ident()}.tmp'
+
+        with open(tmp_path, 'w') as file:
+            file.write(REGISTRY.prometheus())
+
+        os.replace(tmp_path, METRICS_PATH)
+
+    if debug_enabled():
+        debug_panel(trace)
+
+    return trace
+
+def debug_panel(trace):
+    """ Esta função tem a responsabilidade de mostrar na barra lateral os tempos do rerun, os contadores e as exportações
+
+        Input: trace (Trace)
+        Output: None
+    """
+    with st.sidebar.expander('Desempenho', expanded=True):
+        st.write(f'Rerun: {trace.seconds * 1000:.1f} ms')
+
+        budget = f'{trace.memory["budget_bytes"] / 1024 ** 2:.0f} MB' if trace.memory['budget_bytes'] else 'sem limite'
+        st.write(f'Memória da sessão nos caches: {trace.memory["session_bytes"] / 1024 ** 2:.1f} MB ({budget})')
+
+        # Tempo próprio = duração da etapa menos a das etapas aninhadas (ex.: serialização dos widgets)
+        own = [span.seconds for span in trace.spans]
+
+        for position, child in enumerate(trace.spans):
+            for parent in range(position - 1, -1, -1):
+                if trace.spans[parent].depth < child.depth:
+                    own[parent] -= child.seconds
+                    break
+
+        st.dataframe([{
+            'etapa': '· ' * span.depth + span.stage,
+            'ms': round(span.seconds * 1000, 2),
+            'próprio (ms)': round(seconds * 1000, 2),
+            'linhas': span.rows
+        } for span, seconds in zip(trace.spans, own)], hide_index=True, use_container_width=True)
+
+        if trace.counters:
+            st.dataframe([{'contador': name, **dict(labels), 'valor': value} for (name, labels), value in trace.counters.items()], hide_index=True, use_container_width=True)
+
+        st.download_button('Rerun (JSON)', json.dumps(trace.to_dict(), ensure_ascii=False, indent=2), file_name='trace.json', mime='application/json')
+        st.download_button('Processo (Prometheus)', REGISTRY.prometheus(), file_name='metrics.prom', mime='text/plain')
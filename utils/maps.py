@@ -0,0 +1,351 @@
+# Imports
+import json
+import os
+
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from string import Formatter
+
+# O folium é importado dentro das funções, para que só seja carregado quando um mapa for desenhado
+
+from utils.cache           import gather
+from utils.instrumentation import timed
+from utils.store           import CSV_PATH, LIVE_VERSIONS, STORE_PATH, build_store, load_data, pin_file, publish, read_store
+
+GRID_PATH = 'datasets/store/zomato.grid.feather'
+
+ZOOM_START = 2
+GRID_MAX_ZOOM = 10   # a partir deste zoom o mapa mostra os restaurantes individualmente
+GRID_CELLS = 4       # células por eixo em cada tile de 256px
+DETAIL_LIMIT = 500   # quantidade de restaurantes na tela abaixo da qual os marcadores são exibidos
+GRID_THRESHOLD = 2000 # no modo automático, quantidade de restaurantes a partir da qual a grade é usada
+COLORS = ['darkgreen', 'green', 'lightgreen', 'orange', 'red', 'darkred']
+
+MAP_MODES = {
+    'Automático': 'auto',
+    'Agrupado no servidor': 'grid',
+    'Marcadores (rápido)': 'fast',
+    'Marcadores (exato)': 'exact'
+}
+
+POPUP_TEMPLATE = """
+        <p>
+            <strong>{restaurant_name}</strong>
+        </p>
+        <p>
+            Price: {average_cost_for_two},00 ({currency}) para dois</br>
+            Type: {cuisines}</br>
+            Aggregate Rating: {aggregate_rating:.1f}/5.0
+        </p>    
+        """
+
+# Campos do popup e seus formatos, na ordem em que aparecem no template
+POPUP_FIELDS = [(field, spec) for _, field, spec, _ in Formatter().parse(POPUP_TEMPLATE) if field]
+
+def popup_html(row):
+    """ Esta função tem a responsabilidade de montar o HTML do popup de um restaurante
+
+        Input: row (Series)
+        Output: str
+    """
+    return POPUP_TEMPLATE.format(**{field: row[field] for field, _ in POPUP_FIELDS})
+
+def restaurant_marker(row):
+    """ Esta função tem a responsabilidade de criar o marcador de um restaurante
+
+        Input: row (Series)
+        Output: Marker
+    """
+    import folium
+
+    return folium.Marker((row['latitude'], row['longitude']), popup=folium.Popup(popup_html(row), max_width=500), icon=folium.Icon(icon='house', prefix='fa', color=row['rating_color_name']))
+
+def create_base_map(df):
+    """ Esta função tem a responsabilidade de criar o mapa vazio centralizado nos restaurantes
+
+        Input: df (DataFrame)
+        Output: Map
+    """
+    import folium
+
+    location = (df['latitude'].mean(), df['longitude'].mean()) if len(df) else (0, 0)
+
+    return folium.Map(location, zoom_start=ZOOM_START, control_scale=True)
+
+def marker_payload(df):
+    """ Esta função tem a responsabilidade de serializar de uma vez as coordenadas e os campos dos popups.
+        Cada campo vai como códigos + valores distintos já formatados, como no template do popup
+
+        Input: df (DataFrame)
+        Output: dict
+    """
+    fields = {}
+
+    for field, spec in POPUP_FIELDS + [('rating_color_name', '')]:
+        categorical = pd.Categorical(df[field]).remove_unused_categories()
+        fields[field] = {'codes': categorical.codes.tolist(), 'values': [format(value, spec) for value in categorical.categories]}
+
+    return {
+        'latitude': df['latitude'].to_numpy('float64').round(6).tolist(),
+        'longitude': df['longitude'].to_numpy('float64').round(6).tolist(),
+        'fields': fields,
+        'template': POPUP_TEMPLATE
+    }
+
+@timed('create_map')
+def create_map(df, engine='exact'):
+    """ Esta função tem a responsabilidade de criar o mapa com um marcador por restaurante (MarkerCluster).
+        No motor 'exact' cada marcador é um objeto folium; no 'fast' os marcadores são criados no navegador
+
+        Input: df (DataFrame), engine (str)
+        Output: Map
+    """
+    from folium.plugins import MarkerCluster
+
+    from utils.clusters import RestaurantCluster
+
+    map = create_base_map(df)
+
+    if engine == 'fast':
+        # '</' é escapado para que nenhum nome de restaurante feche a tag <script>
+        RestaurantCluster(json.dumps(marker_payload(df), ensure_ascii=False).replace('</', '<\\/')).add_to(map)
+
+    else:
+        cluster = MarkerCluster().add_to(map)
+
+        for _, row in df.iterrows():
+            restaurant_marker(row).add_to(cluster)
+
+    return map
+
+# Colunas lidas pelos processos que montam o HTML dos mapas
+MAP_COLUMNS = ['country', 'latitude', 'longitude', 'rating_color_name'] + [field for field, _ in POPUP_FIELDS]
+
+_worker = {}   # (path, versão) -> DataFrame, das LIVE_VERSIONS versões mais recentes pedidas ao processo
+
+def worker_data(path=CSV_PATH, version=0, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de carregar, dentro de um processo de trabalho, as colunas usadas pelo mapa,
+        uma única vez por versão do dataset. O arquivo colunar é lido pelo link fixado da versão (pin_file). Como os processos
+        são aquecidos na partida do servidor, antes do aquecimento publicar o arquivo, ele é garantido aqui (como no load_data)
+
+        Input: path (str), version (int), store_path (str)
+        Output: DataFrame
+    """
+    key = (path, version)
+
+    if key not in _worker:
+        publish(path, store_path, lambda target: build_store(path, target))
+        _worker[key] = read_store(pin_file(store_path, version), columns=MAP_COLUMNS)
+
+        for stale in list(_worker)[:-LIVE_VERSIONS]:
+            del _worker[stale]
+
+    return _worker[key]
+
+def warm_worker(path=CSV_PATH, version=0, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de preparar um processo de trabalho: importar o folium e carregar os dados do mapa
+        (da primeira versão do dataset, a que as sessões usam na partida)
+
+        Input: path (str), version (int), store_path (str)
+        Output: int
+    """
+    import folium
+
+    return len(worker_data(path, version, store_path))
+
+def map_html(countries, engine='exact', path=CSV_PATH, version=0, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de montar o HTML completo do mapa dos países selecionados na versão pedida do dataset.
+        Executada em um processo de trabalho, fora do GIL do servidor; recebe apenas a seleção e a versão, não os dados
+
+        Input: countries (list), engine (str), path (str), version (int), store_path (str)
+        Output: str
+    """
+    import folium
+
+    df = worker_data(path, version, store_path)
+    df = df.loc[df['country'].isin(countries), :]
+
+    return folium.Figure().add_child(create_map(df, engine)).render()
+
+def use_grid(mode, rows):
+    """ Esta função tem a responsabilidade de decidir se o mapa usa a grade de agrupamento
+
+        Input: mode (str), rows (int)
+        Output: bool
+    """
+    if mode == 'auto':
+        return rows > GRID_THRESHOLD
+
+    return mode == 'grid'
+
+def cell_size(zoom):
+    """ Esta função tem a responsabilidade de calcular o tamanho (em graus) de uma célula da grade em um zoom
+
+        Input: zoom (int)
+        Output: float
+    """
+    return 360 / (2 ** zoom) / GRID_CELLS
+
+def build_grid(df):
+    """ Esta função tem a responsabilidade de pré-agrupar os restaurantes em uma grade por país e nível de zoom.
+        Cada célula guarda somas (quantidade, coordenadas e cores), então a seleção de países é um rollup
+
+        Input: df (DataFrame)
+        Output: dict (zoom -> DataFrame)
+    """
+    latitude = df['latitude'].to_numpy('float64')
+    longitude = df['longitude'].to_numpy('float64')
+    colors = pd.get_dummies(pd.Categorical(df['rating_color_name'], categories=COLORS)).to_numpy('int64')
+
+    grid = {}
+
+    for zoom in range(GRID_MAX_ZOOM + 1):
+        size = cell_size(zoom)
+        cells = pd.DataFrame(colors, columns=COLORS)
+        cells.insert(0, 'country', df['country'].to_numpy())
+        cells.insert(1, 'cx', np.floor((longitude + 180) / size).astype('int32'))
+        cells.insert(2, 'cy', np.floor((latitude + 90) / size).astype('int32'))
+        cells.insert(3, 'restaurants', 1)
+        cells.insert(4, 'latitude', latitude)
+        cells.insert(5, 'longitude', longitude)
+
+        grid[zoom] = cells.groupby(['country', 'cx', 'cy'], observed=True).sum().reset_index()
+
+    return grid
+
+def save_grid(grid, grid_path=GRID_PATH):
+    """ Esta função tem a responsabilidade de gravar a grade (todos os zooms em uma tabela) ao lado do arquivo colunar,
+        com troca atômica e um único bloco por coluna, como o arquivo colunar
+
+        Input: grid (dict), grid_path (str)
+        Output: str
+    """
+    from pyarrow import feather
+
+    cells = pd.concat([cells.assign(zoom=np.int8(zoom)) for zoom, cells in grid.items()], ignore_index=True)
+    tmp_path = f'{grid_path}.tmp'
+    feather.write_feather(cells, tmp_path, compression='uncompressed', chunksize=max(len(cells), 1))
+    os.replace(tmp_path, grid_path)
+
+    return grid_path
+
+def read_grid(grid_path=GRID_PATH):
+    """ Esta função tem a responsabilidade de abrir a grade gravada com memory-map: cada zoom é um trecho da tabela, sem cópia
+
+        Input: grid_path (str)
+        Output: dict (zoom -> DataFrame)
+    """
+    cells = read_store(grid_path)
+    bounds = np.searchsorted(cells['zoom'].to_numpy(), np.arange(GRID_MAX_ZOOM + 2))
+    columns = [column for column in cells.columns if column != 'zoom']
+
+    return {zoom: cells.iloc[bounds[zoom]:bounds[zoom + 1]][columns] for zoom in range(GRID_MAX_ZOOM + 1)}
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_grid(path=CSV_PATH, version=0, grid_path=GRID_PATH):
+    """ Esta função tem a responsabilidade de carregar a grade de agrupamento uma única vez por versão do dataset,
+        reconstruindo-a apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), grid_path (str)
+        Output: dict (zoom -> DataFrame)
+    """
+    df = load_data(path, version)
+    publish(path, grid_path, lambda target: save_grid(build_grid(df), target))
+
+    return read_grid(grid_path)
+
+def in_bounds(latitude, longitude, bounds):
+    """ Esta função tem a responsabilidade de indicar quais coordenadas estão dentro da área visível
+
+        Input: latitude (ndarray), longitude (ndarray), bounds (dict ou None)
+        Output: ndarray
+    """
+    if not bounds or bounds['_southWest']['lat'] is None:
+        return np.ones(len(latitude), dtype=bool)
+
+    south, west = bounds['_southWest']['lat'], bounds['_southWest']['lng']
+    north, east = bounds['_northEast']['lat'], bounds['_northEast']['lng']
+
+    inside = (latitude >= south) & (latitude <= north)
+
+    # Ao arrastar o mapa o leaflet devolve longitudes fora de [-180, 180]
+    if east - west < 360:
+        longitude = (longitude - west) % 360 + west
+        inside &= longitude <= east
+
+    return inside
+
+def grid_clusters(grid, countries, zoom, bounds):
+    """ Esta função tem a responsabilidade de somar as células dos países selecionados no zoom atual,
+        mantendo apenas as que estão na área visível
+
+        Input: grid (dict), countries (list), zoom (int), bounds (dict ou None)
+        Output: DataFrame
+    """
+    cells = grid[min(max(int(zoom), 0), GRID_MAX_ZOOM)]
+    cells = cells.loc[cells['country'].isin(countries), :].groupby(['cx', 'cy']).sum(numeric_only=True).reset_index()
+
+    cells['latitude'] = cells['latitude'] / cells['restaurants']
+    cells['longitude'] = cells['longitude'] / cells['restaurants']
+
+    return cells.loc[in_bounds(cells['latitude'].to_numpy(), cells['longitude'].to_numpy(), bounds), :]
+
+def cluster_marker(cell):
+    """ Esta função tem a responsabilidade de criar o marcador de uma célula, com a quantidade de restaurantes
+        e a distribuição das cores de avaliação
+
+        Input: cell (namedtuple)
+        Output: Marker
+    """
+    import folium
+
+    counts = {color: getattr(cell, color) for color in COLORS if getattr(cell, color) > 0}
+    dominant = max(counts, key=counts.get)
+    size = 24 + 6 * int(np.log10(cell.restaurants))
+
+    icon = folium.DivIcon(icon_size=(size, size), icon_anchor=(size // 2, size // 2), html=f"""
+        <div style="width: {size}px; height: {size}px; line-height: {size}px; border-radius: 50%; background: {dominant}; opacity: 0.8; color: white; text-align: center; font-weight: bold;">{cell.restaurants}</div>
+        """)
+
+    breakdown = '</br>'.join(f'{color}: {count}' for color, count in counts.items())
+
+    return folium.Marker((cell.latitude, cell.longitude), icon=icon, tooltip=f'{cell.restaurants} restaurantes', popup=folium.Popup(breakdown, max_width=200))
+
+def visible_rows(geo, bitmap, bounds, limit=None):
+    """ Esta função tem a responsabilidade de buscar no índice espacial as posições dos restaurantes selecionados
+        dentro da área visível do mapa
+
+        Input: geo (GeoIndex), bitmap (ndarray), bounds (dict ou None), limit (int - opcional)
+        Output: ndarray
+    """
+    if not bounds or bounds['_southWest']['lat'] is None:
+        return geo.within(-90, -180, 90, 180, bitmap, limit)
+
+    return geo.within(bounds['_southWest']['lat'], bounds['_southWest']['lng'], bounds['_northEast']['lat'], bounds['_northEast']['lng'], bitmap, limit)
+
+@timed('create_grid_layer')
+def create_grid_layer(grid, geo, df, bitmap, countries, zoom, bounds):
+    """ Esta função tem a responsabilidade de criar a camada do mapa para a área visível: os centróides das células
+        da grade ou, com zoom alto ou poucos restaurantes na tela, os marcadores completos
+
+        Input: grid (dict), geo (GeoIndex), df (DataFrame - dataset completo), bitmap (ndarray), countries (list), zoom (int), bounds (dict ou None)
+        Output: FeatureGroup
+    """
+    import folium
+
+    layer = folium.FeatureGroup(name='Restaurantes')
+    clusters = grid_clusters(grid, countries, zoom, bounds)
+
+    if zoom > GRID_MAX_ZOOM or clusters['restaurants'].sum() <= DETAIL_LIMIT:
+        visible = gather(df, visible_rows(geo, bitmap, bounds, DETAIL_LIMIT), MAP_COLUMNS)
+
+        for _, row in visible.iterrows():
+            restaurant_marker(row).add_to(layer)
+
+    else:
+        for cell in clusters.itertuples(index=False):
+            cluster_marker(cell).add_to(layer)
+
+    return layer
@@ -0,0 +1,454 @@
+""" Pipeline de limpeza do dataset bruto da Zomato
+
+    Uso: python -m utils.pipeline [arquivos brutos ...] [--output caminho] [--full] [--chunksize N]
+"""
+# Imports
+import argparse
+import functools
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy  as np
+import pandas as pd
+
+RAW_DIR = 'datasets/raw'
+OUTPUT_PATH = 'datasets/clean/zomato.csv'
+# A tabela de taxas acompanha o código: o caminho não depende do diretório de trabalho (ex.: os notebooks rodam de notebooks/)
+RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datasets', 'rates', 'usd_rates_v1.csv')   # nova versão das taxas = novo arquivo (usd_rates_v2.csv, ...)
+CHUNKSIZE = 100_000
+CLEANING_VERSION = 2   # incrementar quando a limpeza mudar linhas já gravadas (2: todas as culinárias de cada restaurante)
+CUISINE_SEPARATOR = ', '
+
+COUNTRIES = {
+    1: 'India',
+    14: 'Australia',
+    30: 'Brazil',
+    37: 'Canada',
+    94: 'Indonesia',
+    148: 'New Zeland',
+    162: 'Philippines',
+    166: 'Qatar',
+    184: 'Singapure',
+    189: 'South Africa',
+    191: 'Sri Lanka',
+    208: 'Turkey',
+    214: 'United Arab Emirates',
+    215: 'England',
+    216: 'United States of America'
+}
+
+COLORS = {
+    '3F7E00': 'darkgreen',
+    '5BA829': 'green',
+    '9ACD32': 'lightgreen',
+    'CDD614': 'orange',
+    'FFBA00': 'red',
+    'CBCBC8': 'darkred',
+    'FF7800': 'darkred'
+}
+
+PRICE_TYPES = np.array(['_', 'cheap', 'normal', 'expensive', 'gourmet'], dtype=object)
+
+COLUMNS = [
+    'restaurant_id',
+    'restaurant_name',
+    'country',
+    'city',
+    'address',
+    'locality',
+    'locality_verbose',
+    'longitude',
+    'latitude',
+    'cuisines',
+    'average_cost_for_two',
+    'currency',
+    'cost_for_two_usd',
+    'has_table_booking',
+    'has_online_delivery',
+    'is_delivering_now',
+    'switch_to_order_menu',
+    'price_type',
+    'aggregate_rating',
+    'rating_color_name',
+    'rating_text',
+    'votes',
+]
+
+def rename_columns(df):
+    """ Esta função tem a responsabilidade de converter os nomes das colunas para snake_case
+
+        Input: df (DataFrame)
+        Output: DataFrame
+    """
+    df.columns = [column.replace(' ', '_').lower() for column in df.columns]
+
+    return df
+
+def normalize_cuisines(cuisines):
+    """ Esta função tem a responsabilidade de manter todos os tipos de culinária de cada restaurante em uma lista normalizada
+        ('Italian,Pizza ' -> 'Italian, Pizza': sem espaços sobrando nem repetições, na ordem original),
+        dividindo apenas os valores distintos em vez de cada linha. A relação restaurante <-> culinária usada nos filtros
+        e agregados é montada a partir dessa lista (utils.cuisines)
+
+        Input: cuisines (Series)
+        Output: Series
+    """
+    categorical = cuisines.astype('category')
+    normalized = [CUISINE_SEPARATOR.join(dict.fromkeys(filter(None, (part.strip() for part in value.split(','))))) for value in categorical.cat.categories]
+
+    return pd.Series(np.asarray(normalized, dtype=object)[categorical.cat.codes.values], index=cuisines.index)
+
+@functools.lru_cache
+def load_rates(path=RATES_PATH):
+    """ Esta função tem a responsabilidade de carregar a tabela versionada de taxas de conversão para dólar,
+        indexada por (país, moeda) como aparecem no dataset: o rótulo da moeda sozinho é ambíguo ('Dollar($)' é
+        a moeda de quatro países) e às vezes errado ('Botswana Pula(P)' são pesos filipinos)
+
+        Input: path (str)
+        Output: DataFrame
+    """
+    return pd.read_csv(path).set_index(['country', 'currency'])
+
+def rates_version(path=RATES_PATH):
+    """ Esta função tem a responsabilidade de identificar a versão da tabela de taxas pelo nome e conteúdo do arquivo
+
+        Input: path (str)
+        Output: str
+    """
+    with open(path, 'rb') as file:
+        return f'{os.path.basename(path)}:{hashlib.sha1(file.read()).hexdigest()}'
+
+def cost_in_usd(df, rates):
+    """ Esta função tem a responsabilidade de converter o preço do prato para dois para dólares com uma busca vetorizada:
+        cada (país, moeda) distinto é procurado uma única vez na tabela e o resultado é espalhado pelos códigos
+
+        Input: df (DataFrame), rates (DataFrame)
+        Output: Series
+    """
+    pairs = pd.MultiIndex.from_arrays([df['country'], df['currency']])
+    codes, uniques = pairs.factorize()
+    usd_per_unit = rates['usd_per_unit'].reindex(uniques)
+
+    if usd_per_unit.isna().any():
+        raise ValueError(f'Sem taxa de conversão para dólar: {usd_per_unit.index[usd_per_unit.isna()].tolist()}')
+
+    return (df['average_cost_for_two'] * usd_per_unit.to_numpy()[codes]).round(2)
+
+def clean_data(df, rates=None):
+    """ Esta função tem a responsabilidade de limpar um bloco do dataset bruto com buscas vetorizadas
+
+        Input: df (DataFrame), rates (DataFrame - opcional, padrão: a tabela de RATES_PATH)
+        Output: DataFrame
+    """
+    df_clean = df.dropna()
+
+    df_clean = rename_columns(df_clean.copy())
+
+    df_clean['price_type'] = PRICE_TYPES[df_clean['price_range'].to_numpy()]
+    df_clean['rating_color_name'] = df_clean['rating_color'].map(COLORS)
+    df_clean['country'] = df_clean['country_code'].map(COUNTRIES)
+    df_clean['cuisines'] = normalize_cuisines(df_clean['cuisines'])
+    df_clean['cost_for_two_usd'] = cost_in_usd(df_clean, load_rates() if rates is None else rates)
+
+    return df_clean.drop_duplicates().loc[:, COLUMNS]
+
+KEYS_DTYPE = np.dtype([('restaurant_id', 'int64'), ('hash', 'uint64')])   # chaves da deduplicação, ordenadas por restaurant_id
+
+def row_hashes(df):
+    """ Esta função tem a responsabilidade de calcular o hash de conteúdo de cada linha limpa,
+        que detecta se um restaurante já gravado mudou
+
+        Input: df (DataFrame)
+        Output: ndarray
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+class ByteRange(io.RawIOBase):
+    """ Leitor que expõe apenas o intervalo [start, end) de um arquivo """
+
+    def __init__(self, path, start, end):
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        data = self.file.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+def complete_size(path):
+    """ Esta função tem a responsabilidade de encontrar o fim da última linha completa do arquivo,
+        ignorando uma linha que ainda esteja sendo escrita
+
+        Input: path (str)
+        Output: int
+    """
+    size = os.path.getsize(path)
+
+    with open(path, 'rb') as file:
+        position = size
+
+        while position > 0:
+            start = max(0, position - 65536)
+            file.seek(start)
+            block = file.read(position - start)
+            newline = block.rfind(b'\n')
+
+            if newline != -1:
+                return start + newline + 1
+
+            position = start
+
+    return 0
+
+def fingerprint(path, offset):
+    """ Esta função tem a responsabilidade de gerar uma assinatura do trecho já processado do arquivo,
+        usando o cabeçalho e os últimos bytes antes do offset
+
+        Input: path (str), offset (int)
+        Output: str
+    """
+    digest = hashlib.sha1()
+
+    with open(path, 'rb') as file:
+        digest.update(file.readline())
+        file.seek(max(0, offset - 65536))
+        digest.update(file.read(offset - file.tell()))
+
+    return digest.hexdigest()
+
+def read_chunks(path, start, end, chunksize):
+    """ Esta função tem a responsabilidade de ler em blocos as linhas de um arquivo bruto entre dois offsets
+
+        Input: path (str), start (int), end (int), chunksize (int)
+        Output: iterator de DataFrame
+    """
+    header = pd.read_csv(path, nrows=0).columns
+
+    if start == 0:
+        return pd.read_csv(io.BufferedReader(ByteRange(path, 0, end)), chunksize=chunksize)
+
+    return pd.read_csv(io.BufferedReader(ByteRange(path, start, end)), names=header, header=None, chunksize=chunksize)
+
+def state_paths(output):
+    """ Esta função tem a responsabilidade de definir onde ficam o estado e as chaves da deduplicação
+
+        Input: output (str)
+        Output: tuple
+    """
+    base, _ = os.path.splitext(output)
+
+    return f'{base}.state.json', f'{base}.keys.npy'
+
+def load_state(output):
+    """ Esta função tem a responsabilidade de carregar o estado do último processamento
+
+        Input: output (str)
+        Output: tuple (dict, ndarray)
+    """
+    state_path, keys_path = state_paths(output)
+
+    if not (os.path.exists(output) and os.path.exists(state_path) and os.path.exists(keys_path)):
+        return {'files': {}}, np.empty(0, dtype=KEYS_DTYPE)
+
+    keys = np.load(keys_path)
+
+    # Chaves de um formato anterior (apenas os hashes): o estado é descartado e tudo é reprocessado
+    if keys.dtype != KEYS_DTYPE:
+        return {'files': {}}, np.empty(0, dtype=KEYS_DTYPE)
+
+    with open(state_path) as file:
+        state = json.load(file)
+
+    return state, keys
+
+def save_state(output, state, keys):
+    """ Esta função tem a responsabilidade de salvar o estado do processamento
+
+        Input: output (str), state (dict), keys (ndarray)
+        Output: None
+    """
+    state_path, keys_path = state_paths(output)
+
+    np.save(keys_path, keys)
+
+    with open(state_path, 'w') as file:
+        json.dump(state, file, indent=2)
+
+    return None
+
+def merge_keys(keys, df):
+    """ Esta função tem a responsabilidade de comparar um bloco limpo com as chaves já gravadas, pelo restaurant_id:
+        restaurantes novos, mudados (hash de conteúdo diferente) e repetidos sem mudança
+
+        Input: keys (ndarray - KEYS_DTYPE), df (DataFrame - um restaurante por linha)
+        Output: tuple (ndarray - chaves atualizadas, ndarray - linhas novas, ndarray - linhas mudadas)
+    """
+    ids, hashes = df['restaurant_id'].to_numpy('int64'), row_hashes(df)
+
+    known = changed = np.zeros(len(ids), dtype=bool)
+    keys = keys.copy()
+
+    if len(keys):
+        position = np.minimum(np.searchsorted(keys['restaurant_id'], ids), len(keys) - 1)
+        known = keys['restaurant_id'][position] == ids
+        changed = known & (keys['hash'][position] != hashes)
+        keys['hash'][position[changed]] = hashes[changed]
+
+    added = np.empty(int((~known).sum()), dtype=KEYS_DTYPE)
+    added['restaurant_id'], added['hash'] = ids[~known], hashes[~known]
+    keys = np.concatenate([keys, added])
+
+    return keys[np.argsort(keys['restaurant_id'], kind='stable')], ~known, changed
+
+def drop_restaurants(paths, target, restaurant_ids, chunksize=CHUNKSIZE):
+    """ Esta função tem a responsabilidade de juntar .CSVs limpos em um novo arquivo sem as linhas de alguns restaurantes,
+        em blocos (memória limitada). Os campos são lidos como texto, então as demais linhas são gravadas sem alteração
+
+        Input: paths (list), target (str), restaurant_ids (set), chunksize (int)
+        Output: None
+    """
+    header = True
+
+    for path in paths:
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+            keep = ~chunk['restaurant_id'].astype('int64').isin(restaurant_ids)
+            chunk[keep].to_csv(target, mode='w' if header else 'a', header=header, index=False)
+            header = False
+
+def pending_ranges(raw_paths, state):
+    """ Esta função tem a responsabilidade de descobrir quais trechos dos arquivos brutos ainda não foram processados.
+        Se algum arquivo já processado tiver sido alterado (e não apenas acrescido), é necessário refazer tudo
+
+        Input: raw_paths (list), state (dict)
+        Output: tuple (list, bool)
+    """
+    ranges = []
+
+    for path in raw_paths:
+        end = complete_size(path)
+        previous = state['files'].get(path)
+
+        if previous is None:
+            ranges.append((path, 0, end))
+
+        elif previous['offset'] > end or fingerprint(path, previous['offset']) != previous['fingerprint']:
+            return [(path, 0, complete_size(path)) for path in raw_paths], True
+
+        elif previous['offset'] < end:
+            ranges.append((path, previous['offset'], end))
+
+    return ranges, False
+
+def refresh(raw_paths, output=OUTPUT_PATH, full=False, chunksize=CHUNKSIZE):
+    """ Esta função tem a responsabilidade de atualizar o dataset limpo processando apenas as linhas novas
+        dos arquivos brutos, em blocos e com memória limitada. A deduplicação é pelo restaurant_id: um restaurante
+        repetido sem mudança é ignorado e um com conteúdo diferente (nota, avaliações, ...) substitui a linha gravada
+
+        Input: raw_paths (list), output (str), full (bool), chunksize (int)
+        Output: dict
+    """
+    state, keys = ({'files': {}}, np.empty(0, dtype=KEYS_DTYPE)) if full else load_state(output)
+    ranges, rebuild = pending_ranges(raw_paths, state)
+
+    # Uma nova versão das taxas muda a coluna em dólar de todas as linhas; uma nova versão da limpeza, as linhas já gravadas
+    version = rates_version()
+    rebuild = rebuild or state.get('rates') != version or state.get('cleaning') != CLEANING_VERSION
+
+    fresh = full or rebuild or not state['files']
+
+    if fresh:
+        state, keys = {'files': {}, 'rates': version, 'cleaning': CLEANING_VERSION}, np.empty(0, dtype=KEYS_DTYPE)
+        ranges = [(path, 0, complete_size(path)) for path in raw_paths]
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    # As linhas novas são juntadas em um arquivo à parte (só elas, sem copiar o .CSV)
+    new_path = f'{output}.new'
+
+    if os.path.exists(new_path):
+        os.remove(new_path)
+
+    # Linhas dos restaurantes mudados: as gravadas antes são removidas no final e vale a mais recente
+    updated = []
+
+    summary = {'read': 0, 'written': 0, 'updated': 0}
+
+    for path, start, end in ranges:
+        for chunk in read_chunks(path, start, end, chunksize):
+            # Dentro do bloco vale a última linha de cada restaurante
+            df_clean = clean_data(chunk).drop_duplicates('restaurant_id', keep='last')
+            keys, new, changed = merge_keys(keys, df_clean)
+
+            df_clean[new].to_csv(new_path, mode='a', header=not os.path.exists(new_path), index=False)
+
+            if changed.any():
+                updated.append(df_clean[changed])
+
+            summary['read'] += len(chunk)
+            summary['written'] += int(new.sum())
+
+        state['files'][path] = {'offset': end, 'fingerprint': fingerprint(path, end)}
+
+    if updated:
+        # Restaurantes mudados: o .CSV é reescrito em blocos sem as linhas antigas deles e publicado com troca atômica,
+        # então quem lê o arquivo (como o gerenciador de versões, utils.dataset) nunca vê um .CSV pela metade
+        updated = pd.concat(updated).drop_duplicates('restaurant_id', keep='last')
+        tmp_path = f'{output}.tmp'
+        sources = [path for path in ([] if fresh else [output]) + [new_path] if os.path.exists(path)]
+
+        drop_restaurants(sources, tmp_path, set(updated['restaurant_id'].tolist()), chunksize)
+        updated.to_csv(tmp_path, mode='a', header=False, index=False)
+        os.replace(tmp_path, output)
+        summary['updated'] = len(updated)
+
+    elif fresh and os.path.exists(new_path):
+        # Carga completa: o arquivo das linhas novas já é o .CSV inteiro
+        os.replace(new_path, output)
+
+    elif os.path.exists(new_path):
+        # Apenas linhas novas: são acrescentadas ao .CSV de uma só vez, no próprio arquivo. O gerenciador de versões
+        # só aceita o .CSV quando ele para de mudar e as exportações leem apenas o tamanho que fixaram (utils.export)
+        with open(new_path, 'rb') as source, open(output, 'ab') as target:
+            source.readline()   # cabeçalho
+            shutil.copyfileobj(source, target)
+
+    elif fresh and os.path.exists(output):
+        os.remove(output)
+
+    if os.path.exists(new_path):
+        os.remove(new_path)
+
+    save_state(output, state, keys)
+
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Atualiza o dataset limpo a partir dos arquivos brutos')
+    parser.add_argument('raw', nargs='*', help=f'arquivos brutos (padrão: todos os .csv em {RAW_DIR})')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='caminho do .CSV limpo')
+    parser.add_argument('--full', action='store_true', help='ignora o estado salvo e reprocessa tudo')
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help='linhas por bloco')
+    args = parser.parse_args()
+
+    raw_paths = args.raw or sorted(glob.glob(os.path.join(RAW_DIR, '*.csv')))
+    summary = refresh(raw_paths, args.output, args.full, args.chunksize)
+
+    print(f"{summary['read']} linhas brutas lidas, {summary['written']} linhas novas e {summary['updated']} atualizadas em {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,463 @@
+# Imports
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.cube     import MEASURES, build_cube, load_cube
+from utils.cuisines import CuisineMap, load_cuisines
+from utils.shared   import load_arrays, save_arrays
+from utils.store    import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+EXTREMES_PATH = 'datasets/store/zomato.extremes.arrays'
+EXTREME_FIELDS = ['country', 'cuisines', 'rows', 'value', 'restaurant_id', 'restaurant_name']
+
+# Restaurantes extremos guardados por (país, culinária): (coluna, crescente)
+EXTREMES = [
+    ('votes', False),
+    ('aggregate_rating', False),
+    ('aggregate_rating', True),
+    ('average_cost_for_two', False)
+]
+
+class Queries:
+    """ Respostas às perguntas de negócio do notebook a partir do cubo de agregados, em arrays do numpy.
+        Todas as consultas aceitam filtros de países e culinárias (None não restringe) e percorrem apenas as
+        linhas do cubo, nunca o dataset. Empates são resolvidos pelo nome (cidade, país ou culinária) em ordem
+        alfabética e, nos restaurantes, pelo menor restaurant_id.
+        Um restaurante conta em todas as suas culinárias: o filtro de culinárias seleciona os restaurantes com pelo menos
+        uma delas, e agrupamentos e contagens de culinárias usam as linhas do cubo repetidas para cada culinária da lista
+    """
+
+    def __init__(self, df, cube=None, cuisines=None, extremes=None):
+        cube = build_cube(df) if cube is None else cube
+
+        self.names = {}
+        self.codes = {}
+
+        for column in ['country', 'city']:
+            values = pd.Categorical(cube[column])
+            self.names[column] = np.asarray(values.categories, dtype=object)
+            self.codes[column] = values.codes.astype(np.int64)
+
+        self.measures = {measure: cube[measure].to_numpy(dtype=np.float64) for measure in MEASURES}
+
+        # Linhas do cubo repetidas para cada culinária da sua lista; 'row' aponta para a linha do cubo
+        combinations = CuisineMap(cube['cuisines'])
+        self.names['cuisines'] = combinations.names
+        self.exploded = {
+            'country': combinations.explode(self.codes['country']),
+            'city': combinations.explode(self.codes['city']),
+            'cuisines': combinations.codes.astype(np.int64),
+            'row': combinations.restaurant.astype(np.int64)
+        }
+
+        self.extremes = self.build_extremes(df, cuisines) if extremes is None else extremes
+
+    def build_extremes(self, df, cuisines=None):
+        """ Esta função tem a responsabilidade de guardar, para cada grupo (país, culinária), o melhor restaurante de cada critério.
+            É a única parte das consultas que percorre o dataset, então é construída uma única vez para todos os workers (load_queries)
+
+            Input: df (DataFrame), cuisines (CuisineMap - opcional)
+            Output: dict ((coluna, crescente) -> dict de ndarray)
+        """
+        cuisines = CuisineMap(df['cuisines']) if cuisines is None else cuisines
+
+        # Para cada grupo (país, culinária), a linha do melhor restaurante de cada critério. O melhor de uma culinária é o melhor
+        # entre os melhores de cada (país, lista de culinárias) que a contém, então só esses candidatos são repetidos por culinária
+        country = pd.Categorical(df['country'], categories=self.names['country']).codes.astype(np.int64)
+        combination = df['cuisines'].astype('category').cat.codes.to_numpy().astype(np.int64)
+        combination_group = country * (combination.max(initial=0) + 1) + combination
+        code = np.searchsorted(self.names['cuisines'], cuisines.names).astype(np.int64)
+        restaurant_id = df['restaurant_id'].to_numpy()
+
+        extremes = {}
+
+        for column, ascending in EXTREMES:
+            value = df[column].to_numpy(dtype=np.float64)
+            key = value if ascending else -value
+            order = np.lexsort((restaurant_id, key))
+            _, first = np.unique(combination_group[order], return_index=True)
+
+            candidates, cuisine = cuisines.pairs(order[first])
+            group = country[candidates] * len(self.names['cuisines']) + code[cuisine]
+            ranked = np.lexsort((restaurant_id[candidates], key[candidates], group))
+            first = ranked[np.flatnonzero(np.diff(group[ranked], prepend=-1))]
+            rows = candidates[first]
+
+            extremes[(column, ascending)] = {
+                'country': country[rows],
+                'cuisines': code[cuisine[first]],
+                'rows': rows,
+                'value': value[rows],
+                'restaurant_id': restaurant_id[rows],
+                'restaurant_name': df['restaurant_name'].iloc[rows].to_numpy(dtype=object)
+            }
+
+        return extremes
+
+    def wanted(self, column, values):
+        """ Esta função tem a responsabilidade de converter os valores de um filtro em uma máscara sobre os códigos da dimensão
+
+            Input: column (str), values (list ou None)
+            Output: ndarray ou None
+        """
+        if values is None:
+            return None
+
+        return np.isin(self.names[column], list(values))
+
+    def mask(self, countries=None, cuisines=None, codes=None):
+        """ Esta função tem a responsabilidade de selecionar as linhas do cubo (ou de outra tabela de códigos) dos filtros.
+            Nas linhas do cubo, que têm uma lista de culinárias, basta uma das culinárias escolhidas
+
+            Input: countries (list - opcional), cuisines (list - opcional), codes (dict - opcional)
+            Output: ndarray
+        """
+        codes = self.codes if codes is None else codes
+        mask = np.ones(len(codes['country']), dtype=bool)
+
+        for column, values in [('country', countries), ('cuisines', cuisines)]:
+            wanted = self.wanted(column, values)
+
+            if wanted is None:
+                continue
+
+            if column in codes:
+                mask &= wanted[codes[column]]
+
+            else:
+                mask &= np.bincount(self.exploded['row'][wanted[self.exploded['cuisines']]], minlength=len(mask)) > 0
+
+        return mask
+
+    def table(self, *columns):
+        """ Esta função tem a responsabilidade de escolher a tabela de uma consulta: o cubo ou, quando a culinária é
+            agrupada ou contada, o cubo repetido por culinária
+
+            Input: columns (str)
+            Output: tuple (dict de códigos, ndarray de linhas do cubo ou None)
+        """
+        if 'cuisines' in columns:
+            return self.exploded, self.exploded['row']
+
+        return self.codes, None
+
+    def values(self, measure, rows=None):
+        """ Esta função tem a responsabilidade de devolver uma medida nas linhas de uma tabela
+
+            Input: measure (str), rows (ndarray - opcional)
+            Output: ndarray
+        """
+        return self.measures[measure] if rows is None else self.measures[measure][rows]
+
+    def total(self, measure, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de somar uma medida nos filtros
+
+            Input: measure (str), countries (list - opcional), cuisines (list - opcional)
+            Output: float
+        """
+        return self.measures[measure][self.mask(countries, cuisines)].sum()
+
+    def count(self, column, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de contar os valores distintos de uma dimensão nos filtros
+
+            Input: column (str), countries (list - opcional), cuisines (list - opcional)
+            Output: int
+        """
+        codes, _ = self.table(column)
+        present = np.bincount(codes[column][self.mask(countries, cuisines, codes)], minlength=len(self.names[column]))
+
+        return int(np.count_nonzero(present))
+
+    def group(self, by, measure, countries=None, cuisines=None, how='sum'):
+        """ Esta função tem a responsabilidade de agregar uma medida por uma dimensão nos filtros.
+            how: 'sum' (soma), 'mean' (média por restaurante) ou 'distinct' (valores distintos da dimensão measure)
+
+            Input: by (str), measure (str), countries (list - opcional), cuisines (list - opcional), how (str)
+            Output: Series (indexada pelos nomes, apenas os grupos presentes nos filtros)
+        """
+        table, rows = self.table(by, measure if how == 'distinct' else by)
+        mask = self.mask(countries, cuisines, table)
+        codes = table[by][mask]
+        size = len(self.names[by])
+
+        if how == 'distinct':
+            other = table[measure][mask]
+            pairs = np.unique(codes * len(self.names[measure]) + other)
+            values = np.bincount(pairs // len(self.names[measure]), minlength=size).astype(np.float64)
+
+        else:
+            values = np.bincount(codes, self.values(measure, rows)[mask], minlength=size)
+
+            if how == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = values / np.bincount(codes, self.values('restaurants', rows)[mask], minlength=size)
+
+        present = np.bincount(codes, minlength=size) > 0
+
+        return pd.Series(values[present], index=self.names[by][present], name=measure)
+
+    def leader(self, by, measure, countries=None, cuisines=None, how='sum', ascending=False):
+        """ Esta função tem a responsabilidade de devolver o nome do grupo com o maior (ou menor) valor agregado
+
+            Input: by (str), measure (str), countries (list - opcional), cuisines (list - opcional), how (str), ascending (bool)
+            Output: str ou None
+        """
+        grouped = self.group(by, measure, countries, cuisines, how)
+
+        # Como no notebook, que filtra as linhas antes de agrupar: grupos sem nenhum restaurante contado não concorrem
+        if how == 'sum':
+            grouped = grouped.loc[grouped > 0]
+
+        if grouped.empty:
+            return None
+
+        # Os nomes já estão em ordem alfabética: argmax/argmin devolvem o primeiro empatado
+        return grouped.index[grouped.to_numpy().argmin() if ascending else grouped.to_numpy().argmax()]
+
+    def best(self, column, ascending=False, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de escolher, entre os extremos dos grupos (país, culinária) dos filtros,
+            o restaurante com o maior (ou menor) valor de uma coluna, desempatando pelo menor restaurant_id
+
+            Input: column (str), ascending (bool), countries (list - opcional), cuisines (list - opcional)
+            Output: int ou None (posição nos extremos)
+        """
+        extremes = self.extremes[(column, ascending)]
+        candidates = np.flatnonzero(self.mask(countries, cuisines, extremes))
+
+        if len(candidates) == 0:
+            return None
+
+        value = extremes['value'][candidates]
+
+        return int(candidates[np.lexsort((extremes['restaurant_id'][candidates], value if ascending else -value))[0]])
+
+    def restaurant(self, column, ascending=False, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de devolver a posição no dataset do restaurante com o maior (ou menor) valor de uma coluna
+
+            Input: column (str), ascending (bool), countries (list - opcional), cuisines (list - opcional)
+            Output: int ou None
+        """
+        best = self.best(column, ascending, countries, cuisines)
+
+        return None if best is None else int(self.extremes[(column, ascending)]['rows'][best])
+
+    def restaurant_name(self, column, ascending=False, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de devolver o nome do restaurante com o maior (ou menor) valor de uma coluna
+
+            Input: column (str), ascending (bool), countries (list - opcional), cuisines (list - opcional)
+            Output: str ou None
+        """
+        best = self.best(column, ascending, countries, cuisines)
+
+        return None if best is None else self.extremes[(column, ascending)]['restaurant_name'][best]
+
+    def split(self, measure, flag, countries=None, cuisines=None):
+        """ Esta função tem a responsabilidade de comparar a média de uma medida entre os restaurantes com e sem uma característica
+            (ex.: avaliações dos que aceitam ou não pedidos online)
+
+            Input: measure (str), flag (str), countries (list - opcional), cuisines (list - opcional)
+            Output: Series (índice 0 = sem a característica, 1 = com)
+        """
+        mask = self.mask(countries, cuisines)
+        restaurants = self.measures['restaurants'][mask].sum()
+        flagged = self.measures[flag][mask].sum()
+        total = self.measures[measure][mask].sum()
+        flagged_total = self.measures[f'{measure}_{flag}'][mask].sum()
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = [(total - flagged_total) / (restaurants - flagged), flagged_total / flagged]
+
+        return pd.Series(means, index=[0, 1], name=measure)
+
+    # ------------------------------- Geral
+
+    def count_restaurants(self, countries=None, cuisines=None):
+        """ Quantos restaurantes únicos estão registrados? """
+        return int(self.total('restaurants', countries, cuisines))
+
+    def count_countries(self, countries=None, cuisines=None):
+        """ Quantos países únicos estão registrados? """
+        return self.count('country', countries, cuisines)
+
+    def count_cities(self, countries=None, cuisines=None):
+        """ Quantas cidades únicas estão registradas? """
+        return self.count('city', countries, cuisines)
+
+    def total_votes(self, countries=None, cuisines=None):
+        """ Qual o total de avaliações feitas? """
+        return int(self.total('votes', countries, cuisines))
+
+    def count_cuisines(self, countries=None, cuisines=None):
+        """ Qual o total de tipos de culinária registrados? """
+        return self.count('cuisines', countries, cuisines)
+
+    # ------------------------------- País
+
+    def country_most_cities(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui mais cidades registradas? """
+        return self.leader('country', 'city', countries, cuisines, 'distinct')
+
+    def country_most_restaurants(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui mais restaurantes registrados? """
+        return self.leader('country', 'restaurants', countries, cuisines)
+
+    def country_most_gourmet(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui mais restaurantes com o nível de preço igual a 4 registrados? """
+        return self.leader('country', 'gourmet', countries, cuisines)
+
+    def country_most_cuisines(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui a maior quantidade de tipos de culinária distintos? """
+        return self.leader('country', 'cuisines', countries, cuisines, 'distinct')
+
+    def country_most_votes(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui a maior quantidade de avaliações feitas? """
+        return self.leader('country', 'votes', countries, cuisines)
+
+    def country_most_delivering(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui a maior quantidade de restaurantes que fazem entrega? """
+        return self.leader('country', 'delivering', countries, cuisines)
+
+    def country_most_booking(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui a maior quantidade de restaurantes que aceitam reservas? """
+        return self.leader('country', 'booking', countries, cuisines)
+
+    def country_most_mean_votes(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui, na média, a maior quantidade de avaliações registrada? """
+        return self.leader('country', 'votes', countries, cuisines, 'mean')
+
+    def country_best_rating(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui, na média, a maior nota média registrada? """
+        return self.leader('country', 'rating', countries, cuisines, 'mean')
+
+    def country_worst_rating(self, countries=None, cuisines=None):
+        """ Qual o nome do país que possui, na média, a menor nota média registrada? """
+        return self.leader('country', 'rating', countries, cuisines, 'mean', ascending=True)
+
+    def mean_cost_by_country(self, countries=None, cuisines=None):
+        """ Qual a média de preço de um prato para dois por país? """
+        return self.group('country', 'cost', countries, cuisines, 'mean').sort_values(ascending=False)
+
+    def mean_cost_usd_by_country(self, countries=None, cuisines=None):
+        """ Qual a média de preço de um prato para dois por país, em dólares? """
+        return self.group('country', 'cost_usd', countries, cuisines, 'mean').sort_values(ascending=False)
+
+    # ------------------------------- Cidade
+
+    def city_most_restaurants(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui mais restaurantes registrados? """
+        return self.leader('city', 'restaurants', countries, cuisines)
+
+    def city_most_rating_high(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui mais restaurantes com nota média acima de 4? """
+        return self.leader('city', 'rating_high', countries, cuisines)
+
+    def city_most_rating_low(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui mais restaurantes com nota média abaixo de 2.5? """
+        return self.leader('city', 'rating_low', countries, cuisines)
+
+    def city_highest_cost(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui o maior valor médio de um prato para dois? """
+        return self.leader('city', 'cost', countries, cuisines, 'mean')
+
+    def city_most_cuisines(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui a maior quantidade de tipos de culinária distintas? """
+        return self.leader('city', 'cuisines', countries, cuisines, 'distinct')
+
+    def city_most_booking(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui a maior quantidade de restaurantes que fazem reservas? """
+        return self.leader('city', 'booking', countries, cuisines)
+
+    def city_most_delivering(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui a maior quantidade de restaurantes que fazem entregas? """
+        return self.leader('city', 'delivering', countries, cuisines)
+
+    def city_most_online(self, countries=None, cuisines=None):
+        """ Qual o nome da cidade que possui a maior quantidade de restaurantes que aceitam pedidos online? """
+        return self.leader('city', 'online', countries, cuisines)
+
+    # ------------------------------- Restaurantes
+
+    def restaurant_most_votes(self, countries=None, cuisines=None):
+        """ Qual o nome do restaurante que possui a maior quantidade de avaliações? """
+        return self.restaurant_name('votes', False, countries, cuisines)
+
+    def restaurant_best_rating(self, countries=None, cuisines=None):
+        """ Qual o nome do restaurante com a maior nota média? (com cuisines: o melhor daquele tipo de culinária) """
+        return self.restaurant_name('aggregate_rating', False, countries, cuisines)
+
+    def restaurant_worst_rating(self, countries=None, cuisines=None):
+        """ Qual o nome do restaurante com a menor nota média? (com cuisines: o pior daquele tipo de culinária) """
+        return self.restaurant_name('aggregate_rating', True, countries, cuisines)
+
+    def restaurant_highest_cost(self, countries=None, cuisines=None):
+        """ Qual o nome do restaurante que possui o maior valor de um prato para duas pessoas? """
+        return self.restaurant_name('average_cost_for_two', False, countries, cuisines)
+
+    def mean_votes_by_online(self, countries=None, cuisines=None):
+        """ Os restaurantes que aceitam pedido online são também, na média, os que mais possuem avaliações registradas? """
+        return self.split('votes', 'online', countries, cuisines)
+
+    def mean_cost_by_booking(self, countries=None, cuisines=None):
+        """ Os restaurantes que fazem reservas são também, na média, os que possuem o maior valor médio de um prato para duas pessoas? """
+        return self.split('cost', 'booking', countries, cuisines)
+
+    def mean_cost_by_cuisine(self, countries=None, cuisines=None):
+        """ Qual o valor médio de um prato para duas pessoas de cada tipo de culinária? (ex.: japonesa x BBQ nos Estados Unidos) """
+        return self.group('cuisines', 'cost', countries, cuisines, 'mean').sort_values(ascending=False)
+
+    # ------------------------------- Tipos de culinária
+
+    def cuisine_highest_cost(self, countries=None, cuisines=None):
+        """ Qual o tipo de culinária que possui o maior valor médio de um prato para duas pessoas? """
+        return self.leader('cuisines', 'cost', countries, cuisines, 'mean')
+
+    def cuisine_best_rating(self, countries=None, cuisines=None):
+        """ Qual o tipo de culinária que possui a maior nota média? """
+        return self.leader('cuisines', 'rating', countries, cuisines, 'mean')
+
+    def cuisine_most_online_delivering(self, countries=None, cuisines=None):
+        """ Qual o tipo de culinária que possui mais restaurantes que aceitam pedidos online e fazem entregas? """
+        return self.leader('cuisines', 'online_delivering', countries, cuisines)
+
+def save_extremes(extremes, path=EXTREMES_PATH):
+    """ Esta função tem a responsabilidade de gravar os restaurantes extremos ao lado do arquivo colunar, com troca atômica
+
+        Input: extremes (dict), path (str)
+        Output: str
+    """
+    arrays = {}
+
+    for (column, ascending), fields in extremes.items():
+        for field in EXTREME_FIELDS:
+            arrays[f'{column}.{int(ascending)}.{field}'] = fields[field].astype(str) if field == 'restaurant_name' else fields[field]
+
+    return save_arrays(path, arrays)
+
+def load_extremes(path=EXTREMES_PATH):
+    """ Esta função tem a responsabilidade de abrir os restaurantes extremos gravados com memory-map (somente leitura,
+        compartilhados entre os workers)
+
+        Input: path (str)
+        Output: dict
+    """
+    arrays = load_arrays(path)
+
+    return {
+        (column, ascending): {field: arrays[f'{column}.{int(ascending)}.{field}'].astype(object) if field == 'restaurant_name'
+                              else arrays[f'{column}.{int(ascending)}.{field}'] for field in EXTREME_FIELDS}
+        for column, ascending in EXTREMES
+    }
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_queries(path=CSV_PATH, version=0, extremes_path=EXTREMES_PATH):
+    """ Esta função tem a responsabilidade de preparar as consultas uma única vez por versão do dataset. Os restaurantes
+        extremos são calculados uma única vez para todos os workers, recalculados apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), extremes_path (str)
+        Output: Queries
+    """
+    df, cube, cuisines = load_data(path, version), load_cube(path, version), load_cuisines(path, version)
+    publish(path, extremes_path, lambda target: save_extremes(Queries(df, cube, cuisines).extremes, target))
+
+    return Queries(df, cube, cuisines, load_extremes(extremes_path))
@@ -0,0 +1,277 @@
+# Imports
+import re
+import unicodedata
+
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.index           import contains
+from utils.instrumentation import timed
+from utils.shared          import load_arrays, save_arrays
+from utils.store           import CSV_PATH, LIVE_VERSIONS, publish
+
+SEARCH_PATH = 'datasets/store/zomato.search.arrays'
+SEARCH_FIELDS = ['restaurant_name', 'address', 'locality', 'locality_verbose']
+SEARCH_BATCH = 100_000    # documentos por bloco na construção, para limitar a memória
+SEARCH_MIN_MATCH = 0.75   # fração mínima dos trigramas da busca que um restaurante precisa conter
+
+# Letras que a decomposição Unicode (NFKD) não separa do acento
+FOLD = str.maketrans({'ı': 'i', 'ß': 'ss', 'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'đ': 'd', 'ł': 'l'})
+
+def fold(text):
+    """ Esta função tem a responsabilidade de normalizar um texto para a busca: sem acentos, minúsculo e com
+        pontuação e espaços repetidos trocados por um único espaço ('Las Piñas City' -> 'las pinas city')
+
+        Input: text (str)
+        Output: str
+    """
+    text = re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFKD', text)).lower()
+
+    return re.sub(r'[\W_]+', ' ', text.translate(FOLD)).strip()
+
+def trigrams(texts):
+    """ Esta função tem a responsabilidade de extrair os pares (trigrama, documento) distintos de uma lista de textos.
+        Cada texto ganha um espaço em cada ponta, para que o começo e o fim das palavras também virem trigramas,
+        e cada trigrama é codificado em um inteiro com os três code points (21 bits cada)
+
+        Input: texts (list de str)
+        Output: tuple (ndarray de trigramas, ndarray de documentos), ordenados por trigrama e documento
+    """
+    lengths = np.array([len(text) + 2 for text in texts], dtype='int64')
+    codes = np.frombuffer(''.join(f' {text} ' for text in texts).encode('utf-32-le'), dtype=np.uint32).astype('int64')
+    documents = np.repeat(np.arange(len(texts), dtype='int64'), lengths)
+
+    # Apenas os trigramas que começam e terminam no mesmo texto
+    valid = documents[:-2] == documents[2:]
+    keys = ((codes[:-2] << 42) | (codes[1:-1] << 21) | codes[2:])[valid]
+    documents = documents[:-2][valid]
+
+    # Os documentos já estão em ordem crescente: a ordenação estável só pelo trigrama basta
+    order = np.argsort(keys, kind='stable')
+    keys, documents = keys[order], documents[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (documents[1:] != documents[:-1])
+
+    return keys[first], documents[first]
+
+def query_trigrams(text):
+    """ Esta função tem a responsabilidade de extrair os trigramas distintos de uma busca já normalizada.
+        A busca não ganha espaços nas pontas: ela pode ser parte de uma palavra ('cafe' em 'Nescafe')
+        ou uma palavra pela metade enquanto é digitada. Buscas com menos de 3 caracteres não têm trigramas
+
+        Input: text (str)
+        Output: ndarray
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype('int64')
+
+    return np.unique((codes[:-2] << 42) | (codes[1:-1] << 21) | codes[2:])
+
+class Postings:
+    """ Índice invertido de um campo: para cada trigrama, a lista ordenada dos documentos que o contêm (formato CSR) """
+
+    def __init__(self, keys, offsets, documents):
+        self.keys = keys
+        self.offsets = offsets
+        self.documents = documents
+
+    @classmethod
+    def build(cls, texts, batch=SEARCH_BATCH):
+        """ Esta função tem a responsabilidade de construir o índice de um campo em blocos de documentos e em duas passadas:
+            a primeira conta os documentos de cada trigrama e a segunda preenche as listas já nas posições finais,
+            então a memória de pico é a do próprio índice mais um bloco
+
+            Input: texts (list de str), batch (int)
+            Output: Postings
+        """
+        starts = range(0, len(texts), batch)
+
+        # Passada 1: vocabulário e tamanho das listas
+        counted = [np.unique(trigrams(texts[start:start + batch])[0], return_counts=True) for start in starts]
+        keys = np.concatenate([np.empty(0, dtype='int64')] + [keys for keys, _ in counted])
+        vocabulary, inverse = np.unique(keys, return_inverse=True)
+        sizes = np.bincount(inverse, weights=np.concatenate([np.empty(0, dtype='int64')] + [counts for _, counts in counted]), minlength=len(vocabulary)).astype('int64')
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype('int64')
+
+        # Passada 2: os blocos estão em ordem de documento, então cada lista sai ordenada
+        documents = np.empty(offsets[-1], dtype='int32')
+        filled = offsets[:-1].copy()
+
+        for start in starts:
+            keys, batch_documents = trigrams(texts[start:start + batch])
+            ids = np.searchsorted(vocabulary, keys)
+            rank = np.arange(len(ids)) - np.searchsorted(ids, ids)
+            documents[filled[ids] + rank] = batch_documents + start
+            filled += np.bincount(ids, minlength=len(vocabulary))
+
+        return cls(vocabulary, offsets, documents)
+
+    def lists(self, grams):
+        """ Esta função tem a responsabilidade de devolver as listas de documentos dos trigramas que existem no índice
+
+            Input: grams (ndarray)
+            Output: list de ndarray
+        """
+        if len(self.keys) == 0:
+            return []
+
+        positions = np.searchsorted(self.keys, grams).clip(0, len(self.keys) - 1)
+
+        return [self.documents[self.offsets[position]:self.offsets[position + 1]] for position in positions[self.keys[positions] == grams].tolist()]
+
+    def matches(self, grams, documents):
+        """ Esta função tem a responsabilidade de contar quantos dos trigramas cada um dos documentos contém
+
+            Input: grams (ndarray), documents (ndarray - ordenado)
+            Output: ndarray
+        """
+        counts = np.zeros(len(documents), dtype='int64')
+
+        for postings in self.lists(grams):
+            positions = np.searchsorted(postings, documents).clip(0, len(postings) - 1)
+            counts += postings[positions] == documents
+
+        return counts
+
+    def search(self, grams, minimum):
+        """ Esta função tem a responsabilidade de encontrar os documentos com pelo menos 'minimum' dos trigramas.
+            Um documento assim aparece em pelo menos uma das (listas - minimum + 1) listas mais curtas, então só elas
+            geram candidatos; as listas longas (trigramas comuns) são apenas consultadas com busca binária
+
+            Input: grams (ndarray), minimum (int)
+            Output: tuple (ndarray de documentos, ndarray de contagens)
+        """
+        lists = sorted(self.lists(grams), key=len)
+
+        if len(lists) < minimum or minimum < 1:
+            return np.empty(0, dtype='int32'), np.empty(0, dtype='int64')
+
+        candidates = np.unique(np.concatenate(lists[:len(lists) - minimum + 1]))
+        counts = self.matches(grams, candidates)
+        keep = counts >= minimum
+
+        return candidates[keep], counts[keep]
+
+class SearchIndex:
+    """ Busca textual por nome, endereço e bairro: índices invertidos de trigramas sobre os textos normalizados
+        (fold) de cada restaurante distinto. Os restaurantes são ordenados pela quantidade de trigramas da busca
+        encontrados no texto completo e, no empate, pela quantidade encontrada no nome
+    """
+
+    def __init__(self, text, name, document_of_row, rows=None, row_offsets=None):
+        self.text = text
+        self.name = name
+        self.document_of_row = document_of_row
+
+        # Linhas de cada documento (CSR): restaurantes com os mesmos textos compartilham o documento
+        if rows is None:
+            documents = int(document_of_row.max()) + 1 if len(document_of_row) else 0
+            rows = np.argsort(document_of_row, kind='stable').astype('int32')
+            row_offsets = np.searchsorted(document_of_row[rows], np.arange(documents + 1))
+
+        self.rows = rows
+        self.row_offsets = row_offsets
+
+    @classmethod
+    def build(cls, df):
+        """ Esta função tem a responsabilidade de construir o índice a partir das colunas de texto do dataset
+
+            Input: df (DataFrame)
+            Output: SearchIndex
+        """
+        fields = df.loc[:, SEARCH_FIELDS].astype(str)
+        document_of_row, documents = pd.MultiIndex.from_frame(fields).factorize()
+        documents = documents.to_frame(index=False, name=SEARCH_FIELDS)
+
+        # Cada valor distinto de cada campo é normalizado uma única vez (bairros e endereços se repetem muito)
+        folded = {}
+
+        for field in SEARCH_FIELDS:
+            codes, uniques = pd.factorize(documents[field])
+            folded[field] = np.array([fold(value) for value in uniques], dtype=object)[codes].tolist()
+
+        text = [' '.join(filter(None, values)) for values in zip(*folded.values())]
+
+        return cls(Postings.build(text), Postings.build(folded['restaurant_name']), document_of_row.astype('int32'))
+
+    def save(self, path=SEARCH_PATH):
+        """ Esta função tem a responsabilidade de gravar o índice ao lado do arquivo colunar, com troca atômica
+
+            Input: path (str)
+            Output: str
+        """
+        arrays = {f'{field}_{part}': getattr(getattr(self, field), part) for field in ['text', 'name'] for part in ['keys', 'offsets', 'documents']}
+
+        return save_arrays(path, dict(arrays, document_of_row=self.document_of_row, rows=self.rows, row_offsets=self.row_offsets))
+
+    @classmethod
+    def load(cls, path=SEARCH_PATH):
+        """ Esta função tem a responsabilidade de abrir o índice gravado com memory-map (somente leitura, compartilhado entre os workers)
+
+            Input: path (str)
+            Output: SearchIndex
+        """
+        arrays = load_arrays(path)
+        postings = {field: Postings(*(arrays[f'{field}_{part}'] for part in ['keys', 'offsets', 'documents'])) for field in ['text', 'name']}
+
+        return cls(postings['text'], postings['name'], arrays['document_of_row'], arrays['rows'], arrays['row_offsets'])
+
+    @timed('search', rows=len)
+    def search(self, query, limit=20, bitmap=None, min_match=SEARCH_MIN_MATCH):
+        """ Esta função tem a responsabilidade de devolver as posições dos restaurantes que correspondem à busca,
+            da maior para a menor nota (empates pela posição) e apenas entre as linhas do bitmap dos filtros
+
+            Input: query (str), limit (int ou None), bitmap (ndarray - opcional), min_match (float)
+            Output: ndarray
+        """
+        grams = query_trigrams(fold(query))
+
+        if len(grams) == 0:
+            return np.empty(0, dtype='int64')
+
+        documents, matched = self.text.search(grams, int(np.ceil(min_match * len(grams))))
+        in_name = self.name.matches(grams, documents)
+
+        # Primeiro os que contêm mais trigramas no texto; entre eles, os que contêm mais no nome
+        scores = matched * (len(grams) + 1) + in_name
+
+        # Percorre as notas da maior para a menor e para assim que tiver linhas suficientes
+        result = []
+        found = 0
+
+        for score in np.unique(scores)[::-1]:
+            group = documents[scores == score]
+            starts, ends = self.row_offsets[group], self.row_offsets[group + 1]
+            rows = np.sort(np.concatenate([self.rows[start:end] for start, end in zip(starts.tolist(), ends.tolist())]).astype('int64'))
+
+            if bitmap is not None:
+                rows = rows[contains(bitmap, rows)]
+
+            result.append(rows)
+            found += len(rows)
+
+            if limit is not None and found >= limit:
+                break
+
+        return np.concatenate(result)[:limit] if result else np.empty(0, dtype='int64')
+
+def build_search(csv_path=CSV_PATH, search_path=SEARCH_PATH):
+    """ Esta função tem a responsabilidade de construir e gravar o índice de busca a partir do .CSV limpo
+        (lendo apenas as colunas de texto)
+
+        Input: csv_path (str), search_path (str)
+        Output: str
+    """
+    return SearchIndex.build(pd.read_csv(csv_path, usecols=SEARCH_FIELDS, dtype=str, keep_default_na=False)).save(search_path)
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_search(path=CSV_PATH, version=0, search_path=SEARCH_PATH):
+    """ Esta função tem a responsabilidade de carregar o índice de busca uma única vez por versão do dataset,
+        reconstruindo-o apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), search_path (str)
+        Output: SearchIndex
+    """
+    publish(path, search_path, lambda target: build_search(path, target))
+
+    return SearchIndex.load(search_path)
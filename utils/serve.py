@@ -0,0 +1,30 @@
+""" Inicia o dashboard aquecendo em segundo plano as bibliotecas e o arquivo colunar enquanto o servidor sobe,
+    com o pool de processos que monta os mapas já iniciado
+
+    Uso: python -m utils.serve [opções do streamlit run]
+"""
+# Imports
+import sys
+
+from streamlit.web import cli
+
+from utils.executor import PROCESSES, start_process_pool
+from utils.maps     import warm_worker
+from utils.warmup   import start_warmup
+
+MAIN_PAGE = '1_📊_Main_Page.py'
+
+def main():
+    start_warmup()
+
+    # Cada envio inicia um processo, que já importa o folium e carrega os dados do mapa
+    pool = start_process_pool()
+
+    for _ in range(PROCESSES if pool is not None else 0):
+        pool.submit(warm_worker)
+
+    sys.argv = ['streamlit', 'run', MAIN_PAGE, *sys.argv[1:]]
+    sys.exit(cli.main())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+""" Processo carregador dos dados compartilhados: publica o arquivo colunar, os índices por linha e as estruturas das
+    consultas (cubos, top-K, extremos) do dataset limpo em arquivos lidos com memory-map. Cada worker do dashboard abre
+    os mesmos arquivos somente para leitura e as páginas ficam no cache do sistema, uma única vez para todos os processos
+
+    Uso: python -m utils.shared [--watch SEGUNDOS]
+"""
+# Imports
+import argparse
+import fcntl
+import json
+import mmap
+import os
+import time
+
+from contextlib import contextmanager
+
+import numpy as np
+
+ARRAYS_MAGIC = b'FZARRAYS'
+ARRAYS_ALIGN = 64   # alinhamento do início de cada vetor no arquivo, em bytes
+
+def save_arrays(path, arrays):
+    """ Esta função tem a responsabilidade de gravar vetores numéricos em um único arquivo, com troca atômica.
+        O arquivo tem um cabeçalho JSON (tipo, forma e posição de cada vetor) e os dados alinhados, prontos para memory-map
+
+        Input: path (str), arrays (dict - nome -> ndarray)
+        Output: str
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    offset = 0
+
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ARRAYS_ALIGN) * ARRAYS_ALIGN
+
+    header = json.dumps(layout).encode()
+    start = -(-(len(ARRAYS_MAGIC) + 8 + len(header)) // ARRAYS_ALIGN) * ARRAYS_ALIGN
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+
+    with open(tmp_path, 'wb') as file:
+        file.write(ARRAYS_MAGIC + len(header).to_bytes(8, 'little') + header)
+
+        for name, array in arrays.items():
+            file.seek(start + layout[name]['offset'])
+            file.write(array.tobytes())
+
+    os.replace(tmp_path, path)
+
+    return path
+
+def load_arrays(path):
+    """ Esta função tem a responsabilidade de abrir os vetores gravados por save_arrays com memory-map, sem cópia.
+        Os vetores são somente leitura e continuam válidos mesmo depois que o arquivo for substituído
+
+        Input: path (str)
+        Output: dict (nome -> ndarray)
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(ARRAYS_MAGIC)) != ARRAYS_MAGIC:
+            raise ValueError(f'{path} não é um arquivo de vetores compartilhados')
+
+        length = int.from_bytes(file.read(8), 'little')
+        layout = json.loads(file.read(length))
+        start = -(-(len(ARRAYS_MAGIC) + 8 + length) // ARRAYS_ALIGN) * ARRAYS_ALIGN
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+
+    for name, item in layout.items():
+        dtype, shape = np.dtype(item['dtype']), tuple(item['shape'])
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=start + item['offset']).reshape(shape)
+
+    return arrays
+
+@contextmanager
+def build_lock(path):
+    """ Esta função tem a responsabilidade de garantir que apenas um processo (ou thread) construa um arquivo por vez:
+        os demais esperam e, em seguida, encontram o arquivo pronto
+
+        Input: path (str - arquivo construído)
+        Output: None (gerenciador de contexto)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    with open(f'{path}.lock', 'a') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+        try:
+            yield
+
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+def build_shared(path):
+    """ Esta função tem a responsabilidade de publicar o arquivo colunar, todos os índices por linha, as estruturas das
+        consultas e as páginas pré-calculadas de um .CSV limpo (apenas os ausentes ou desatualizados)
+
+        Input: path (str)
+        Output: dict (arquivo -> segundos de construção)
+    """
+    from utils.cube      import CUBE_PATH, CUISINE_CUBE_PATH, build_cube, build_cuisine_cube, save_cube
+    from utils.cuisines  import CUISINES_PATH, CuisineMap
+    from utils.export    import DIGEST_PATH, save_digest
+    from utils.geo       import GEO_PATH, GeoIndex
+    from utils.index     import INDEX_PATH, BitmapIndex
+    from utils.maps      import GRID_PATH, build_grid, save_grid
+    from utils.queries   import EXTREMES_PATH, Queries, save_extremes
+    from utils.search    import SEARCH_PATH, build_search
+    from utils.snapshots import SNAPSHOTS, SNAPSHOTS_PATH, publish_snapshots
+    from utils.store     import STORE_PATH, build_store, publish, read_store
+    from utils.topk      import TOPK_PATH, TopK
+
+    seconds = {}
+
+    def timed_publish(target, build):
+        start = time.perf_counter()
+
+        if publish(path, target, build):
+            seconds[target] = time.perf_counter() - start
+
+    timed_publish(STORE_PATH, lambda target: build_store(path, target))
+    df = read_store(STORE_PATH)
+
+    timed_publish(SEARCH_PATH, lambda target: build_search(path, target))
+    timed_publish(CUISINES_PATH, lambda target: CuisineMap(df['cuisines']).save(target))
+    timed_publish(INDEX_PATH, lambda target: BitmapIndex(df, cuisines=CuisineMap.load(CUISINES_PATH)).save(target))
+    timed_publish(GEO_PATH, lambda target: GeoIndex(df).save(target))
+    timed_publish(GRID_PATH, lambda target: save_grid(build_grid(df), target))
+
+    # Estruturas das consultas que percorrem o dataset: construídas aqui, cada worker só abre os arquivos
+    timed_publish(CUBE_PATH, lambda target: save_cube(build_cube(df), target))
+    timed_publish(CUISINE_CUBE_PATH, lambda target: save_cube(build_cuisine_cube(read_store(CUBE_PATH)), target))
+    timed_publish(TOPK_PATH, lambda target: TopK(df, cuisines=CuisineMap.load(CUISINES_PATH)).save(target))
+    timed_publish(EXTREMES_PATH, lambda target: save_extremes(Queries(df, read_store(CUBE_PATH), CuisineMap.load(CUISINES_PATH)).extremes, target))
+    timed_publish(DIGEST_PATH, lambda target: save_digest(df, target))
+
+    # As páginas pré-calculadas dependem de todos os anteriores e também são reconstruídas quando as seleções ou o código mudam
+    if SNAPSHOTS:
+        start = time.perf_counter()
+
+        if publish_snapshots(path):
+            seconds[SNAPSHOTS_PATH] = time.perf_counter() - start
+
+    return seconds
+
+def watch_shared(path, interval=0):
+    """ Esta função tem a responsabilidade de publicar os dados compartilhados e, com um intervalo, publicá-los de novo
+        a cada mudança do .CSV. Como no utils.dataset, a mudança só é aceita quando o arquivo está igual em duas verificações seguidas
+
+        Input: path (str), interval (float - 0 publica uma vez e termina)
+        Output: None
+    """
+    from utils.dataset import signature
+
+    published = pending = None
+
+    while True:
+        current = signature(path)
+
+        if current is not None and current != published and (published is None or current == pending):
+            for target, seconds in build_shared(path).items():
+                print(f'{target}: {seconds:.1f} s', flush=True)
+
+            published = current
+
+        if interval <= 0:
+            return
+
+        pending = current
+        time.sleep(interval)
+
+def main():
+    from utils.store import CSV_PATH
+
+    parser = argparse.ArgumentParser(description='Publica os dados compartilhados pelos workers do dashboard')
+    parser.add_argument('--path', default=CSV_PATH, help='.CSV limpo')
+    parser.add_argument('--watch', type=float, default=0, help='segundos entre as verificações do .CSV (0 publica uma vez e termina)')
+    args = parser.parse_args()
+
+    watch_shared(args.path, args.watch)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# Imports
+import glob
+import hashlib
+import importlib.metadata
+import json
+import os
+import pickle
+import threading
+
+import streamlit as st
+
+from utils.cache           import selection_key
+from utils.instrumentation import count
+from utils.shared          import build_lock
+from utils.store           import CSV_PATH, LIVE_VERSIONS, publish
+from utils.views           import DEFAULT_COUNTRIES, DEFAULT_CUISINES, DEFAULT_RESTAURANTS, TOP_COLUMNS, best_by_cuisine, city_charts, country_charts, cuisine_charts
+
+SNAPSHOTS_PATH = 'datasets/store/zomato.snapshots.pkl'
+SNAPSHOTS = os.environ.get('FOME_ZERO_SNAPSHOTS', '1') != '0'   # 0 desliga as páginas pré-calculadas (tudo é calculado a cada rerun)
+
+# Seleções de países pré-calculadas: a padrão e as populares de FOME_ZERO_SNAPSHOT_SELECTIONS
+# (países separados por vírgula e seleções por ponto e vírgula, ex.: 'India;Brazil,United States of America')
+SNAPSHOT_SELECTIONS = [DEFAULT_COUNTRIES] + [[country.strip() for country in selection.split(',')] for selection in os.environ.get('FOME_ZERO_SNAPSHOT_SELECTIONS', '').split(';') if selection.strip()]
+
+# Bibliotecas que geram as figuras e o HTML do mapa guardados
+LIBRARIES = ['pandas', 'plotly', 'folium']
+
+def snapshots_fingerprint():
+    """ Esta função tem a responsabilidade de resumir tudo o que, além do .CSV, define as páginas pré-calculadas:
+        as seleções, as escolhas padrão das páginas, o código do pacote utils e as versões das bibliotecas
+
+        Input: None
+        Output: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([SNAPSHOT_SELECTIONS, DEFAULT_CUISINES, DEFAULT_RESTAURANTS, TOP_COLUMNS]).encode())
+
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as file:
+            digest.update(os.path.basename(path).encode() + file.read())
+
+    for library in LIBRARIES:
+        digest.update(f'{library}={importlib.metadata.version(library)}'.encode())
+
+    return digest.hexdigest()
+
+def read_fingerprint(snapshots_path=SNAPSHOTS_PATH):
+    """ Esta função tem a responsabilidade de ler a impressão digital gravada antes das páginas pré-calculadas, sem carregá-las
+
+        Input: snapshots_path (str)
+        Output: str ou None (arquivo ausente ou de um formato anterior)
+    """
+    try:
+        with open(snapshots_path, 'rb') as file:
+            fingerprint = pickle.load(file)
+
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+    return fingerprint if isinstance(fingerprint, str) else None
+
+def top_key(cuisines, n):
+    """ Esta função tem a responsabilidade de normalizar a seleção da tabela de melhores restaurantes em uma chave
+
+        Input: cuisines (list), n (int)
+        Output: tuple
+    """
+    return tuple(sorted(cuisines)), n
+
+def build_snapshots(path=CSV_PATH, version=0, snapshots_path=SNAPSHOTS_PATH):
+    """ Esta função tem a responsabilidade de pré-calcular o que as páginas exibem nas seleções pré-calculadas
+        (métricas, tabelas, figuras dos gráficos e o HTML do mapa) e gravar tudo ao lado do arquivo colunar, com troca atômica
+
+        Input: path (str), version (int), snapshots_path (str)
+        Output: str
+    """
+    from utils.backend import load_backend
+    from utils.maps    import map_html, use_grid
+
+    backend = load_backend(path, version)
+    snapshots = {}
+
+    for countries in SNAPSHOT_SELECTIONS:
+        key = selection_key(countries)
+        overview = backend.overview(countries)
+
+        # O mapa de marcadores só é usado (no modo automático) quando a seleção é pequena
+        maps = {} if use_grid('auto', overview['restaurants']) else {engine: map_html(countries, engine, path, version) for engine in ['fast', 'exact']}
+
+        snapshots[('main', key)] = {'overview': overview, 'maps': maps}
+        snapshots[('countries', key)] = {name: compute() for name, compute in country_charts(backend, countries, (path, version)).items()}
+        snapshots[('cities', key)] = {name: compute() for name, compute in city_charts(backend, countries, (path, version)).items()}
+        snapshots[('cuisines', key)] = dict(cuisine_charts(backend, countries, (path, version)), best=best_by_cuisine(backend, countries),
+                                            top={top_key(DEFAULT_CUISINES, DEFAULT_RESTAURANTS): backend.top(countries, DEFAULT_CUISINES, DEFAULT_RESTAURANTS, TOP_COLUMNS)})
+
+    os.makedirs(os.path.dirname(snapshots_path), exist_ok=True)
+    tmp_path = f'{snapshots_path}.tmp'
+
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(snapshots_fingerprint(), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(snapshots, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_path, snapshots_path)
+
+    return snapshots_path
+
+def publish_snapshots(path=CSV_PATH, version=0, snapshots_path=SNAPSHOTS_PATH):
+    """ Esta função tem a responsabilidade de garantir as páginas pré-calculadas atualizadas: reconstruídas quando o .CSV limpo
+        for mais novo ou quando tiverem sido geradas com outras seleções, outro código ou outras bibliotecas
+
+        Input: path (str), version (int), snapshots_path (str)
+        Output: bool (True se as páginas foram reconstruídas)
+    """
+    build = lambda target: build_snapshots(path, version, target)
+
+    if publish(path, snapshots_path, build):
+        return True
+
+    fingerprint = snapshots_fingerprint()
+
+    if read_fingerprint(snapshots_path) == fingerprint:
+        return False
+
+    # Como no publish, apenas um processo reconstrói; os demais encontram o arquivo pronto
+    with build_lock(snapshots_path):
+        if read_fingerprint(snapshots_path) == fingerprint:
+            return False
+
+        build(snapshots_path)
+
+    return True
+
+@st.cache_resource
+def get_snapshot_store():
+    """ Esta função tem a responsabilidade de criar o registro único do processo das versões com páginas pré-calculadas prontas
+
+        Input: None
+        Output: dict (trava e páginas por (path, versão))
+    """
+    return {'lock': threading.Lock(), 'versions': {}}
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_snapshots(path=CSV_PATH, version=0, snapshots_path=SNAPSHOTS_PATH):
+    """ Esta função tem a responsabilidade de carregar as páginas pré-calculadas uma única vez por versão do dataset,
+        reconstruindo-as apenas quando estiverem desatualizadas (publish_snapshots), e de registrá-las para as páginas.
+        Executada na construção da versão (aquecimento e troca de versão), nunca por um rerun
+
+        Input: path (str), version (int), snapshots_path (str)
+        Output: dict
+    """
+    publish_snapshots(path, version, snapshots_path)
+
+    with open(snapshots_path, 'rb') as file:
+        pickle.load(file)   # impressão digital
+        snapshots = pickle.load(file)
+
+    store = get_snapshot_store()
+
+    with store['lock']:
+        store['versions'][(path, version)] = snapshots
+
+        for key in [key for key in store['versions'] if key[0] == path and key[1] <= version - LIVE_VERSIONS]:
+            del store['versions'][key]
+
+    return snapshots
+
+def get_snapshot(path, version, page, countries):
+    """ Esta função tem a responsabilidade de devolver o que foi pré-calculado para uma página e seleção de países,
+        sem esperar: enquanto a versão ainda não tem as páginas prontas, ou fora das seleções pré-calculadas, devolve None
+        e a página calcula tudo normalmente. O resultado é compartilhado e deve ser tratado como somente leitura
+
+        Input: path (str), version (int), page (str), countries (list)
+        Output: dict ou None
+    """
+    if not SNAPSHOTS:
+        return None
+
+    snapshots = get_snapshot_store()['versions'].get((path, version)) or {}
+    snapshot = snapshots.get((page, selection_key(countries)))
+    count('cache_hits' if snapshot is not None else 'cache_misses', cache='snapshot')
+
+    return snapshot
@@ -0,0 +1,174 @@
+# Imports
+import os
+import threading
+
+import pandas    as pd
+import pyarrow   as pa
+import streamlit as st
+
+from pyarrow import feather
+
+from utils.shared import build_lock
+
+CSV_PATH = 'datasets/clean/zomato.csv'
+STORE_PATH = 'datasets/store/zomato.feather'
+LIVE_VERSIONS = 2   # versões do dataset mantidas pelos recursos do processo: a publicada e a seguinte, em construção (utils.dataset)
+
+# Links criados por este processo (pin_file) -> última versão do dataset que os usa
+_pins = {}
+_pins_lock = threading.Lock()
+
+# Tipos compactos de cada coluna do dataset limpo
+DTYPES = {
+    'restaurant_id': 'int32',
+    'restaurant_name': 'object',
+    'country': 'category',
+    'city': 'category',
+    'address': 'object',
+    'locality': 'object',
+    'locality_verbose': 'object',
+    'longitude': 'float32',
+    'latitude': 'float32',
+    'cuisines': 'category',
+    'average_cost_for_two': 'int32',
+    'currency': 'category',
+    'cost_for_two_usd': 'float64',   # em float32 os preços muito altos perdem os centavos (e até unidades)
+    'has_table_booking': 'int8',
+    'has_online_delivery': 'int8',
+    'is_delivering_now': 'int8',
+    'switch_to_order_menu': 'int8',
+    'price_type': 'category',
+    'aggregate_rating': 'float32',
+    'rating_color_name': 'category',
+    'rating_text': 'category',
+    'votes': 'int32',
+}
+
+# Textos lidos do arquivo colunar como strings do Arrow (sem converter cada valor em objeto Python)
+ARROW_TYPES = {pa.string(): pd.ArrowDtype(pa.string()), pa.large_string(): pd.ArrowDtype(pa.large_string())}
+
+def read_csv(path=CSV_PATH):
+    """ Esta função tem a responsabilidade de ler o .CSV limpo já com os tipos compactos
+
+        Input: path (str)
+        Output: DataFrame
+    """
+    return pd.read_csv(path, dtype=DTYPES)
+
+def build_store(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de converter o .CSV limpo para o formato colunar (Feather)
+
+        Input: csv_path (str), store_path (str)
+        Output: str
+    """
+    df = read_csv(csv_path)
+
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+
+    # Escrita em arquivo temporário e troca atômica, para que leitores nunca vejam um arquivo pela metade.
+    # Um único bloco por coluna permite ler as colunas numéricas direto do memory-map, sem cópia
+    tmp_path = f'{store_path}.tmp'
+    feather.write_feather(df, tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    os.replace(tmp_path, store_path)
+
+    return store_path
+
+def is_stale(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de verificar se o arquivo colunar está ausente ou desatualizado
+
+        Input: csv_path (str), store_path (str)
+        Output: bool
+    """
+    if not os.path.exists(store_path):
+        return True
+
+    return os.path.getmtime(store_path) < os.path.getmtime(csv_path)
+
+def publish(csv_path, target_path, build):
+    """ Esta função tem a responsabilidade de garantir um arquivo derivado do .CSV limpo (arquivo colunar ou índice) atualizado.
+        Com vários workers, apenas um constrói o arquivo; os demais esperam pela trava e encontram o arquivo pronto
+
+        Input: csv_path (str), target_path (str), build (callable - recebe target_path e grava o arquivo)
+        Output: bool (True se o arquivo foi construído)
+    """
+    if not is_stale(csv_path, target_path):
+        return False
+
+    with build_lock(target_path):
+        if not is_stale(csv_path, target_path):
+            return False
+
+        build(target_path)
+
+    return True
+
+def pin_file(path, version):
+    """ Esta função tem a responsabilidade de fixar o arquivo atual de uma versão do dataset em um link (hard link) nomeado
+        pela identidade do arquivo (inode e mtime), o mesmo em todos os processos. Abrindo o link, a versão continua lendo
+        o seu arquivo depois que uma reconstrução troca o principal. Apenas um processo cria cada link e só ele o apaga,
+        quando as versões que o usavam saem da memória (conexões e memory-maps abertos nele continuam válidos)
+
+        Input: path (str), version (int)
+        Output: str
+    """
+    # O arquivo é fixado primeiro em um nome temporário próprio: o nome do link é a identidade do que foi de fato fixado,
+    # mesmo que o principal seja trocado no meio do caminho
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    os.link(path, tmp_path)
+
+    try:
+        stat = os.stat(tmp_path)
+        pinned = f'{path}.{stat.st_ino}-{stat.st_mtime_ns}'
+
+        # O link é criado de forma atômica e exclusiva: se ele já existe (outro processo, outra versão), é o mesmo arquivo
+        try:
+            os.link(tmp_path, pinned)
+            created = True
+
+        except FileExistsError:
+            created = False
+
+    finally:
+        os.remove(tmp_path)
+
+    with _pins_lock:
+        if created or pinned in _pins:
+            _pins[pinned] = max(version, _pins.get(pinned, version))
+
+        stale = [name for name, last in _pins.items() if last <= version - LIVE_VERSIONS]
+
+        for name in stale:
+            del _pins[name]
+
+    for name in stale:
+        if os.path.lexists(name):
+            os.remove(name)
+
+    return pinned
+
+def read_store(store_path=STORE_PATH, columns=None):
+    """ Esta função tem a responsabilidade de ler o arquivo colunar (ou apenas algumas colunas) com memory-map.
+        Colunas numéricas (um bloco por coluna), de categorias (os códigos) e de texto (strings do Arrow) apontam para o
+        próprio arquivo, sem cópia: as páginas ficam no cache do sistema e são compartilhadas por todos os processos que
+        abrem o mesmo arquivo
+
+        Input: store_path (str), columns (list - opcional)
+        Output: DataFrame
+    """
+    table = feather.read_table(store_path, columns=columns, memory_map=True)
+
+    return table.to_pandas(split_blocks=True, types_mapper=ARROW_TYPES.get)
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_data(path=CSV_PATH, version=0, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de fazer a carga de dados a partir do arquivo colunar,
+        reconstruindo-o apenas quando o .CSV limpo for mais novo. O DataFrame é único no processo por versão do dataset
+        (sem cópia a cada rerun) e é somente leitura: as colunas apontam para o arquivo, compartilhado entre os workers.
+        Como o arquivo é trocado atomicamente, a reconstrução para uma versão nova não altera os DataFrames das versões anteriores
+
+        Input: path (str), version (int), store_path (str)
+        Output: DataFrame
+    """
+    publish(path, store_path, lambda target: build_store(path, target))
+
+    return read_store(store_path)
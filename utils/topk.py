@@ -0,0 +1,136 @@
+# Imports
+import heapq
+import os
+
+from itertools import groupby, islice
+
+import numpy     as np
+import pandas    as pd
+import streamlit as st
+
+from utils.cuisines        import CuisineMap, load_cuisines
+from utils.instrumentation import timed
+from utils.shared          import load_arrays, save_arrays
+from utils.store           import CSV_PATH, LIVE_VERSIONS, load_data, publish
+
+TOPK_PATH = 'datasets/store/zomato.topk.arrays'
+TOPK_SIZE = int(os.environ.get('FOME_ZERO_TOPK_SIZE', 100))
+TOPK_ARRAYS = ['countries', 'cuisines', 'offsets', 'rows', 'key', 'restaurant_id']
+
+class TopK:
+    """ Melhores restaurantes de cada (país, culinária), já ordenados por avaliação (decrescente) e restaurant_id.
+        Um restaurante entra na lista de cada uma das suas culinárias. Consultas sobre vários países/culinárias
+        juntam as listas com um merge de K vias, descartando o mesmo restaurante vindo de outra culinária.
+        As listas ficam em vetores contínuos (a do grupo i ocupa o trecho offsets[i]:offsets[i + 1]), gravados ao lado
+        do arquivo colunar e compartilhados entre os workers
+    """
+
+    def __init__(self, df, k=TOPK_SIZE, cuisines=None):
+        self.k = k
+        cuisines = CuisineMap(df['cuisines']) if cuisines is None else cuisines
+
+        # Uma única ordenação global; cada (país, lista de culinárias) mantém apenas as suas k primeiras linhas
+        rating = df['aggregate_rating'].to_numpy()
+        restaurant_id = df['restaurant_id'].to_numpy()
+        order = np.lexsort((restaurant_id, -rating))
+
+        ranked = df.loc[:, ['country', 'cuisines']].iloc[order]
+        ranked['row'] = order
+        ranked = ranked.groupby(['country', 'cuisines'], observed=True).head(k)
+
+        # Os k melhores de uma culinária estão entre os k melhores das listas que a contêm: só esses candidatos
+        # são repetidos por culinária, ainda na ordem global
+        rows, codes = cuisines.pairs(ranked['row'].to_numpy())
+        country = df['country'].cat.codes.to_numpy().astype('int64')[rows]
+        group = country * len(cuisines.names) + codes
+        keep = pd.Series(group).groupby(group).cumcount().to_numpy() < k
+
+        # A ordenação estável por grupo mantém cada lista na ordem global
+        rows, group = rows[keep], group[keep]
+        order = np.argsort(group, kind='stable')
+        rows, group = rows[order], group[order]
+        first = np.flatnonzero(np.diff(group, prepend=-1))
+
+        self.countries = np.asarray(df['country'].cat.categories, dtype=str)[group[first] // max(len(cuisines.names), 1)]
+        self.cuisines = cuisines.names.astype(str)[group[first] % max(len(cuisines.names), 1)]
+        self.offsets = np.append(first, len(rows)).astype('int64')
+        self.rows = rows.astype('int64')
+        self.key = -rating[rows]
+        self.restaurant_id = restaurant_id[rows]
+        self.groups = self.positions()
+
+    def positions(self):
+        """ Esta função tem a responsabilidade de localizar a lista de cada (país, culinária)
+
+            Input: None
+            Output: dict ((país, culinária) -> posição da lista)
+        """
+        return {key: position for position, key in enumerate(zip(self.countries.tolist(), self.cuisines.tolist()))}
+
+    def save(self, path=TOPK_PATH):
+        """ Esta função tem a responsabilidade de gravar as listas ao lado do arquivo colunar, com troca atômica
+
+            Input: path (str)
+            Output: str
+        """
+        arrays = {name: getattr(self, name) for name in TOPK_ARRAYS}
+
+        return save_arrays(path, dict(arrays, k=np.array([self.k], dtype='int64')))
+
+    @classmethod
+    def load(cls, path=TOPK_PATH):
+        """ Esta função tem a responsabilidade de abrir as listas gravadas com memory-map (somente leitura, compartilhadas entre os workers)
+
+            Input: path (str)
+            Output: TopK
+        """
+        arrays = load_arrays(path)
+        topk = cls.__new__(cls)
+        topk.k = int(arrays['k'][0])
+
+        for name in TOPK_ARRAYS:
+            setattr(topk, name, arrays[name])
+
+        topk.groups = topk.positions()
+
+        return topk
+
+    def stream(self, position):
+        """ Esta função tem a responsabilidade de percorrer uma lista como chaves de ordenação (avaliação, restaurant_id, linha)
+
+            Input: position (int)
+            Output: iterator
+        """
+        start, end = self.offsets[position], self.offsets[position + 1]
+
+        return zip(self.key[start:end].tolist(), self.restaurant_id[start:end].tolist(), self.rows[start:end].tolist())
+
+    @timed('top_k', rows=len)
+    def top(self, countries, cuisines, n):
+        """ Esta função tem a responsabilidade de devolver as posições das n melhores linhas dos países e culinárias selecionados
+
+            Input: countries (list), cuisines (list), n (int)
+            Output: list
+        """
+        if n > self.k:
+            raise ValueError(f'O índice guarda apenas os {self.k} melhores restaurantes de cada grupo')
+
+        streams = [self.stream(self.groups[key]) for key in ((country, cuisine) for country in countries for cuisine in cuisines) if key in self.groups]
+
+        # O mesmo restaurante tem a mesma chave em todas as listas, então as repetições saem em sequência
+        rows = (row for _, _, row in heapq.merge(*streams))
+
+        return [row for row, _ in islice(groupby(rows), n)]
+
+@st.cache_resource(max_entries=LIVE_VERSIONS, show_spinner=False)
+def load_topk(path=CSV_PATH, version=0, topk_path=TOPK_PATH):
+    """ Esta função tem a responsabilidade de carregar as listas de melhores restaurantes uma única vez por versão do dataset,
+        reconstruindo-as apenas quando o .CSV limpo for mais novo
+
+        Input: path (str), version (int), topk_path (str)
+        Output: TopK
+    """
+    df, cuisines = load_data(path, version), load_cuisines(path, version)
+    publish(path, topk_path, lambda target: TopK(df, cuisines=cuisines).save(target))
+
+    return TopK.load(topk_path)
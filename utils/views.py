@@ -0,0 +1,174 @@
+# Imports
+from utils.charts import create_bar_graph
+from utils.cube   import mean
+
+# Seleções padrão da barra lateral das páginas
+DEFAULT_COUNTRIES = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+DEFAULT_CUISINES = ['American', 'Arabian', 'BBQ', 'Brazilian', 'Home-made', 'Italian', 'Japanese']
+DEFAULT_RESTAURANTS = 10
+
+# Quantidade de tipos de culinária exibidos nas métricas da página de culinárias (os com mais restaurantes na seleção)
+MAIN_CUISINES = 5
+
+# Colunas da tabela de melhores restaurantes
+TOP_COLUMNS = ['restaurant_id', 'restaurant_name', 'country', 'city', 'cuisines', 'average_cost_for_two', 'currency', 'cost_for_two_usd', 'aggregate_rating', 'votes']
+
+# -------------------------------
+# Visão Países
+# -------------------------------
+
+def country_restaurants_graph(by_country, source):
+    """ Esta função tem a responsabilidade de criar o gráfico da quantidade de restaurantes por país
+
+        Input: by_country (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    restaurants_by_country = by_country.sort_values('restaurants', ascending=False)
+
+    return create_bar_graph(source, restaurants_by_country, True, {'x': {'country': 'Países'}, 'y': {'restaurants': 'Quantidade de restaurantes'}}, 'Quantidade de restaurantes registrados por país')
+
+def country_cities_graph(backend, countries, source):
+    """ Esta função tem a responsabilidade de criar o gráfico da quantidade de cidades por país
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    cities_by_country = backend.distinct('country', 'city', countries).sort_values('city', ascending=False)
+
+    return create_bar_graph(source, cities_by_country, True, {'x': {'country': 'Países'}, 'y': {'city': 'Quantidade de cidades'}}, 'Quantidade de cidades registradas por país')
+
+def country_votes_graph(by_country, source):
+    """ Esta função tem a responsabilidade de criar o gráfico da média de avaliações feitas por país
+
+        Input: by_country (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    votes_by_country = mean(by_country, 'votes').sort_values('votes', ascending=False)
+
+    return create_bar_graph(source, votes_by_country, '.2f', {'x': {'country': 'Países'}, 'y': {'votes': 'Quantidade de avaliações'}}, 'Média de avaliações feitas por país')
+
+def country_cost_graph(by_country, source):
+    """ Esta função tem a responsabilidade de criar o gráfico da média de preço de um prato para duas pessoas por país,
+        em dólares para que os países sejam comparáveis
+
+        Input: by_country (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    average_cost_for_two_by_country = mean(by_country, 'cost_usd').sort_values('cost_usd', ascending=False)
+
+    return create_bar_graph(source, average_cost_for_two_by_country, '.2f', {'x': {'country': 'Países'}, 'y': {'cost_usd': 'Preço de prato para duas pessoas (US$)'}}, 'Média de preço de um prato para duas pessoas por país (US$)')
+
+def country_charts(backend, countries, source):
+    """ Esta função tem a responsabilidade de devolver os gráficos da página de países, cada um como uma função independente
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), source (tuple - path e versão do dataset)
+        Output: dict (nome -> callable)
+    """
+    by_country = backend.rollup('country', countries)
+
+    return {
+        'restaurants_graph': lambda: country_restaurants_graph(by_country, source),
+        'cities_graph': lambda: country_cities_graph(backend, countries, source),
+        'votes_graph': lambda: country_votes_graph(by_country, source),
+        'cost_graph': lambda: country_cost_graph(by_country, source)
+    }
+
+# -------------------------------
+# Visão Cidades
+# -------------------------------
+
+def city_restaurants_graph(by_city, source):
+    """ Esta função tem a responsabilidade de criar o gráfico das 10 cidades com mais restaurantes
+
+        Input: by_city (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    top_10_most_restaurants = by_city.sort_values(['restaurants', 'city'], ascending=[False, True]).head(10)
+
+    return create_bar_graph(source, top_10_most_restaurants, True, {'x': {'city': 'Cidades'}, 'y': {'restaurants': 'Quantidade de restaurantes'}}, 'Top 10 cidades com mais restaurantes', 'country')
+
+def city_best_ratings_graph(by_city, source):
+    """ Esta função tem a responsabilidade de criar o gráfico das 7 cidades com mais restaurantes com média de avaliação acima de 4
+
+        Input: by_city (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    top_7_best_ratings = by_city.loc[by_city['rating_high'] > 0, :].sort_values(['rating_high', 'city'], ascending=[False, True]).head(7)
+
+    return create_bar_graph(source, top_7_best_ratings, True, {'x': {'city': 'Cidades'}, 'y': {'rating_high': 'Quantidade de restaurantes'}}, 'Top 7 cidades com restaurantes com média de avaliação acima de 4', 'country')
+
+def city_worst_ratings_graph(by_city, source):
+    """ Esta função tem a responsabilidade de criar o gráfico das 7 cidades com mais restaurantes com média de avaliação abaixo de 2.5
+
+        Input: by_city (DataFrame), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    top_7_worst_ratings = by_city.loc[by_city['rating_low'] > 0, :].sort_values(['rating_low', 'country'], ascending=[False, True]).head(7)
+
+    return create_bar_graph(source, top_7_worst_ratings, True, {'x': {'city': 'Cidades'}, 'y': {'rating_low': 'Quantidade de restaurantes'}}, 'Top 7 cidades com restaurantes com média de avaliação abaixo de 2.5', 'country')
+
+def city_cuisines_graph(backend, countries, source):
+    """ Esta função tem a responsabilidade de criar o gráfico das 10 cidades com mais tipos culinários distintos
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), source (tuple - path e versão do dataset)
+        Output: Figure
+    """
+    top_10_most_culinaries = backend.distinct(['country', 'city'], 'cuisines', countries).sort_values(['cuisines', 'city'], ascending=[False, True]).head(10)
+
+    return create_bar_graph(source, top_10_most_culinaries, True, {'x': {'city': 'Cidades'}, 'y': {'cuisines': 'Quantidade de tipos culinários'}}, 'Top 10 cidades com tipos culinários distintos', 'country')
+
+def city_charts(backend, countries, source):
+    """ Esta função tem a responsabilidade de devolver os gráficos da página de cidades, cada um como uma função independente
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), source (tuple - path e versão do dataset)
+        Output: dict (nome -> callable)
+    """
+    by_city = backend.rollup(['country', 'city'], countries)
+
+    return {
+        'restaurants_graph': lambda: city_restaurants_graph(by_city, source),
+        'best_ratings_graph': lambda: city_best_ratings_graph(by_city, source),
+        'worst_ratings_graph': lambda: city_worst_ratings_graph(by_city, source),
+        'cuisines_graph': lambda: city_cuisines_graph(backend, countries, source)
+    }
+
+# -------------------------------
+# Visão Tipos Culinários
+# -------------------------------
+
+def main_cuisines(backend, countries, n=MAIN_CUISINES):
+    """ Esta função tem a responsabilidade de escolher os principais tipos culinários da seleção: os n com mais restaurantes
+        no cubo por culinária, desempatando pelo nome
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), n (int)
+        Output: list
+    """
+    restaurants_by_cuisine = backend.rollup('cuisines', countries).sort_values(['restaurants', 'cuisines'], ascending=[False, True])
+
+    return restaurants_by_cuisine['cuisines'].head(n).astype(str).tolist()
+
+def best_by_cuisine(backend, countries):
+    """ Esta função tem a responsabilidade de buscar o melhor restaurante de cada um dos principais tipos culinários da seleção
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list)
+        Output: list (pares culinária e Series, na ordem de main_cuisines)
+    """
+    return [(cuisine, backend.top(countries, [cuisine], 1, TOP_COLUMNS).iloc[0, :]) for cuisine in main_cuisines(backend, countries)]
+
+def cuisine_charts(backend, countries, source):
+    """ Esta função tem a responsabilidade de criar os gráficos dos melhores e piores tipos culinários
+
+        Input: backend (PandasBackend ou SQLiteBackend), countries (list), source (tuple - path e versão do dataset)
+        Output: dict (nome -> Figure)
+    """
+    rating_by_cuisine = mean(backend.rollup('cuisines', countries), 'rating')
+    labels = {'x': {'cuisines': 'Tipo de culinária'}, 'y': {'rating': 'Avaliação média'}}
+
+    # Melhores e piores tipos de culinária
+    top_best_cuisines = rating_by_cuisine.sort_values('rating', ascending=False).head(10)
+    top_worst_cuisines = rating_by_cuisine.sort_values('rating', ascending=True).head(10)
+
+    return {
+        'best_graph': create_bar_graph(source, top_best_cuisines, True, labels, 'Melhores Tipos de Culinária (todos)'),
+        'worst_graph': create_bar_graph(source, top_worst_cuisines, True, labels, 'Piores Tipos de Culinária (todos)')
+    }
@@ -0,0 +1,123 @@
+# Imports
+import importlib
+import sys
+import threading
+import types
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.store import CSV_PATH, STORE_PATH, build_store, publish
+
+# Bibliotecas pesadas que as páginas só importam quando desenham gráficos e mapas (o plotly.offline, que importa o IPython,
+# só é importado pelo plotly na primeira figura)
+WARM_MODULES = ['pyarrow.feather', 'plotly.express', 'plotly.offline', 'folium', 'folium.plugins', 'jinja2', 'streamlit_folium']
+WARM_CHUNK = 16 * 1024 ** 2
+
+_lock = threading.Lock()
+_started = set()
+
+def warm_imports(modules=WARM_MODULES):
+    """ Esta função tem a responsabilidade de importar as bibliotecas pesadas antes da primeira página precisar delas
+
+        Input: modules (list)
+        Output: None
+    """
+    for module in modules:
+        importlib.import_module(module)
+
+    detach_main()
+
+def detach_main():
+    """ Esta função tem a responsabilidade de soltar a página presa por bibliotecas que fazem 'import __main__' ao serem importadas
+        (o completer do IPython). Durante uma sessão o __main__ é a própria página do Streamlit, e a referência manteria
+        para sempre as variáveis do rerun que fez a importação, com os recursos da sua versão do dataset
+
+        Input: None
+        Output: None
+    """
+    main = sys.modules.get('__main__')
+
+    for module in list(sys.modules.values()):
+        # vars(): alguns pacotes (como o plotly) importam submódulos em getattr
+        if module is not None and vars(module).get('__main__') is main:
+            module.__main__ = types.ModuleType('__main__')
+
+def warm_store(path=CSV_PATH, store_path=STORE_PATH):
+    """ Esta função tem a responsabilidade de garantir o arquivo colunar atualizado e trazê-lo para o cache de páginas do SO,
+        para que a leitura com memory-map da primeira sessão não espere o disco
+
+        Input: path (str), store_path (str)
+        Output: None
+    """
+    publish(path, store_path, lambda target: build_store(path, target))
+
+    with open(store_path, 'rb') as file:
+        while file.read(WARM_CHUNK):
+            pass
+
+def warm_search(path=CSV_PATH):
+    """ Esta função tem a responsabilidade de garantir o índice de busca atualizado ao lado do arquivo colunar
+
+        Input: path (str)
+        Output: None
+    """
+    from utils.search import SEARCH_PATH, build_search
+
+    publish(path, SEARCH_PATH, lambda target: build_search(path, target))
+
+def warm_caches(path=CSV_PATH, version=0):
+    """ Esta função tem a responsabilidade de construir os recursos compartilhados de uma versão do dataset
+        (backend de dados, índices, índice espacial, busca, grade, exportador)
+
+        Input: path (str), version (int)
+        Output: None
+    """
+    from utils.backend   import load_backend
+    from utils.export    import load_exporter
+    from utils.geo       import load_geo
+    from utils.index     import load_index
+    from utils.maps      import load_grid
+    from utils.search    import load_search
+    from utils.snapshots import SNAPSHOTS, load_snapshots
+
+    for load in [load_backend, load_index, load_geo, load_search, load_grid, load_exporter] + ([load_snapshots] if SNAPSHOTS else []):
+        load(path, version)
+
+def warmup(path=CSV_PATH, caches=False, version=0):
+    """ Esta função tem a responsabilidade de executar o aquecimento completo (executada na thread de aquecimento)
+
+        Input: path (str), caches (bool), version (int)
+        Output: None
+    """
+    warm_store(path)
+    warm_search(path)
+    warm_imports()
+
+    if caches:
+        warm_caches(path, version)
+
+def start_warmup(path=CSV_PATH, version=0):
+    """ Esta função tem a responsabilidade de iniciar o aquecimento em segundo plano, uma única vez por processo.
+        Na partida do servidor aquece bibliotecas e arquivo colunar; dentro de uma sessão também constrói os recursos
+        do st.cache_resource (da versão do dataset em uso), que só grava resultados com o contexto de uma sessão
+
+        Input: path (str), version (int)
+        Output: Thread ou None
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    kind = 'boot' if ctx is None else 'session'
+
+    with _lock:
+        if kind in _started:
+            return None
+
+        _started.add(kind)
+
+    thread = threading.Thread(target=warmup, args=(path, ctx is not None, version), name=f'fome-zero-warmup-{kind}', daemon=True)
+
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+
+    thread.start()
+
+    return thread
@@ -0,0 +1,71 @@
+""" Inicia vários workers do dashboard na mesma máquina, em portas seguidas, para ficarem atrás do proxy reverso local.
+    Este processo é o carregador: publica o arquivo colunar e os índices (utils.shared) antes dos workers subirem e,
+    depois, a cada mudança do .CSV limpo. Os workers apenas abrem os arquivos publicados, sem copiar os dados
+
+    Uso: python -m utils.workers [--workers N] [--port PORTA] [--watch SEGUNDOS] [opções do streamlit run]
+"""
+# Imports
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+from utils.dataset import DATASET_INTERVAL
+from utils.shared  import build_shared, watch_shared
+from utils.store   import CSV_PATH
+
+WORKERS = int(os.environ.get('FOME_ZERO_WORKERS', 2))   # processos do Streamlit iniciados pelo utils.workers
+
+def start_worker(port, options):
+    """ Esta função tem a responsabilidade de iniciar um worker (utils.serve) em uma porta
+
+        Input: port (int), options (list - opções do streamlit run)
+        Output: Popen
+    """
+    command = [sys.executable, '-m', 'utils.serve', '--server.port', str(port), '--server.headless', 'true', *options]
+
+    return subprocess.Popen(command)
+
+def stop(signum, frame):
+    """ Esta função tem a responsabilidade de encerrar o carregador pelo SIGTERM, como pelo Ctrl+C, para que os workers sejam parados
+
+        Input: signum (int), frame (frame)
+        Output: None
+    """
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description='Inicia o carregador dos dados compartilhados e vários workers do dashboard')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='quantidade de workers')
+    parser.add_argument('--port', type=int, default=8501, help='porta do primeiro worker (as seguintes são consecutivas)')
+    parser.add_argument('--watch', type=float, default=DATASET_INTERVAL, help='segundos entre as verificações do .CSV (0 desliga)')
+    args, options = parser.parse_known_args()
+
+    # Os workers só sobem com os dados publicados: nenhum deles constrói nada na partida
+    build_shared(CSV_PATH)
+
+    signal.signal(signal.SIGTERM, stop)
+    workers = [start_worker(args.port + number, options) for number in range(args.workers)]
+
+    print(f'workers nas portas {", ".join(str(args.port + number) for number in range(args.workers))}', flush=True)
+
+    try:
+        if args.watch > 0:
+            watch_shared(CSV_PATH, args.watch)
+
+        for worker in workers:
+            worker.wait()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+        for worker in workers:
+            worker.wait()
+
+if __name__ == '__main__':
+    main()